@@ -0,0 +1,85 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from LevelsLoader import LevelsLoader
+from HeadlessLevelRunner import HeadlessLevelRunner
+from HeadlessRunResult import HeadlessRunResult
+
+
+def _run_scenario(scenario: Tuple[str, int, str, int, bool, bool]) -> HeadlessRunResult:
+    """Runs a single (level, policy, seed) scenario; lives at module level so worker processes can unpickle it."""
+    levels_root_path, level_num, policy_name, seed, vectorized_customers, event_driven = scenario
+    runner = HeadlessLevelRunner(LevelsLoader(levels_root_path), level_num, policy_name=policy_name, seed=seed, vectorized_customers=vectorized_customers, event_driven=event_driven)
+    return runner.run()
+
+
+class BatchScenarioRunner:
+    def __init__(self, levels_root_path: str, seeds: List[int], policy_names: List[str], level_nums: Optional[List[int]] = None, workers: Optional[int] = None, vectorized_customers: bool = False, event_driven: bool = False):
+        """
+        Runs every combination of level, assignment policy and seed headless, spread over a process pool.
+
+        Args:
+            levels_root_path (str): The root directory containing level folders.
+            seeds (List[int]): The random seeds to run every level and policy with.
+            policy_names (List[str]): The assignment policies to run, see AssignmentPolicyFactory.
+            level_nums (Optional[List[int]]): The levels to run; all levels found by LevelsLoader if None.
+            workers (Optional[int]): The number of worker processes; one per CPU core if None.
+            vectorized_customers (bool): Move customers with the NumPy VectorizedCustomerEngine.
+            event_driven (bool): Jump between events instead of stepping every frame, see HeadlessLevelRunner.
+        """
+        self.levels_root_path = levels_root_path
+        self.seeds = seeds
+        self.policy_names = policy_names
+        self.level_nums = level_nums if level_nums is not None else LevelsLoader(levels_root_path).available_levels()
+        self.workers = workers or os.cpu_count() or 1
+        self.vectorized_customers = vectorized_customers
+        self.event_driven = event_driven
+        self.wall_time = 0.0
+
+    def run(self) -> List[HeadlessRunResult]:
+        """Runs all scenarios and returns their results, ordered by level, policy and seed."""
+        scenarios = [(self.levels_root_path, level_num, policy_name, seed, self.vectorized_customers, self.event_driven)
+                     for level_num in self.level_nums
+                     for policy_name in self.policy_names
+                     for seed in self.seeds]
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(_run_scenario, scenarios))
+        self.wall_time = time.perf_counter() - start
+        return results
+
+    @staticmethod
+    def format_results_table(results: List[HeadlessRunResult]) -> str:
+        """
+        Merges the results of all seeds into one row per level and policy.
+
+        Returns:
+            str: A printable table with run counts, penalties and timings.
+        """
+        header = f"{'Level':>5}  {'Policy':<14}{'Runs':>5}{'Done':>5}  {'Min':>10}{'Mean':>10}{'Max':>10}  {'Sim s':>8}{'Wall s':>8}{'Speedup':>9}"
+        lines = [header, "-" * len(header)]
+
+        groups = {}
+        for result in results:
+            groups.setdefault((result.level_num, result.policy_name), []).append(result)
+
+        for (level_num, policy_name), group in groups.items():
+            penalties = [r.total_penalty for r in group]
+            level_time = sum(r.level_time for r in group) / len(group)
+            wall_time = sum(r.wall_time for r in group) / len(group)
+            speedup = level_time / wall_time if wall_time > 0 else float("inf")
+            completed = sum(1 for r in group if r.is_complete)
+            lines.append(f"{level_num:>5}  {policy_name:<14}{len(group):>5}{completed:>5}  {min(penalties):>10.2f}{sum(penalties) / len(penalties):>10.2f}{max(penalties):>10.2f}  {level_time:>8.1f}{wall_time:>8.3f}{speedup:>8.0f}x")
+        return "\n".join(lines)
+
+    @staticmethod
+    def write_csv(results: List[HeadlessRunResult], file_path: str):
+        """Writes one row per run to a CSV file."""
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["level", "policy", "seed", "is_complete", "total_penalty", "level_time", "frames", "wall_time"])
+            for r in results:
+                writer.writerow([r.level_num, r.policy_name, r.seed, r.is_complete, f"{r.total_penalty:.4f}", f"{r.level_time:.4f}", r.frames, f"{r.wall_time:.4f}"])
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+from RawCustomerData import RawCustomerData
+from RawSpawnLocationData import RawSpawnLocationData
+
+
+class CompiledLevelCache:
+    """
+    Reads and writes the compiled form of a level's CSV files: one binary file with the spawn columns as packed arrays,
+    so loading a level is a few bulk reads instead of parsing a CSV row by row.
+
+    The header records the modification time and size of both CSV files plus a SHA-256 of their contents. A compiled
+    file whose stamps match is used as is. If only the stamps differ, the sources are hashed: a matching hash just
+    refreshes the stamps, anything else makes the compiled file stale.
+    """
+    FILE_NAME = "level.compiled"
+    MAGIC = b"LIFTLVL\0"
+    VERSION = 2
+    # Version, then modification time and size of the customer spawns and spawn locations CSVs, then the sources' hash
+    _HEADER = struct.Struct("<Hqqqq32s")
+    _COUNT = struct.Struct("<I")
+    # The struct formats of the spawn columns (timestamp, spawn location index, priority code, target floor) and the
+    # spawn location columns (floor, x); fixed-width and little-endian, so the file is the same on every platform
+    _SPAWN_COLUMNS = "dIBi"
+    _LOCATION_COLUMNS = "ii"
+
+    @staticmethod
+    def compiled_path(customer_spawns_path: str) -> str:
+        """The path of the compiled file, next to the level's CSV files."""
+        return os.path.join(os.path.dirname(customer_spawns_path), CompiledLevelCache.FILE_NAME)
+
+    @staticmethod
+    def read(customer_spawns_path: str, spawn_locations_path: str) -> Optional[Tuple[List[RawCustomerData], Dict[int, List[RawSpawnLocationData]]]]:
+        """
+        Loads the level from its compiled file.
+
+        Returns:
+            The customer spawns and spawn locations, as LevelsLoader parses them from the CSVs, or None if there is
+            no valid compiled file for the current sources.
+        """
+        body = CompiledLevelCache._read_body(customer_spawns_path, spawn_locations_path)
+        if body is None:
+            return None
+        try:
+            return CompiledLevelCache._decode(body)
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            print(f"Ignoring corrupt compiled level '{CompiledLevelCache.compiled_path(customer_spawns_path)}': {e}")
+            return None
+
+    @staticmethod
+    def read_summary(customer_spawns_path: str, spawn_locations_path: str) -> Optional[Tuple[int, float, int]]:
+        """
+        Summarizes the level from its compiled file, decoding only the columns needed, for indexing it without
+        building its spawns.
+
+        Returns:
+            The number of customer spawns, the latest spawn timestamp (0 without spawns) and the number of spawn
+            locations, or None if there is no valid compiled file for the current sources.
+        """
+        body = CompiledLevelCache._read_body(customer_spawns_path, spawn_locations_path)
+        if body is None:
+            return None
+        try:
+            _, offset = CompiledLevelCache._skip_strings(body, 0)
+            _, offset = CompiledLevelCache._skip_strings(body, offset)
+            (spawn_count,) = CompiledLevelCache._COUNT.unpack_from(body, offset)
+            offset += CompiledLevelCache._COUNT.size
+            timestamps, offset = CompiledLevelCache._read_column(body, offset, 'd', spawn_count)
+            # Past the spawn indexes, priority codes and target floors
+            offset += struct.calcsize("<" + CompiledLevelCache._SPAWN_COLUMNS[1:]) * spawn_count
+            (location_count,) = CompiledLevelCache._COUNT.unpack_from(body, offset)
+        except (ValueError, struct.error) as e:
+            print(f"Ignoring corrupt compiled level '{CompiledLevelCache.compiled_path(customer_spawns_path)}': {e}")
+            return None
+        return spawn_count, max(timestamps, default=0.0), location_count
+
+    @staticmethod
+    def _read_body(customer_spawns_path: str, spawn_locations_path: str) -> Optional[memoryview]:
+        """The contents of the compiled file after its header, or None if there is no valid one for the current sources."""
+        path = CompiledLevelCache.compiled_path(customer_spawns_path)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        header_end = len(CompiledLevelCache.MAGIC) + CompiledLevelCache._HEADER.size
+        if len(data) < header_end or not data.startswith(CompiledLevelCache.MAGIC):
+            return None
+        version, *stamps, source_hash = CompiledLevelCache._HEADER.unpack_from(data, len(CompiledLevelCache.MAGIC))
+        if version != CompiledLevelCache.VERSION:
+            return None
+
+        current_stamps = CompiledLevelCache._source_stamps(customer_spawns_path, spawn_locations_path)
+        if current_stamps is None:
+            return None
+        if tuple(stamps) != current_stamps:
+            # Touched or copied, maybe without changing the contents
+            try:
+                current_hash = CompiledLevelCache._source_hash(customer_spawns_path, spawn_locations_path)
+            except OSError:
+                # Removed or made unreadable since the stat
+                return None
+            if current_hash != source_hash:
+                return None
+            CompiledLevelCache._rewrite_header(path, customer_spawns_path, data, current_stamps, source_hash)
+        return memoryview(data)[header_end:]
+
+    @staticmethod
+    def source_signature(customer_spawns_path: str, spawn_locations_path: str) -> Optional[Tuple[Tuple[int, int, int, int], bytes]]:
+        """
+        The stamps and hash of the level's CSV files, as write() records them; take them before parsing the CSVs, so
+        an edit while parsing makes the compiled file stale instead of stamping the old contents as current.
+
+        Returns:
+            The modification times and sizes, and the SHA-256 of the contents, or None if a file is missing.
+        """
+        # Stamps first: if a file changes while it is hashed, the stamps are out of date and the next read re-hashes
+        stamps = CompiledLevelCache._source_stamps(customer_spawns_path, spawn_locations_path)
+        if stamps is None:
+            return None
+        try:
+            return stamps, CompiledLevelCache._source_hash(customer_spawns_path, spawn_locations_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def write(customer_spawns_path: str, spawn_locations_path: str, customer_spawns: List[RawCustomerData], spawn_locations: Dict[int, List[RawSpawnLocationData]],
+              source_signature: Tuple[Tuple[int, int, int, int], bytes]):
+        """
+        Compiles the parsed level next to its CSV files. Failing to write only costs the speed-up, so it is not an error.
+
+        Args:
+            customer_spawns_path (str): The path of the customer spawns CSV.
+            spawn_locations_path (str): The path of the spawn locations CSV.
+            customer_spawns (List[RawCustomerData]): The spawns parsed from the CSV.
+            spawn_locations (Dict[int, List[RawSpawnLocationData]]): The spawn locations parsed from the CSV.
+            source_signature: source_signature() of the CSVs, taken before they were parsed.
+        """
+        path = CompiledLevelCache.compiled_path(customer_spawns_path)
+        stamps, source_hash = source_signature
+
+        # String columns are stored as indexes into a table of their distinct values
+        spawn_ids = list(dict.fromkeys(spawn.spawn_id for spawn in customer_spawns))
+        priorities = list(dict.fromkeys(spawn.priority for spawn in customer_spawns))
+        spawn_id_indexes = {spawn_id: i for i, spawn_id in enumerate(spawn_ids)}
+        priority_indexes = {priority: i for i, priority in enumerate(priorities)}
+        if len(priorities) > 256:
+            print(f"Not compiling '{customer_spawns_path}': too many distinct priorities")
+            return
+
+        spawn_columns = (
+            [spawn.timestamp for spawn in customer_spawns],
+            [spawn_id_indexes[spawn.spawn_id] for spawn in customer_spawns],
+            [priority_indexes[spawn.priority] for spawn in customer_spawns],
+            [spawn.target_floor for spawn in customer_spawns],
+        )
+        location_columns = (
+            [location.floor_number for locations in spawn_locations.values() for location in locations],
+            [location.x for locations in spawn_locations.values() for location in locations],
+        )
+
+        try:
+            parts = [
+                CompiledLevelCache.MAGIC,
+                CompiledLevelCache._HEADER.pack(CompiledLevelCache.VERSION, *stamps, source_hash),
+                CompiledLevelCache._encode_strings(spawn_ids),
+                CompiledLevelCache._encode_strings(priorities),
+                CompiledLevelCache._COUNT.pack(len(customer_spawns)),
+                *(CompiledLevelCache._pack_column(code, column) for code, column in zip(CompiledLevelCache._SPAWN_COLUMNS, spawn_columns)),
+                CompiledLevelCache._COUNT.pack(len(location_columns[0])),
+                *(CompiledLevelCache._pack_column(code, column) for code, column in zip(CompiledLevelCache._LOCATION_COLUMNS, location_columns)),
+            ]
+        except struct.error as e:
+            print(f"Not compiling '{customer_spawns_path}': {e}")
+            return
+
+        try:
+            CompiledLevelCache._replace_file(path, customer_spawns_path, b"".join(parts))
+        except OSError as e:
+            print(f"Could not write compiled level '{path}': {e}")
+
+    @staticmethod
+    def _replace_file(path: str, customer_spawns_path: str, data: bytes):
+        """
+        Writes data to a file of its own and swaps it in for path, so loaders running at the same time never see half
+        a file. The file gets the customer spawns CSV's permissions, so whoever can read the level can read its
+        compiled form; mkstemp alone would leave it readable by its creator only.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=CompiledLevelCache.FILE_NAME + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_path, os.stat(customer_spawns_path).st_mode & 0o777)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _decode(data: memoryview) -> Tuple[List[RawCustomerData], Dict[int, List[RawSpawnLocationData]]]:
+        offset = 0
+        spawn_ids, offset = CompiledLevelCache._decode_strings(data, offset)
+        priorities, offset = CompiledLevelCache._decode_strings(data, offset)
+
+        (spawn_count,) = CompiledLevelCache._COUNT.unpack_from(data, offset)
+        offset += CompiledLevelCache._COUNT.size
+        timestamps, offset = CompiledLevelCache._read_column(data, offset, 'd', spawn_count)
+        spawn_indexes, offset = CompiledLevelCache._read_column(data, offset, 'I', spawn_count)
+        priority_codes, offset = CompiledLevelCache._read_column(data, offset, 'B', spawn_count)
+        target_floors, offset = CompiledLevelCache._read_column(data, offset, 'i', spawn_count)
+
+        (location_count,) = CompiledLevelCache._COUNT.unpack_from(data, offset)
+        offset += CompiledLevelCache._COUNT.size
+        location_floors, offset = CompiledLevelCache._read_column(data, offset, 'i', location_count)
+        location_xs, offset = CompiledLevelCache._read_column(data, offset, 'i', location_count)
+        if offset != len(data):
+            raise ValueError("unexpected trailing data")
+
+        customer_spawns = list(map(RawCustomerData, timestamps, map(spawn_ids.__getitem__, spawn_indexes), map(priorities.__getitem__, priority_codes), target_floors))
+        spawn_locations: Dict[int, List[RawSpawnLocationData]] = {}
+        for floor, x in zip(location_floors, location_xs):
+            spawn_locations.setdefault(floor, []).append(RawSpawnLocationData(floor, x))
+        return customer_spawns, spawn_locations
+
+    @staticmethod
+    def _encode_strings(values: List[str]) -> bytes:
+        encoded = "\n".join(values).encode('utf-8')
+        return CompiledLevelCache._COUNT.pack(len(values)) + CompiledLevelCache._COUNT.pack(len(encoded)) + encoded
+
+    @staticmethod
+    def _decode_strings(data: memoryview, offset: int) -> Tuple[List[str], int]:
+        (count,) = CompiledLevelCache._COUNT.unpack_from(data, offset)
+        (length,) = CompiledLevelCache._COUNT.unpack_from(data, offset + CompiledLevelCache._COUNT.size)
+        offset += 2 * CompiledLevelCache._COUNT.size
+        values = bytes(data[offset:offset + length]).decode('utf-8').split("\n") if count else []
+        if len(values) != count:
+            raise ValueError("string table size mismatch")
+        return values, offset + length
+
+    @staticmethod
+    def _skip_strings(data: memoryview, offset: int) -> Tuple[int, int]:
+        """The number of strings in the table at offset, and the offset after it, without decoding them."""
+        (count,) = CompiledLevelCache._COUNT.unpack_from(data, offset)
+        (length,) = CompiledLevelCache._COUNT.unpack_from(data, offset + CompiledLevelCache._COUNT.size)
+        return count, offset + 2 * CompiledLevelCache._COUNT.size + length
+
+    @staticmethod
+    def _read_column(data: memoryview, offset: int, code: str, count: int) -> Tuple[Tuple, int]:
+        """Unpacks count values of the struct format character code at offset; returns them and the offset after them."""
+        column = struct.Struct(f"<{count}{code}")
+        end = offset + column.size
+        if end > len(data):
+            raise ValueError("truncated column")
+        return column.unpack_from(data, offset), end
+
+    @staticmethod
+    def _pack_column(code: str, values: Sequence) -> bytes:
+        return struct.pack(f"<{len(values)}{code}", *values)
+
+    @staticmethod
+    def _source_stamps(customer_spawns_path: str, spawn_locations_path: str) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            customer_spawns_stat = os.stat(customer_spawns_path)
+            spawn_locations_stat = os.stat(spawn_locations_path)
+        except OSError:
+            return None
+        return customer_spawns_stat.st_mtime_ns, customer_spawns_stat.st_size, spawn_locations_stat.st_mtime_ns, spawn_locations_stat.st_size
+
+    @staticmethod
+    def _source_hash(customer_spawns_path: str, spawn_locations_path: str) -> bytes:
+        source_hash = hashlib.sha256()
+        for path in (customer_spawns_path, spawn_locations_path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    source_hash.update(chunk)
+            # Keep the boundary between the files part of the hash
+            source_hash.update(b"\0")
+        return source_hash.digest()
+
+    @staticmethod
+    def _rewrite_header(path: str, customer_spawns_path: str, data: bytes, stamps: Tuple[int, int, int, int], source_hash: bytes):
+        """Swaps in a copy of the compiled file, read as data, with the given stamps in its header."""
+        header_end = len(CompiledLevelCache.MAGIC) + CompiledLevelCache._HEADER.size
+        header = CompiledLevelCache._HEADER.pack(CompiledLevelCache.VERSION, *stamps, source_hash)
+        try:
+            CompiledLevelCache._replace_file(path, customer_spawns_path, CompiledLevelCache.MAGIC + header + data[header_end:])
+        except OSError as e:
+            print(f"Could not update compiled level '{path}': {e}")
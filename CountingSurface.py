@@ -0,0 +1,34 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import pygame as pg
+
+if TYPE_CHECKING:
+    from FrameProfiler import FrameProfiler
+
+
+class CountingSurface(pg.Surface):
+    def __init__(self, display: pg.Surface, profiler: FrameProfiler):
+        """
+        An off-screen copy of the display that counts the blits and fills made onto it for a FrameProfiler.
+        The display surface itself can't be instrumented, so while blits are counted the frame is drawn here and
+        copied to the display afterwards.
+
+        Args:
+            display (pg.Surface): The display surface, whose size and pixel format are used.
+            profiler (FrameProfiler): The profiler to count on.
+        """
+        super().__init__(display.get_size(), 0, display)
+        self.profiler = profiler
+
+    def blit(self, *args, **kwargs):
+        self.profiler.blit_count += 1
+        return super().blit(*args, **kwargs)
+
+    def blits(self, blit_sequence, *args, **kwargs):
+        blit_sequence = list(blit_sequence)
+        self.profiler.blit_count += len(blit_sequence)
+        return super().blits(blit_sequence, *args, **kwargs)
+
+    def fill(self, *args, **kwargs):
+        self.profiler.blit_count += 1
+        return super().fill(*args, **kwargs)
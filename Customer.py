@@ -1,14 +1,31 @@
-from typing import Tuple, Dict
+from __future__ import annotations
+from typing import Tuple, Dict, Optional, TYPE_CHECKING
 import pygame as pg
 import random
 from FloorRequestPopup import FloorRequestPopup
 from ServedCustomerInfoPopup import ServedCustomerInfoPopup
 from DeliveredCustomerPopup import DeliveredCustomerPopup
 from PenaltyAttributes import PenaltyAttributes
+from GameEvents import GameEvents
+
+if TYPE_CHECKING:
+    from VectorizedCustomerEngine import VectorizedCustomerEngine
+    from EventBus import EventBus
+    from PopupHitIndex import PopupHitIndex
 
 
 class Customer:
     def __init__(self, spawn_floor: int, spawn_x: int, floor_width: int, target_floor: int, color: Tuple[int, int, int], popup_offset_y: int, is_high_priority: bool, request_time: float):
+        # Set while the customer's movement is driven by a VectorizedCustomerEngine, see attach_to_engine()
+        self._engine: Optional[VectorizedCustomerEngine] = None
+        self._slot = -1
+        # Set by the level when the customer spawns; customers are numbered in spawn order
+        self.id: Optional[int] = None
+        # Set by the floor the customer spawns on; state transitions are published here
+        self.event_bus: Optional[EventBus] = None
+        # Set by the spawn floor while the lift selection popup can be hovered, see PopupHitIndex
+        self.popup_index: Optional[PopupHitIndex] = None
+
         self.current_floor = spawn_floor
         self.target_floor = target_floor
         self.spawn_x = spawn_x
@@ -43,15 +60,79 @@ class Customer:
         self.assignment_time = None
         self.delivery_time = None
 
+    @property
+    def x(self) -> float:
+        if self._engine is not None:
+            return self._engine.x[self._slot]
+        return self._x
+
+    @x.setter
+    def x(self, value: float):
+        if self._engine is not None:
+            self._engine.x[self._slot] = value
+        else:
+            self._x = value
+
+    @property
+    def is_active(self) -> bool:
+        return self._is_active
+
+    @is_active.setter
+    def is_active(self, value: bool):
+        self._is_active = value
+        if self._engine is not None:
+            self._engine.is_active[self._slot] = value
+
+    @property
+    def wandering_direction(self) -> int:
+        if self._engine is not None:
+            return int(self._engine.direction[self._slot])
+        return self._wandering_direction
+
+    @wandering_direction.setter
+    def wandering_direction(self, value: int):
+        if self._engine is not None:
+            self._engine.direction[self._slot] = value
+        else:
+            self._wandering_direction = value
+
+    def _set_state(self, state: str):
+        """Changes the state, keeping the engine's copy in sync when attached."""
+        if self._engine is not None:
+            self._engine.set_state(self._slot, state)
+        self.sync_state(state)
+
+    def sync_state(self, state: str):
+        """Records a state the customer has entered and publishes the transition. The engine calls this for the customers it moves."""
+        self.state = state
+        if self.popup_index is not None and state != "waiting_for_lift_selection":
+            self.popup_index.remove(self)
+        if self.event_bus is not None:
+            self.event_bus.publish(GameEvents.FOR_CUSTOMER_STATE[state], self)
+
+    def attach_to_engine(self, engine: VectorizedCustomerEngine, slot: int):
+        """Hands x and wandering_direction over to the engine's arrays; called by the engine itself."""
+        self._engine = engine
+        self._slot = slot
+
+    def detach_from_engine(self, x: float, wandering_direction: int):
+        """Takes the movement state back from the engine; called by the engine itself."""
+        self._engine = None
+        self._slot = -1
+        self._x = x
+        self._wandering_direction = wandering_direction
+
     def set_y(self, y_position: int):
         self.y = y_position
 
     def select_lift(self, lift_name: str, current_time: float):
         self.selected_lift = lift_name
-        self.state = "walking_to_lift"
+        self._set_state("walking_to_lift")
         self.show_popup = False
         self.is_active = False
         self.assignment_time = current_time
+        if self._engine is not None:
+            self._engine.set_lift(self._slot, lift_name)
 
     def calculate_penalty(self, current_time: float) -> float:
         X = self.request_time
@@ -81,11 +162,14 @@ class Customer:
                     self.x = self.floor_width - margin - self.width
                     self.wandering_direction = -1
 
+                if self.popup_index is not None:
+                    self.popup_index.move(self)
+
         elif self.state == "walking_to_lift" and self.selected_lift:
             target_x = lift_positions[self.selected_lift]
             if abs(self.x - target_x) < self.speed:
                 self.x = target_x
-                self.state = "waiting_at_lift"
+                self._set_state("waiting_at_lift")
             elif self.x < target_x:
                 self.x += self.speed
             else:
@@ -95,22 +179,56 @@ class Customer:
             target_x = self.target_spawn_x if self.target_spawn_x else self.spawn_x
             if abs(self.x - target_x) < self.speed:
                 self.x = target_x
-                self.state = "delivered"
+                self._set_state("delivered")
             elif self.x < target_x:
                 self.x += self.speed
             else:
                 self.x -= self.speed
 
+    def _walk_target_x(self, lift_positions: Dict[str, int]) -> Optional[float]:
+        """Where the customer is walking to, or None if it isn't walking."""
+        if self.state == "walking_to_lift" and self.selected_lift:
+            return lift_positions[self.selected_lift]
+        if self.state == "exiting_lift":
+            return self.target_spawn_x if self.target_spawn_x else self.spawn_x
+        return None
+
+    def frames_until_next_event(self, lift_positions: Dict[str, int]) -> Optional[int]:
+        """
+        The number of upcoming update() calls that only move the customer, before the one in which it changes state.
+        Walking customers arrive once they are closer than one step, so that is a whole number of steps away.
+        Wandering isn't modelled, so it gives 0; customers that only wait give None, as nothing happens to them.
+        """
+        if self.state == "waiting_for_lift_selection":
+            return None if self.is_active else 0
+        target_x = self._walk_target_x(lift_positions)
+        if target_x is None:
+            return None
+        return int(abs(self.x - target_x) // self.speed)
+
+    def skip_frames(self, frames: int, lift_positions: Dict[str, int]):
+        """Does what the given number of update() calls would do, given that none of them is a state change."""
+        target_x = self._walk_target_x(lift_positions)
+        if target_x is None or frames <= 0:
+            return
+        # Positions and speeds are multiples of half a pixel, so one multiplication is exact
+        if self.x < target_x:
+            self.x += frames * self.speed
+        else:
+            self.x -= frames * self.speed
+
     def enter_lift(self):
-        self.state = "in_lift"
+        self._set_state("in_lift")
 
     def exit_lift(self, floor: int, lift_x: int, target_spawn_x: int, current_time: float):
         if floor == self.target_floor:
-            self.state = "exiting_lift"
+            self._set_state("exiting_lift")
             self.current_floor = floor
             self.x = lift_x
             self.target_spawn_x = target_spawn_x
             self.delivery_time = current_time
+            if self._engine is not None:
+                self._engine.set_exit_target(self._slot, target_spawn_x if target_spawn_x else self.spawn_x)
 
     def draw(self, screen: pg.Surface, draw_popup: bool = False):
         if self.state == "in_lift":
@@ -131,6 +249,18 @@ class Customer:
             else:
                 pg.draw.rect(screen, color, (self.x, self.y, self.width, self.height))
 
+    def get_dirty_rect(self) -> pg.Rect:
+        """The screen area draw() covers in the current state, body and popup together."""
+        rect = pg.Rect(self.x, self.y, self.width, self.height)
+        if self.state in ["delivered", "exiting_lift"]:
+            popup_rect = self.delivered_popup.get_popup_rect()
+        elif self.show_popup:
+            popup_rect = self.popup.get_popup_rect()
+        else:
+            popup_rect = self.info_popup.get_popup_rect()
+        # Coordinates are floats, so leave a pixel of slack for rounding
+        return rect.union(popup_rect).inflate(2, 2)
+
     def is_mouse_over_popup(self, mouse_pos: Tuple[int, int]) -> bool:
         return self.popup.is_mouse_over(mouse_pos)
 
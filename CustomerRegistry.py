@@ -0,0 +1,48 @@
+from typing import Dict, Iterator, KeysView
+from Customer import Customer
+
+
+class CustomerRegistry:
+    def __init__(self):
+        """
+        The set of customers currently on a floor, in the order they got there.
+        Adding and removing are O(1), and iterating walks the live contents without copying them.
+        """
+        # Dicts keep insertion order, which makes them an ordered set with O(1) removal; the values number the
+        # customers in that order
+        self._customers: Dict[Customer, int] = {}
+        self._next_position = 0
+
+    def add(self, customer: Customer):
+        if customer not in self._customers:
+            self._customers[customer] = self._next_position
+            self._next_position += 1
+
+    def remove(self, customer: Customer):
+        """Removes the customer if it is registered; does nothing otherwise."""
+        self._customers.pop(customer, None)
+
+    def position_of(self, customer: Customer) -> int:
+        """A number that orders the registered customers the way iterating does, i.e. by when they got here."""
+        return self._customers[customer]
+
+    def view(self) -> KeysView[Customer]:
+        """A live, read-only view of all registered customers. Copy it before adding or removing while iterating."""
+        return self._customers.keys()
+
+    def in_state(self, *states: str) -> Iterator[Customer]:
+        """Iterates over the registered customers that are in any of the given states."""
+        return (customer for customer in self._customers if customer.state in states)
+
+    def not_in_state(self, *states: str) -> Iterator[Customer]:
+        """Iterates over the registered customers that are in none of the given states."""
+        return (customer for customer in self._customers if customer.state not in states)
+
+    def __contains__(self, customer: Customer) -> bool:
+        return customer in self._customers
+
+    def __iter__(self) -> Iterator[Customer]:
+        return iter(self._customers)
+
+    def __len__(self) -> int:
+        return len(self._customers)
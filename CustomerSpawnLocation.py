@@ -3,6 +3,7 @@ import pygame as pg
 from RandomCustomerFactory import RandomCustomerFactory
 from DeterministicCustomerFactory import DeterministicCustomerFactory
 from Customer import Customer
+from RawCustomerData import RawCustomerData
 
 
 class CustomerSpawnLocation:
@@ -18,7 +19,8 @@ class CustomerSpawnLocation:
             floor_width: Width of the floor (for wandering limits)
             spawn_interval: Time in seconds between spawns (default 60) - ONLY USED FOR RANDOM SPAWNING
             start_time: Time in seconds when first spawn occurs (default: floor_number * 60) - ONLY USED FOR RANDOM SPAWNING
-            file_factory: Optional FileCustomerFactory instance. If provided, spawns are driven by file.
+            file_factory: Optional FileCustomerFactory instance. If provided, spawns are driven by file: the level
+                hands this location its due spawns through spawn() and update() spawns nothing.
         """
         self.id = spawn_id
         self.floor_number = floor_number
@@ -33,54 +35,58 @@ class CustomerSpawnLocation:
         self.start_time = start_time if start_time is not None else floor_number * 60.0
         self.random_factory = RandomCustomerFactory(high_priority_prob=0.5)
         
-        self.spawned_customers: List[Customer] = []
         self.total_spawned_count = 0
 
-    def update(self, level_time: float):
+    def update(self, level_time: float) -> List[Customer]:
         """
         Update spawn timer and spawn customers if needed
 
         Args:
             level_time: The time in seconds since the level started.
+
+        Returns:
+            The customers spawned in this update; the floor keeps track of them from here on.
         """
+        spawned_customers: List[Customer] = []
         if self.file_factory:
-            # File-based spawning
-            customer = self.file_factory.get_customer(
-                self.id, 
-                level_time, 
-                self.floor_number, 
-                self.spawn_x, 
-                self.total_floors, 
-                self.floor_width
-            )
-            if customer:
-                self.spawned_customers.append(customer)
-                self.total_spawned_count += 1
-        else:
-            # Random spawning (legacy behavior)
-            if level_time >= self.start_time:
-                time_since_first_spawn = level_time - self.start_time
-                expected_total_spawns = int(time_since_first_spawn / self.spawn_interval) + 1
+            # File-based spawning is scheduled by the level, see spawn()
+            return spawned_customers
 
-                while self.total_spawned_count < expected_total_spawns:
-                    customer = self.random_factory.generate(
-                        spawn_floor=self.floor_number,
-                        spawn_x=self.spawn_x,
-                        total_floors=self.total_floors,
-                        floor_width=self.floor_width,
-                        request_time=level_time
-                    )
-                    self.spawned_customers.append(customer)
-                    self.total_spawned_count += 1
+        # Random spawning (legacy behavior)
+        if level_time >= self.start_time:
+            time_since_first_spawn = level_time - self.start_time
+            expected_total_spawns = int(time_since_first_spawn / self.spawn_interval) + 1
+
+            while self.total_spawned_count < expected_total_spawns:
+                customer = self.random_factory.generate(
+                    spawn_floor=self.floor_number,
+                    spawn_x=self.spawn_x,
+                    total_floors=self.total_floors,
+                    floor_width=self.floor_width,
+                    request_time=level_time
+                )
+                spawned_customers.append(customer)
+                self.total_spawned_count += 1
+        return spawned_customers
 
-    def get_active_customers(self) -> List[Customer]:
-        """Get list of customers that haven't been delivered yet"""
-        return [c for c in self.spawned_customers if c.state != "delivered"]
+    def spawn(self, spawn_data: RawCustomerData, level_time: float) -> Customer:
+        """
+        Spawns the customer of a file-driven spawn that is due at this location.
 
-    def get_all_customers(self) -> List[Customer]:
-        """Get all spawned customers"""
-        return self.spawned_customers
+        Args:
+            spawn_data: The due spawn, as taken off the file factory's schedule.
+            level_time: The time in seconds since the level started.
 
-    def remove_delivered_customers(self):
-        """Clean up delivered customers"""
-        self.spawned_customers = [c for c in self.spawned_customers if c.state != "delivered"]
+        Returns:
+            The spawned customer; the floor keeps track of it from here on.
+        """
+        customer = self.file_factory.create_customer(
+            spawn_data,
+            level_time,
+            self.floor_number,
+            self.spawn_x,
+            self.total_floors,
+            self.floor_width
+        )
+        self.total_spawned_count += 1
+        return customer
@@ -1,68 +1,138 @@
+import heapq
 import random
 from collections import deque
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Deque, Iterable, Iterator, Dict, List, Optional, Tuple
 from Customer import Customer
+from FloorRequestPopup import FloorRequestPopup
 from RawCustomerData import RawCustomerData
 
 
 class DeterministicCustomerFactory:
-    def __init__(self, raw_customer_data_list: List[RawCustomerData]):
+    def __init__(self, raw_customer_data_list: Iterable[RawCustomerData], streaming: bool = False, lookahead: int = 256):
         """
         Initializes the factory with pre-loaded raw customer data.
+        All pending spawns, over every spawn location, are kept in one queue ordered by timestamp, so checking for due
+        spawns only looks at the head of the queue no matter how many spawn locations the level has.
         
         Args:
-            raw_customer_data_list (list[RawCustomerData]): List of RawCustomerData objects.
+            raw_customer_data_list (Iterable[RawCustomerData]): RawCustomerData objects, or a lazy iterator of them if streaming.
+            streaming (bool): Pull the spawns from the iterator while the level runs instead of all at once. The
+                spawns must come in timestamp order; only the ones that are due plus the lookahead are held in memory.
+            lookahead (int): In streaming mode, the number of rows read ahead of the level's clock at a time.
         """
-        self.spawns: Dict[str, deque[RawCustomerData]] = {}
-        self._organize_spawns(raw_customer_data_list)
-
-    def _organize_spawns(self, raw_data_list: List[RawCustomerData]):
-        for data in raw_data_list:
-            if data.spawn_id not in self.spawns:
-                self.spawns[data.spawn_id] = deque()
-            self.spawns[data.spawn_id].append(data)
-        
-        # Sort spawns by timestamp for each location
-        for spawn_id in self.spawns:
-            self.spawns[spawn_id] = deque(sorted(self.spawns[spawn_id], key=lambda x: x.timestamp))
+        # Min-heap of (timestamp, sequence, spawn); the sequence keeps spawns with equal timestamps in file order
+        self._schedule: List[Tuple[float, int, RawCustomerData]] = []
+        self._sequence = 0
+        # Due spawns held back because their location already spawned a customer this frame
+        self._deferred: Dict[str, Deque[RawCustomerData]] = {}
+        # The spawns in the schedule plus the deferred ones, so the remaining count needs no scan
+        self._pending_count = 0
+
+        self.lookahead = lookahead
+        self._stream: Optional[Iterator[RawCustomerData]] = None
+        self._read_ahead: Deque[RawCustomerData] = deque()
+        self._last_streamed_timestamp = float('-inf')
+        self._warned_unsorted = False
+        if streaming:
+            self._stream = iter(raw_customer_data_list)
+        else:
+            self._schedule = [(data.timestamp, i, data) for i, data in enumerate(raw_customer_data_list)]
+            heapq.heapify(self._schedule)
+            self._sequence = len(self._schedule)
+            self._pending_count = len(self._schedule)
+
+    def _fill_read_ahead(self) -> bool:
+        """Reads the next rows from the stream into the lookahead window; returns False once the stream is exhausted."""
+        if not self._read_ahead and self._stream is not None:
+            self._read_ahead.extend(islice(self._stream, self.lookahead))
+            if not self._read_ahead:
+                self._stream = None
+        return bool(self._read_ahead)
+
+    def _pull_due_spawns(self, current_time: float):
+        """Moves every streamed spawn that is due by current_time into the schedule."""
+        while self._fill_read_ahead() and self._read_ahead[0].timestamp <= current_time:
+            data = self._read_ahead.popleft()
+            if data.timestamp < self._last_streamed_timestamp and not self._warned_unsorted:
+                self._warned_unsorted = True
+                print(f"Customer spawns are not sorted by timestamp ({data.timestamp} after {self._last_streamed_timestamp}); streamed spawns may be late.")
+            self._last_streamed_timestamp = max(self._last_streamed_timestamp, data.timestamp)
+            heapq.heappush(self._schedule, (data.timestamp, self._sequence, data))
+            self._sequence += 1
+            self._pending_count += 1
 
-    def get_customer(self, spawn_id: str, current_time: float, spawn_floor: int, spawn_x: int, total_floors: int, floor_width: int) -> Optional[Customer]:
+    def pop_due_spawns(self, current_time: float) -> List[RawCustomerData]:
         """
-        Check if there is a customer scheduled to spawn at this location and time.
-        Returns a Customer object if yes, None otherwise.
+        Takes the spawns that are due by current_time off the schedule.
+        Each spawn location spawns at most one customer per frame, so if several spawns for the same location are due,
+        only the earliest is returned and the others follow on the next calls, one per call.
+
+        Args:
+            current_time (float): The level time, in seconds.
+
+        Returns:
+            List[RawCustomerData]: At most one spawn per spawn location, in no particular order.
         """
-        if spawn_id not in self.spawns or not self.spawns[spawn_id]:
-            return None
+        due: Dict[str, RawCustomerData] = {}
+        if self._deferred:
+            for spawn_id in list(self._deferred):
+                queue = self._deferred[spawn_id]
+                due[spawn_id] = queue.popleft()
+                if not queue:
+                    del self._deferred[spawn_id]
 
-        # Check the next scheduled spawn
-        next_spawn = self.spawns[spawn_id][0]
-        
-        if current_time >= next_spawn.timestamp:
-            # It's time to spawn!
-            spawn_data = self.spawns[spawn_id].popleft()
-            
-            is_high_priority = (spawn_data.priority.upper() == 'HIGH')
-            target_floor = spawn_data.target_floor
-            
-            # Generate random visual attributes
-            color = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
-            popup_offset_y = random.randint(-5, 9)
-            
-            return Customer(
-                spawn_floor=spawn_floor,
-                spawn_x=spawn_x,
-                floor_width=floor_width,
-                target_floor=target_floor,
-                color=color,
-                popup_offset_y=popup_offset_y,
-                is_high_priority=is_high_priority,
-                request_time=current_time
-            )
-            
-        return None
+        if self._stream is not None or self._read_ahead:
+            self._pull_due_spawns(current_time)
+
+        schedule = self._schedule
+        while schedule and schedule[0][0] <= current_time:
+            data = heapq.heappop(schedule)[2]
+            if data.spawn_id in due:
+                self._deferred.setdefault(data.spawn_id, deque()).append(data)
+            else:
+                due[data.spawn_id] = data
+
+        self._pending_count -= len(due)
+        return list(due.values())
+
+    def next_spawn_time(self) -> Optional[float]:
+        """
+        Returns the timestamp of the earliest spawn that has not been handed out yet, or None if there are none left.
+        Deferred spawns are already due, so their timestamps are at or before the level's clock.
+        """
+        candidates = [queue[0].timestamp for queue in self._deferred.values()]
+        if self._schedule:
+            candidates.append(self._schedule[0][0])
+        if self._fill_read_ahead():
+            candidates.append(self._read_ahead[0].timestamp)
+        return min(candidates) if candidates else None
+
+    def create_customer(self, spawn_data: RawCustomerData, current_time: float, spawn_floor: int, spawn_x: int, total_floors: int, floor_width: int) -> Customer:
+        """Creates the customer of a due spawn, at the given spawn location."""
+        is_high_priority = (spawn_data.priority.upper() == 'HIGH')
+        target_floor = spawn_data.target_floor
+
+        # Generate random visual attributes
+        color = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
+        popup_offset_y = random.randint(*FloorRequestPopup.OFFSET_Y_RANGE)
+
+        return Customer(
+            spawn_floor=spawn_floor,
+            spawn_x=spawn_x,
+            floor_width=floor_width,
+            target_floor=target_floor,
+            color=color,
+            popup_offset_y=popup_offset_y,
+            is_high_priority=is_high_priority,
+            request_time=current_time
+        )
 
     def remaining_customers_to_spawn(self) -> int:
         """
         Returns the total number of customers that have not yet been spawned.
+        In streaming mode, rows that have not been read yet are unknown, so this is a lower bound that is only 0 once
+        the stream is exhausted.
         """
-        return sum(len(queue) for queue in self.spawns.values())
+        self._fill_read_ahead()
+        return self._pending_count + len(self._read_ahead)
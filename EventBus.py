@@ -0,0 +1,34 @@
+from typing import Callable, Dict, List
+
+
+class EventBus:
+    def __init__(self):
+        """
+        A minimal publish/subscribe hub. Customers and lifts publish their state transitions here,
+        so that bookkeeping can react to what changed instead of polling every object every frame.
+        Event names are listed in GameEvents.
+        """
+        self._handlers: Dict[str, List[Callable[[object], None]]] = {}
+
+    def subscribe(self, event: str, handler: Callable[[object], None]):
+        """
+        Registers a handler to be called with the source object every time the event is published.
+
+        Args:
+            event (str): The name of the event, see GameEvents.
+            handler (Callable[[object], None]): The function to call.
+        """
+        self._handlers.setdefault(event, []).append(handler)
+
+    def unsubscribe(self, event: str, handler: Callable[[object], None]):
+        """Removes a previously subscribed handler; does nothing if it isn't subscribed."""
+        handlers = self._handlers.get(event)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def publish(self, event: str, source: object):
+        """Calls all handlers of the event, in the order they subscribed."""
+        handlers = self._handlers.get(event)
+        if handlers:
+            for handler in handlers:
+                handler(source)
@@ -1,14 +1,22 @@
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Tuple, KeysView
 import pygame as pg
 import random
 from CustomerSpawnLocation import CustomerSpawnLocation
 from DeterministicCustomerFactory import DeterministicCustomerFactory
 from RawSpawnLocationData import RawSpawnLocationData
 from Customer import Customer
+from CustomerRegistry import CustomerRegistry
+from FloorRequestPopup import FloorRequestPopup
+from PopupHitIndex import PopupHitIndex
+from EventBus import EventBus
+from GameEvents import GameEvents
+from VectorizedCustomerEngine import VectorizedCustomerEngine
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
 
 
 class Floor:
-    def __init__(self, floor_number: int, y_position: int, width: int, height: int, total_floors: int, lift_center_x: int, file_factory: Optional[DeterministicCustomerFactory] = None, spawn_locations_data: Optional[List[RawSpawnLocationData]] = None):
+    def __init__(self, floor_number: int, y_position: int, width: int, height: int, total_floors: int, lift_center_x: int, file_factory: Optional[DeterministicCustomerFactory] = None, spawn_locations_data: Optional[List[RawSpawnLocationData]] = None, customer_engine: Optional[VectorizedCustomerEngine] = None, event_bus: Optional[EventBus] = None, platform_height: int = 10, customer_height: int = 40):
         """
         Initialize a floor
 
@@ -21,13 +29,23 @@ class Floor:
             lift_center_x: X coordinate of the center between lifts
             file_factory: Optional DeterministicCustomerFactory instance for file-based spawning
             spawn_locations_data: Optional list of RawSpawnLocationData objects for this floor
+            customer_engine: Optional VectorizedCustomerEngine that moves the customers instead of Customer.update
+            event_bus: Optional EventBus that customers spawned on this floor publish their transitions to
+            platform_height: Thickness of the platform at the bottom of the floor
+            customer_height: Height of the customers standing on the floor
         """
         self.floor_number = floor_number
         self.y = y_position
         self.width = width
         self.height = height
         self.total_floors = total_floors
+        self.platform_height = platform_height
+        self.customer_height = customer_height
+        # Where the customers on this floor stand
+        self.customer_y = self.y + self.height - self.platform_height - self.customer_height
         self.file_factory = file_factory
+        self.customer_engine = customer_engine
+        self.event_bus = event_bus
         self.spawn_locations: List[CustomerSpawnLocation] = []
         
         if spawn_locations_data:
@@ -35,8 +53,10 @@ class Floor:
         else:
             self._create_random_spawn_location(lift_center_x)
         
-        # Customers that arrived from other floors
-        self.arrived_customers: List[Customer] = []
+        # All customers on this floor, both spawned here and arrived from other floors
+        self.customers = CustomerRegistry()
+        # The customers spawned here that still wait for a lift selection, by x, for hit-testing their popups
+        self.popup_index = PopupHitIndex(FloorRequestPopup.POPUP_WIDTH)
 
     def _create_spawn_locations_from_data(self, data: List[RawSpawnLocationData]):
         """Create spawn locations from a list of RawSpawnLocationData objects"""
@@ -101,21 +121,37 @@ class Floor:
 
     def update(self, dt: float, level_time: float, lift_positions: Dict[str, int]):
         """Update floor and all spawn locations"""
-        # Update spawn locations
-        for spawn_loc in self.spawn_locations:
-            spawn_loc.update(level_time)
-
-        # Update all customers
-        for customer in self.get_all_customers():
-            customer.update(lift_positions)
-
-    def get_all_customers(self) -> List[Customer]:
-        """Get all customers on this floor"""
-        all_customers = []
-        for spawn_loc in self.spawn_locations:
-            all_customers.extend(spawn_loc.get_active_customers())
-        all_customers.extend(self.arrived_customers)
-        return all_customers
+        # File-driven spawn locations are handed their due spawns by the level instead of being polled
+        if not self.file_factory:
+            for spawn_loc in self.spawn_locations:
+                for customer in spawn_loc.update(level_time):
+                    self.add_spawned_customer(customer)
+
+        # Update all customers, unless the engine moves them all at once
+        if not self.customer_engine:
+            for customer in self.customers:
+                customer.update(lift_positions)
+
+    def frames_until_next_event(self, lift_positions: Dict[str, int]) -> Optional[int]:
+        """The fewest frames any customer on this floor moves before changing state, see Customer.frames_until_next_event()"""
+        frames = None
+        # Customers waiting at or riding in a lift give None; only those selecting a lift (wandering) or walking count
+        for customer in self.customers.in_state("waiting_for_lift_selection", "walking_to_lift", "exiting_lift"):
+            customer_frames = customer.frames_until_next_event(lift_positions)
+            if customer_frames is not None and (frames is None or customer_frames < frames):
+                frames = customer_frames
+                if frames == 0:
+                    break
+        return frames
+
+    def skip_frames(self, frames: int, lift_positions: Dict[str, int]):
+        """Moves the customers on this floor through frames in which none of them changes state"""
+        for customer in self.customers:
+            customer.skip_frames(frames, lift_positions)
+
+    def get_all_customers(self) -> KeysView[Customer]:
+        """Get a live view of all customers on this floor"""
+        return self.customers.view()
 
     def get_spawn_location_x(self) -> int:
         """Get the x position of the spawn location on this floor"""
@@ -123,72 +159,87 @@ class Floor:
             return self.spawn_locations[0].spawn_x
         return self.width // 2
 
+    def find_popup_at(self, mouse_pos: Tuple[int, int]) -> Optional[Customer]:
+        """Get the customer whose lift selection popup is under the mouse, if any"""
+        return self.popup_index.find_popup_at(mouse_pos)
+
     def handle_click(self, mouse_pos: Tuple[int, int], current_time: float) -> Optional[Customer]:
         """Handle mouse clicks for customer popups"""
-        for customer in self.get_all_customers():
-            if customer.handle_click(mouse_pos, current_time):
-                return customer
+        customer = self.popup_index.find_popup_at(mouse_pos)
+        if customer and customer.handle_click(mouse_pos, current_time):
+            return customer
         return None
         
+    def add_spawned_customer(self, customer: Customer):
+        """Add a customer that has just spawned at one of this floor's spawn locations"""
+        customer.height = self.customer_height
+        customer.set_y(self.customer_y)
+        self.customers.add(customer)
+        self.popup_index.add(customer)
+        if self.customer_engine:
+            self.customer_engine.attach(customer)
+        if self.event_bus:
+            customer.event_bus = self.event_bus
+            self.event_bus.publish(GameEvents.CUSTOMER_SPAWNED, customer)
+
     def add_customer(self, customer: Customer):
         """Add a customer to this floor (e.g. arrived from lift)"""
-        customer.set_y(self.y + self.height - 50)
-        self.arrived_customers.append(customer)
+        customer.height = self.customer_height
+        customer.set_y(self.customer_y)
+        self.customers.add(customer)
         
     def remove_customer(self, customer: Customer):
         """Remove a customer from this floor"""
-        # Try to remove from spawn locations
+        self.customers.remove(customer)
+
+    def get_platform_rect(self) -> pg.Rect:
+        """Get the rectangle of the platform the customers stand on"""
+        return pg.Rect(0, self.y + self.height - self.platform_height, self.width, self.platform_height)
+
+    def draw_static(self, surface: pg.Surface):
+        """Draw the parts of the floor that don't change during a level: platform, label and spawn markers"""
+        # Draw floor platform
+        floor_color = (150, 150, 150)
+        pg.draw.rect(surface, floor_color, self.get_platform_rect())
+
+        # Draw floor number; on low floors only every few floors are labelled, with a smaller font, so labels don't overlap
+        label_size = max(12, min(24, self.height - 2))
+        label_every = -(-label_size // self.height)
+        if self.floor_number % label_every == 0:
+            font = FontRegistry.get(None, label_size)
+            text = TextRenderCache.render(font, f"Floor {self.floor_number}", True, (255, 255, 255))
+            surface.blit(text, (10, self.y + min(10, self.height - label_size // 2 - self.platform_height)))
+
+        # Draw spawn location markers (semi-transparent squares); their IDs only if there is room above them
+        square_size = min(30, self.height - self.platform_height)
+        square_surface = pg.Surface((square_size, square_size), pg.SRCALPHA)
+        square_surface.fill((255, 255, 0, 50))  # Yellow with alpha=50
+        id_font = FontRegistry.get(None, 20)
+        show_ids = self.height >= 60
         for spawn_loc in self.spawn_locations:
-            if customer in spawn_loc.spawned_customers:
-                spawn_loc.spawned_customers.remove(customer)
-                return
-        
-        # Try to remove from arrived_customers
-        if customer in self.arrived_customers:
-            self.arrived_customers.remove(customer)
+            # Center the square on the spawn location
+            square_x = spawn_loc.spawn_x - square_size // 2
+            square_y = self.y + self.height - square_size - self.platform_height
+            surface.blit(square_surface, (square_x, square_y))
+
+            # Draw ID
+            if show_ids:
+                id_text = TextRenderCache.render(id_font, spawn_loc.id, True, (255, 255, 255))
+                surface.blit(id_text, (square_x, square_y - 15))
 
     def draw(self, screen: pg.Surface, draw_popups: bool = False):
-        """Draw the floor (popups drawn separately to be on top)"""
+        """Draw the customers of the floor (popups drawn separately to be on top); the rest is in draw_static()"""
         if not draw_popups:
-            # Draw floor platform
-            floor_color = (150, 150, 150)
-            pg.draw.rect(screen, floor_color, (0, self.y + self.height - 10, self.width, 10))
-
-            # Draw floor number
-            font = pg.font.Font(None, 24)
-            text = font.render(f"Floor {self.floor_number}", True, (255, 255, 255))
-            screen.blit(text, (10, self.y + 10))
-
-            # Draw spawn location markers (semi-transparent squares)
-            for spawn_loc in self.spawn_locations:
-                # Create a surface with alpha channel
-                square_size = 30
-                square_surface = pg.Surface((square_size, square_size), pg.SRCALPHA)
-                square_surface.fill((255, 255, 0, 50))  # Yellow with alpha=50
-                # Center the square on the spawn location
-                square_x = spawn_loc.spawn_x - square_size // 2
-                square_y = self.y + self.height - square_size - 10
-                screen.blit(square_surface, (square_x, square_y))
-                
-                # Draw ID
-                id_font = pg.font.Font(None, 20)
-                id_text = id_font.render(spawn_loc.id, True, (255, 255, 255))
-                screen.blit(id_text, (square_x, square_y - 15))
-
             # Draw all customers on this floor (without popups)
-            for customer in self.get_all_customers():
-                if customer.state != "in_lift":
-                    customer.set_y(self.y + self.height - 50)
-                    customer.draw(screen, draw_popup=False)
+            for customer in self.customers.not_in_state("in_lift"):
+                customer.set_y(self.customer_y)
+                customer.draw(screen, draw_popup=False)
         else:
             # Only draw popups
-            for customer in self.get_all_customers():
-                if customer.state != "in_lift":
-                    customer.draw(screen, draw_popup=True)
+            for customer in self.customers.not_in_state("in_lift"):
+                customer.draw(screen, draw_popup=True)
 
     def remove_delivered_customers(self):
         """Clean up delivered customers"""
-        for spawn_loc in self.spawn_locations:
-            spawn_loc.remove_delivered_customers()
-            
-        self.arrived_customers = [c for c in self.arrived_customers if c.state != "delivered"]
+        for customer in list(self.customers.in_state("delivered")):
+            self.customers.remove(customer)
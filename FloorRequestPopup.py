@@ -1,26 +1,101 @@
 import pygame as pg
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
 
 if TYPE_CHECKING:
     from Customer import Customer
+    from Lift import Lift
 
 
 class FloorRequestPopup:
+    POPUP_WIDTH = 180
+    # Lift buttons are laid out in rows of up to this many; every further row makes the popup taller
+    BUTTONS_PER_ROW = 5
+    BUTTON_ROW_HEIGHT = 35
+    # Popups are raised by a random offset in this range, so the popups of customers side by side don't line up
+    OFFSET_Y_RANGE = (-5, 9)
+    # The button positions relative to the popup, and their width, by number of buttons
+    _button_layouts: Dict[int, Tuple[List[Tuple[int, int]], int]] = {}
+    # The rendered buttons by the names and colors of the lifts on them, shared by all popups offering the same lifts
+    _button_surfaces: Dict[Tuple[Tuple[str, Tuple[int, int, int]], ...], pg.Surface] = {}
+    # The circle with the target floor, by font, floor and radius, and the translucent text background, by size
+    _badges: Dict[Tuple[pg.font.Font, int, int], pg.Surface] = {}
+    _text_backgrounds: Dict[Tuple[int, int], pg.Surface] = {}
+
     def __init__(self, customer: 'Customer', offset_y: int = 0):
         self.customer = customer
-        self.popup_width = 180  # Increased width for new layout
+        self.popup_width = self.POPUP_WIDTH  # Increased width for new layout
         self.popup_height = 100
         self.button_width = 50
         self.button_height = 30
         self.offset_y = offset_y
-        self.font = pg.font.Font(None, 18)
-        self.button_font = pg.font.Font(None, 24)
-        self.circle_font = pg.font.Font(None, 28)
+        self.font = FontRegistry.get(None, 18)
+        self.button_font = FontRegistry.get(None, 24)
+        self.circle_font = FontRegistry.get(None, 28)
+        # The lifts offered, one button each, see set_lifts()
+        self.lifts: Sequence['Lift'] = ()
+        self._button_offsets: List[Tuple[int, int]] = []
+        self._buttons_surface: Optional[pg.Surface] = None
+
+    def set_lifts(self, lifts: Sequence['Lift']):
+        """
+        Sets the lifts the player can choose from, which are the ones serving both the customer's floor and its target floor.
+
+        Args:
+            lifts (Sequence[Lift]): The lifts to offer, in button order.
+        """
+        self.lifts = lifts
+        self._buttons_surface = None
+        self._button_offsets, self.button_width = self._button_layout(len(lifts))
+        self.popup_height = self.popup_height_for(len(lifts))
+        if self.button_width < 40:
+            self.button_font = FontRegistry.get(None, 18)
+
+    @classmethod
+    def popup_height_for(cls, lift_count: int) -> int:
+        """The height of a popup offering lift_count lifts: one row of buttons, and another for every BUTTONS_PER_ROW more."""
+        rows = max(1, -(-lift_count // cls.BUTTONS_PER_ROW))
+        return 100 + (rows - 1) * cls.BUTTON_ROW_HEIGHT
+
+    @classmethod
+    def vertical_extent(cls, customer_y: int, popup_height: int) -> Tuple[int, int]:
+        """
+        The top and bottom y that popups of up to popup_height can cover, for customers standing at customer_y,
+        whatever their offset; see get_popup_rect().
+        """
+        low_offset, high_offset = cls.OFFSET_Y_RANGE
+        top = max(0, customer_y - popup_height - 5 - high_offset)
+        bottom = max(0, customer_y - popup_height - 5 - low_offset) + popup_height
+        return top, bottom
+
+    @classmethod
+    def _button_layout(cls, count: int) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        The offsets of count buttons from the popup's top left corner, and the button width. Two buttons sit at the
+        left and right edge; more are narrower and spread evenly over the row, in columns that line up across rows.
+        """
+        layout = cls._button_layouts.get(count)
+        if layout is None:
+            margin = 15
+            row_width = cls.POPUP_WIDTH - 2 * margin
+            columns = max(1, min(count, cls.BUTTONS_PER_ROW))
+            width = 50 if columns <= 2 else (row_width - (columns - 1) * 6) // columns
+            offsets = []
+            for i in range(count):
+                row, column = divmod(i, columns)
+                x = margin + column * (row_width - width) // (columns - 1) if columns > 1 else (cls.POPUP_WIDTH - width) // 2
+                offsets.append((x, 60 + row * cls.BUTTON_ROW_HEIGHT))
+            layout = cls._button_layouts[count] = (offsets, width)
+        return layout
 
     def get_popup_rect(self) -> Tuple[int, int, int, int]:
-        """Get the popup rectangle"""
+        """Get the popup rectangle, above the customer and kept on the screen"""
         popup_x = self.customer.x - self.popup_width // 2 + self.customer.width // 2
         popup_y = self.customer.y - self.popup_height - 5 - self.offset_y
+        # Popups with many rows of buttons would reach above the screen on the top floors of tall buildings
+        popup_x = max(0, min(popup_x, self.customer.floor_width - self.popup_width))
+        popup_y = max(0, popup_y)
         return popup_x, popup_y, self.popup_width, self.popup_height
 
     def is_mouse_over(self, mouse_pos: Tuple[int, int]) -> bool:
@@ -37,25 +112,14 @@ class FloorRequestPopup:
         if not self.customer.show_popup or self.customer.state != "waiting_for_lift_selection":
             return False
 
-        popup_x, popup_y, popup_width, _ = self.get_popup_rect()
-        
-        # Corrected button coordinates to match the draw method
-        button_a_x = popup_x + 15
-        button_b_x = popup_x + popup_width - self.button_width - 15
-        button_y = popup_y + 60
-
+        popup_x, popup_y, _, _ = self.get_popup_rect()
         mx, my = mouse_pos
-
-        # Check Lift A button
-        if button_a_x <= mx <= button_a_x + self.button_width and button_y <= my <= button_y + self.button_height:
-            self.customer.select_lift("A", current_time)
-            return True
-
-        # Check Lift B button
-        if button_b_x <= mx <= button_b_x + self.button_width and button_y <= my <= button_y + self.button_height:
-            self.customer.select_lift("B", current_time)
-            return True
-
+        for lift, (offset_x, offset_y) in zip(self.lifts, self._button_offsets):
+            button_x = popup_x + offset_x
+            button_y = popup_y + offset_y
+            if button_x <= mx <= button_x + self.button_width and button_y <= my <= button_y + self.button_height:
+                self.customer.select_lift(lift.name, current_time)
+                return True
         return False
 
     def draw(self, screen: pg.Surface):
@@ -73,47 +137,75 @@ class FloorRequestPopup:
         circle_radius = 22
         circle_x = popup_x + circle_radius + 8
         circle_y = popup_y + 30 # Centered in the top part
-        pg.draw.circle(screen, (255, 255, 255), (circle_x, circle_y), circle_radius)
-        pg.draw.circle(screen, (0, 0, 0), (circle_x, circle_y), circle_radius, 2)
-        
-        target_text_surf = self.circle_font.render(str(self.customer.target_floor), True, (0, 0, 0))
-        target_text_rect = target_text_surf.get_rect(center=(circle_x, circle_y))
-        screen.blit(target_text_surf, target_text_rect)
+        badge = self.target_floor_badge(self.circle_font, self.customer.target_floor, circle_radius)
+        screen.blit(badge, badge.get_rect(center=(circle_x, circle_y)))
 
         # --- Text Info (to the right of the circle) ---
         text_x = popup_x + (2 * circle_radius) + 15
         
         # Draw semi-transparent background for text
         text_bg_rect = pg.Rect(text_x - 3, popup_y + 8, self.popup_width - (text_x - popup_x) - 5, 44)
-        text_bg_surf = pg.Surface(text_bg_rect.size, pg.SRCALPHA)
-        text_bg_surf.fill((255, 255, 255, 128))
-        screen.blit(text_bg_surf, text_bg_rect.topleft)
+        screen.blit(self.text_background(text_bg_rect.size), text_bg_rect.topleft)
         
         current_time = pg.time.get_ticks() / 1000.0
         waiting_time = current_time - self.customer.request_time
         penalty = self.customer.calculate_penalty(current_time)
 
         # Wait Time
-        wait_text = self.font.render(f"Wait: {waiting_time:.1f}s", True, (0, 0, 0))
+        wait_text = TextRenderCache.render(self.font, f"Wait: {waiting_time:.1f}s", True, (0, 0, 0))
         screen.blit(wait_text, (text_x, popup_y + 10))
         
         # Penalty
-        penalty_text = self.font.render(f"Penalty: {int(penalty)}", True, (200, 0, 0))
+        penalty_text = TextRenderCache.render(self.font, f"Penalty: {int(penalty)}", True, (200, 0, 0))
         screen.blit(penalty_text, (text_x, popup_y + 32))
 
-        # --- Buttons ---
-        button_a_x = popup_x + 15
-        button_b_x = popup_x + popup_width - self.button_width - 15
-        button_y = popup_y + 60
-
-        # Lift A button
-        pg.draw.rect(screen, (100, 200, 100), (button_a_x, button_y, self.button_width, self.button_height))
-        pg.draw.rect(screen, (0, 0, 0), (button_a_x, button_y, self.button_width, self.button_height), 2)
-        text_a = self.button_font.render("A", True, (0, 0, 0))
-        screen.blit(text_a, (button_a_x + 18, button_y + 5))
-
-        # Lift B button
-        pg.draw.rect(screen, (200, 100, 100), (button_b_x, button_y, self.button_width, self.button_height))
-        pg.draw.rect(screen, (0, 0, 0), (button_b_x, button_y, self.button_width, self.button_height), 2)
-        text_b = self.button_font.render("B", True, (0, 0, 0))
-        screen.blit(text_b, (button_b_x + 18, button_y + 5))
+        # --- Buttons, one per lift, in the lift's color ---
+        if self.lifts:
+            if self._buttons_surface is None:
+                self._buttons_surface = self._get_buttons_surface()
+            screen.blit(self._buttons_surface, (popup_x, popup_y + self._button_offsets[0][1]))
+
+    @classmethod
+    def target_floor_badge(cls, font: pg.font.Font, target_floor: int, radius: int) -> pg.Surface:
+        """The white circle with the target floor in it that popups show, rendered once per floor and shared."""
+        key = (font, target_floor, radius)
+        badge = cls._badges.get(key)
+        if badge is None:
+            badge = pg.Surface((2 * radius + 2, 2 * radius + 2), pg.SRCALPHA)
+            center = (radius + 1, radius + 1)
+            pg.draw.circle(badge, (255, 255, 255), center, radius)
+            pg.draw.circle(badge, (0, 0, 0), center, radius, 2)
+            text = TextRenderCache.render(font, str(target_floor), True, (0, 0, 0))
+            badge.blit(text, text.get_rect(center=center))
+            cls._badges[key] = badge
+        return badge
+
+    @classmethod
+    def text_background(cls, size: Tuple[int, int]) -> pg.Surface:
+        """The semi-transparent white background popups put behind their text, created once per size and shared."""
+        background = cls._text_backgrounds.get(size)
+        if background is None:
+            background = pg.Surface(size, pg.SRCALPHA)
+            background.fill((255, 255, 255, 128))
+            cls._text_backgrounds[size] = background
+        return background
+
+    def _get_buttons_surface(self) -> pg.Surface:
+        """
+        The buttons of the offered lifts on a transparent surface as wide as the popup, starting at the first row.
+        Every popup offering the same lifts shares it, so a popup costs one blit for its buttons however many there are.
+        """
+        key = tuple((lift.name, lift.color) for lift in self.lifts)
+        surface = self._button_surfaces.get(key)
+        if surface is None:
+            top = self._button_offsets[0][1]
+            height = self._button_offsets[-1][1] - top + self.button_height
+            surface = pg.Surface((self.POPUP_WIDTH, height), pg.SRCALPHA)
+            for lift, (offset_x, offset_y) in zip(self.lifts, self._button_offsets):
+                button_rect = pg.Rect(offset_x, offset_y - top, self.button_width, self.button_height)
+                pg.draw.rect(surface, lift.color, button_rect)
+                pg.draw.rect(surface, (0, 0, 0), button_rect, 2)
+                text = TextRenderCache.render(self.button_font, lift.name, True, (0, 0, 0))
+                surface.blit(text, text.get_rect(center=button_rect.center))
+            self._button_surfaces[key] = surface
+        return surface
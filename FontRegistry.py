@@ -0,0 +1,46 @@
+from typing import Dict, Optional, Tuple
+import pygame as pg
+
+
+class FontRegistry:
+    """
+    The process-wide store of loaded fonts. Loading a font reads and parses the font file, so every font is
+    loaded once per (face, size) and then shared by every object that draws with it.
+    Fonts belong to the pygame font module; call clear() after pg.font.quit() before drawing again.
+    """
+    _fonts: Dict[Tuple[Optional[str], int], pg.font.Font] = {}
+    load_count = 0
+    hit_count = 0
+
+    @classmethod
+    def get(cls, face: Optional[str], size: int) -> pg.font.Font:
+        """
+        Returns the font for the given face and size, loading it on first use.
+
+        Args:
+            face (Optional[str]): The font file, or None for pygame's default font, as for pg.font.Font.
+            size (int): The font size.
+        """
+        key = (face, size)
+        font = cls._fonts.get(key)
+        if font is None:
+            font = pg.font.Font(face, size)
+            cls._fonts[key] = font
+            cls.load_count += 1
+        else:
+            cls.hit_count += 1
+        return font
+
+    @classmethod
+    def clear(cls):
+        """Forgets all loaded fonts and resets the counters."""
+        cls._fonts.clear()
+        cls.load_count = 0
+        cls.hit_count = 0
+
+    @classmethod
+    def stats(cls) -> str:
+        """A one-line summary of how many fonts were loaded and how many requests were served from the registry."""
+        requests = cls.load_count + cls.hit_count
+        hit_rate = cls.hit_count / requests if requests else 0.0
+        return f"{cls.load_count} loaded, {cls.hit_count} hits ({hit_rate:.1%})"
@@ -0,0 +1,213 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import pygame as pg
+from FontRegistry import FontRegistry
+
+
+class FrameProfiler:
+    # The pg.draw functions whose calls are counted while draw counters are installed
+    DRAW_FUNCTIONS = ("rect", "line", "lines", "aaline", "aalines", "circle", "aacircle", "ellipse", "arc", "polygon")
+    OVERLAY_REFRESH_FRAMES = 30
+    OVERLAY_BACKGROUND = (0, 0, 0, 170)
+    OVERLAY_TEXT_COLOR = (220, 220, 120)
+
+    def __init__(self, window_frames: int = 600, trace_capacity: int = 200_000):
+        """
+        Times the phases of every frame. Callers take a start time with now() and pass it to record() when the
+        phase ends; record() returns the end time, which is the start of the next phase. Code that holds an
+        Optional[FrameProfiler] only pays an `if` when profiling is off.
+
+        For every phase the per-frame totals of the last window_frames frames it ran in are kept, for rolling
+        p50/p95/p99. Every recorded phase is also kept as a trace event for a Chrome/Perfetto trace, up to
+        trace_capacity events, after which the oldest are dropped.
+
+        Args:
+            window_frames (int): The number of frames the rolling percentiles are computed over.
+            trace_capacity (int): The number of trace events kept for write_trace().
+        """
+        self.window_frames = window_frames
+        self.trace_events: Deque[dict] = deque(maxlen=trace_capacity)
+        self.phase_windows: Dict[str, Deque[float]] = {}
+        self.frame_count = 0
+
+        # Totals of the frame in progress
+        self._frame_start: Optional[float] = None
+        self._frame_phases: Dict[str, float] = {}
+        # (start, end) of the pauses in the frame in progress, left out of the phases they fall in
+        self._pauses: List[Tuple[float, float]] = []
+        self.draw_call_count = 0
+        self.blit_count = 0
+        self.draw_call_window: Deque[int] = deque(maxlen=window_frames)
+        self.blit_window: Deque[int] = deque(maxlen=window_frames)
+
+        # All timestamps are relative to this, in seconds
+        self._epoch = time.perf_counter()
+        self._original_draw_functions: Dict[str, Callable] = {}
+
+        self.show_overlay = False
+        self._overlay: Optional[pg.Surface] = None
+        self._overlay_frame = -1
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self._frame_phases.clear()
+        self._pauses.clear()
+        self.draw_call_count = 0
+        self.blit_count = 0
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """
+        Leaves the time spent in the block out of the phases it falls in and out of the frame, such as a post-level
+        menu that blocks until the player picks an option. The pause shows up in the trace on its own.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._pauses.append((start, end))
+            self.trace_events.append({"name": "paused", "cat": "paused", "ph": "X",
+                                      "ts": (start - self._epoch) * 1e6, "dur": (end - start) * 1e6, "pid": 1, "tid": 1})
+
+    def record(self, name: str, start: float) -> float:
+        """
+        Records a phase that started at start (from now()) and ends now, less any pauses in between. A phase recorded
+        several times in one frame, such as one per input event, counts with its total.
+
+        Returns:
+            float: The end time, to pass as the start of the phase that follows.
+        """
+        end = time.perf_counter()
+        duration = end - start
+        for pause_start, pause_end in self._pauses:
+            duration -= max(0.0, min(end, pause_end) - max(start, pause_start))
+        self._frame_phases[name] = self._frame_phases.get(name, 0.0) + duration
+        self.trace_events.append({"name": name, "cat": name.split(".", 1)[0], "ph": "X",
+                                  "ts": (start - self._epoch) * 1e6, "dur": duration * 1e6, "pid": 1, "tid": 1})
+        return end
+
+    def end_frame(self):
+        """Closes the frame: its phase totals, draw calls and blits go into the rolling windows and the trace."""
+        if self._frame_start is None:
+            return
+        self.record("frame", self._frame_start)
+        self._frame_start = None
+        for name, duration in self._frame_phases.items():
+            window = self.phase_windows.get(name)
+            if window is None:
+                window = self.phase_windows[name] = deque(maxlen=self.window_frames)
+            window.append(duration)
+        self.draw_call_window.append(self.draw_call_count)
+        self.blit_window.append(self.blit_count)
+        self.trace_events.append({"name": "draw", "ph": "C", "ts": (time.perf_counter() - self._epoch) * 1e6, "pid": 1, "tid": 1,
+                                  "args": {"draw_calls": self.draw_call_count, "blits": self.blit_count}})
+        self.frame_count += 1
+
+    def install_draw_counters(self):
+        """Wraps the pg.draw functions so that their calls are counted; undone by uninstall_draw_counters()."""
+        if self._original_draw_functions:
+            return
+        for name in self.DRAW_FUNCTIONS:
+            original = getattr(pg.draw, name, None)
+            if original is None:
+                continue
+            self._original_draw_functions[name] = original
+            setattr(pg.draw, name, self._counting(original))
+
+    def _counting(self, function: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            self.draw_call_count += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def uninstall_draw_counters(self):
+        for name, original in self._original_draw_functions.items():
+            setattr(pg.draw, name, original)
+        self._original_draw_functions.clear()
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], fraction: float) -> float:
+        """Nearest-rank percentile of a sorted, non-empty list."""
+        index = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.5) - 1))
+        return sorted_values[index]
+
+    def percentiles(self, name: str) -> Optional[Tuple[float, float, float]]:
+        """The rolling p50, p95 and p99 of a phase, in seconds, over the frames it ran in; None if it never ran."""
+        window = self.phase_windows.get(name)
+        if not window:
+            return None
+        values = sorted(window)
+        return self._percentile(values, 0.50), self._percentile(values, 0.95), self._percentile(values, 0.99)
+
+    def summary_rows(self) -> List[Tuple[str, str, str, str]]:
+        """A header and one row per phase with its rolling p50, p95 and p99 in milliseconds, the whole frame first."""
+        rows = [("phase (ms)", "p50", "p95", "p99")]
+        for name in sorted(self.phase_windows, key=lambda name: (name != "frame", name)):
+            rows.append((name, *(f"{value * 1e3:.2f}" for value in self.percentiles(name))))
+        return rows
+
+    def draw_counts_line(self) -> str:
+        if not self.draw_call_window:
+            return "no frames yet"
+        return (f"last frame: {self.draw_call_window[-1]} draw calls, {self.blit_window[-1]} blits "
+                f"(max {max(self.draw_call_window)}, {max(self.blit_window)})")
+
+    def summary_lines(self) -> List[str]:
+        """The summary rows as aligned text, then the draw call and blit counts."""
+        return [f"{name:<24}{p50:>8}{p95:>8}{p99:>8}" for name, p50, p95, p99 in self.summary_rows()] + [self.draw_counts_line()]
+
+    def draw_overlay(self, screen: pg.Surface) -> pg.Rect:
+        """
+        Draws the rolling percentiles in the top left corner of the screen. The text is only re-rendered every
+        OVERLAY_REFRESH_FRAMES frames, so the overlay costs little more than a blit.
+
+        Returns:
+            pg.Rect: The screen area the overlay covers.
+        """
+        if self._overlay is None or self.frame_count - self._overlay_frame >= self.OVERLAY_REFRESH_FRAMES:
+            self._overlay = self._render_overlay()
+            self._overlay_frame = self.frame_count
+        return screen.blit(self._overlay, (4, 4))
+
+    def _render_overlay(self) -> pg.Surface:
+        font = FontRegistry.get(None, 18)
+        line_height = font.get_linesize()
+        rows = self.summary_rows()
+        # The name column, then right-aligned number columns
+        name_width = max(font.size(row[0])[0] for row in rows) + 12
+        column_width = max(font.size(cell)[0] for row in rows for cell in row[1:]) + 12
+        counts = font.render(self.draw_counts_line(), True, self.OVERLAY_TEXT_COLOR)
+        width = max(name_width + 3 * column_width, counts.get_width()) + 12
+        overlay = pg.Surface((width, line_height * (len(rows) + 1) + 8), pg.SRCALPHA)
+        overlay.fill(self.OVERLAY_BACKGROUND)
+        for i, row in enumerate(rows):
+            y = 4 + i * line_height
+            overlay.blit(font.render(row[0], True, self.OVERLAY_TEXT_COLOR), (6, y))
+            for j, cell in enumerate(row[1:]):
+                text = font.render(cell, True, self.OVERLAY_TEXT_COLOR)
+                overlay.blit(text, (6 + name_width + (j + 1) * column_width - text.get_width(), y))
+        overlay.blit(counts, (6, 4 + len(rows) * line_height))
+        return overlay
+
+    def overlay_rect(self) -> Optional[pg.Rect]:
+        """The screen area the overlay covered when it was last drawn, or None if it wasn't."""
+        return self._overlay.get_rect(topleft=(4, 4)) if self._overlay is not None else None
+
+    def write_trace(self, path: str):
+        """Writes the kept trace events as Chrome trace JSON, which chrome://tracing and ui.perfetto.dev open."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        metadata = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "Lift Up Game"}},
+                    {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "main loop"}}]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": metadata + list(self.trace_events), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,26 @@
+class GameEvents:
+    """Names of the events published on a level's EventBus, along with the object each one is published with."""
+
+    # Published with the Customer
+    CUSTOMER_SPAWNED = "customer_spawned"
+    CUSTOMER_ASSIGNED = "customer_assigned"
+    CUSTOMER_ARRIVED_AT_LIFT = "customer_arrived_at_lift"
+    CUSTOMER_BOARDED = "customer_boarded"
+    CUSTOMER_EXITED_LIFT = "customer_exited_lift"
+    CUSTOMER_DELIVERED = "customer_delivered"
+
+    # Published with the Customer whose lift selection popup the mouse is now over, or None
+    POPUP_HOVER_CHANGED = "popup_hover_changed"
+
+    # Published with the Lift
+    LIFT_ARRIVED = "lift_arrived"
+    LIFT_IDLE = "lift_idle"
+
+    # The event a customer publishes when it enters each state
+    FOR_CUSTOMER_STATE = {
+        "walking_to_lift": CUSTOMER_ASSIGNED,
+        "waiting_at_lift": CUSTOMER_ARRIVED_AT_LIFT,
+        "in_lift": CUSTOMER_BOARDED,
+        "exiting_lift": CUSTOMER_EXITED_LIFT,
+        "delivered": CUSTOMER_DELIVERED,
+    }
@@ -0,0 +1,81 @@
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+from RawGameHistoryEntry import RawGameHistoryEntry
+
+# (timestamp, -sequence, level, penalty): the larger, the more recent; runs with equal timestamps keep the order they
+# were added in, like a stable sort by timestamp would
+_RecentKey = Tuple[int, int, str, float]
+
+
+class GameHistoryAggregates:
+    def __init__(self, recent_capacity: int = 100):
+        """
+        The summaries of a game history that the post-level screens show, kept up to date one run at a time:
+        the best run of every level, and the most recent runs, overall and per level.
+
+        Args:
+            recent_capacity (int): How many of the most recent runs are kept, overall and for every level.
+        """
+        self.recent_capacity = recent_capacity
+        # The number of runs added so far; the sequence number of the next run
+        self.count = 0
+        # Per level, the best run as (penalty, sequence, timestamp), so ties go to the earliest run
+        self.best: Dict[str, Tuple[float, int, int]] = {}
+        # Min-heaps holding the most recent runs, so the least recent one is the one to drop
+        self.recent: List[_RecentKey] = []
+        self.level_recent: Dict[str, List[_RecentKey]] = {}
+
+    def add(self, entry: RawGameHistoryEntry):
+        """Adds the next run of the history."""
+        sequence = self.count
+        self.count += 1
+
+        best = self.best.get(entry.level)
+        if best is None or entry.penalty < best[0]:
+            self.best[entry.level] = (entry.penalty, sequence, entry.timestamp_epoch_seconds)
+
+        key = (entry.timestamp_epoch_seconds, -sequence, entry.level, entry.penalty)
+        self._push_recent(self.recent, key)
+        self._push_recent(self.level_recent.setdefault(entry.level, []), key)
+
+    def _push_recent(self, heap: List[_RecentKey], key: _RecentKey):
+        if len(heap) < self.recent_capacity:
+            heapq.heappush(heap, key)
+        elif key > heap[0]:
+            heapq.heapreplace(heap, key)
+
+    def best_entries(self) -> Dict[str, RawGameHistoryEntry]:
+        """The best run of every level, by level name."""
+        return {level: RawGameHistoryEntry(timestamp_epoch_seconds=timestamp, level=level, penalty=penalty)
+                for level, (penalty, _, timestamp) in self.best.items()}
+
+    def recent_entries(self, limit: int, level: Optional[str] = None) -> List[RawGameHistoryEntry]:
+        """
+        The most recent runs, newest first, over all levels or of one level. Only valid for limits up to the
+        recent capacity.
+        """
+        heap = self.recent if level is None else self.level_recent.get(level, [])
+        return [RawGameHistoryEntry(timestamp_epoch_seconds=timestamp, level=entry_level, penalty=penalty)
+                for timestamp, _, entry_level, penalty in heapq.nlargest(limit, heap)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'recent_capacity': self.recent_capacity,
+            'count': self.count,
+            'best': {level: list(best) for level, best in self.best.items()},
+            'recent': [list(key) for key in self.recent],
+            'level_recent': {level: [list(key) for key in heap] for level, heap in self.level_recent.items()}
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'GameHistoryAggregates':
+        aggregates = GameHistoryAggregates(int(data['recent_capacity']))
+        aggregates.count = int(data['count'])
+        aggregates.best = {level: (float(penalty), int(sequence), int(timestamp)) for level, (penalty, sequence, timestamp) in data['best'].items()}
+        aggregates.recent = [(int(t), int(s), str(l), float(p)) for t, s, l, p in data['recent']]
+        aggregates.level_recent = {level: [(int(t), int(s), str(l), float(p)) for t, s, l, p in heap] for level, heap in data['level_recent'].items()}
+        # Saved from valid heaps, but cheap to make sure
+        heapq.heapify(aggregates.recent)
+        for heap in aggregates.level_recent.values():
+            heapq.heapify(heap)
+        return aggregates
@@ -1,44 +1,171 @@
 import csv
+import gzip
+import io
+import json
 import os
-from typing import List
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 from RawGameHistoryEntry import RawGameHistoryEntry
+from GameHistoryAggregates import GameHistoryAggregates
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
 
 
 class GameHistoryPersistence:
-    def __init__(self, output_path: str):
+    SUMMARY_VERSION = 1
+    _SEGMENT_PATTERN = re.compile(r"^game_history_(\d+)\.csv\.gz$")
+
+    def __init__(self, output_path: str, max_file_bytes: int = 1 << 20, recent_capacity: int = 100):
         """
         Handles reading and writing game history data.
 
+        The best run per level and the most recent runs are kept in memory and updated as runs are added, so the
+        screens' queries don't read the file. Only what was appended since the last query is read, whether it was
+        appended here or by another game sharing the file. Once the file has grown past max_file_bytes, it is compressed
+        into an archive segment and started afresh; a summary of everything archived is kept next to the segments,
+        so nothing but the current file is ever parsed on start-up. Games sharing the file take turns appending and
+        archiving through a lock file next to it, so no game's rows get lost in another game's rotation.
+
         Args:
             output_path (str): The directory where the history file is stored.
+            max_file_bytes (int): The size after which the history file is moved into the archive.
+            recent_capacity (int): How many recent runs, overall and per level, the queries are answered from memory for.
         """
         self.file_path = os.path.join(output_path, "game_history.csv")
+        # Locked instead of the history file itself, which rotation replaces
+        self.lock_path = self.file_path + ".lock"
+        self.archive_path = os.path.join(output_path, "game_history_archive")
+        self.summary_path = os.path.join(self.archive_path, "summary.json")
         self.fieldnames = ["timestamp_epoch_seconds", "level", "penalty"]
+        self.max_file_bytes = max_file_bytes
+        self.recent_capacity = recent_capacity
+
+        # Everything up to _read_offset of the file identified by _file_id has been added to _aggregates
+        self._aggregates: Optional[GameHistoryAggregates] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._read_offset = 0
         self._ensure_file_exists()
 
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Holds the lock that games sharing the history file take to append to it, create it or archive it."""
+        with open(self.lock_path, 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
     def _ensure_file_exists(self):
         """Creates the CSV file with a header if it doesn't exist."""
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                writer.writeheader()
+        if os.path.exists(self.file_path):
+            return
+        with self._locked():
+            if not os.path.exists(self.file_path):
+                with open(self.file_path, 'w', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                    writer.writeheader()
+
+    def _parse_rows(self, text: str) -> List[RawGameHistoryEntry]:
+        """Parses complete CSV lines of the history file, skipping the header."""
+        entries = []
+        for row in csv.reader(io.StringIO(text)):
+            if not row or row == self.fieldnames:
+                continue
+            timestamp, level, penalty = row
+            entries.append(RawGameHistoryEntry(
+                timestamp_epoch_seconds=int(timestamp),
+                level=level,
+                penalty=float(penalty)
+            ))
+        return entries
+
+    def _read_archived_summary(self) -> GameHistoryAggregates:
+        """The aggregates of all archive segments, or empty ones if nothing was archived yet."""
+        if not os.path.exists(self.summary_path):
+            return GameHistoryAggregates(self.recent_capacity)
+        try:
+            with open(self.summary_path, 'r') as f:
+                summary = json.load(f)
+            if summary.get('version') != self.SUMMARY_VERSION:
+                raise ValueError(f"unsupported version {summary.get('version')}")
+            return GameHistoryAggregates.from_dict(summary['aggregates'])
+        except (OSError, KeyError, ValueError, TypeError) as e:
+            print(f"Rebuilding unreadable game history summary '{self.summary_path}': {e}")
+            aggregates = GameHistoryAggregates(self.recent_capacity)
+            for entry in self._read_archive():
+                aggregates.add(entry)
+            return aggregates
+
+    def _refresh(self) -> GameHistoryAggregates:
+        """Brings the aggregates up to date with the file, reading only what was appended since the last call."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            self._ensure_file_exists()
+            stat = os.stat(self.file_path)
+
+        file_id = (stat.st_dev, stat.st_ino)
+        if self._aggregates is None or file_id != self._file_id or stat.st_size < self._read_offset:
+            # First use, or the file was rotated or replaced meanwhile: start over from the archive
+            self._aggregates = self._read_archived_summary()
+            self._file_id = file_id
+            self._read_offset = 0
+
+        if stat.st_size > self._read_offset:
+            with open(self.file_path, 'rb') as f:
+                f.seek(self._read_offset)
+                tail = f.read()
+            # A line that is still being written is left for the next call
+            complete = tail[:tail.rfind(b"\n") + 1]
+            for entry in self._parse_rows(complete.decode('utf-8')):
+                self._aggregates.add(entry)
+            self._read_offset += len(complete)
+            if self._read_offset > self.max_file_bytes:
+                self._rotate()
+        return self._aggregates
+
+    def _segment_paths(self) -> List[str]:
+        """The archive segments, oldest first."""
+        try:
+            names = os.listdir(self.archive_path)
+        except FileNotFoundError:
+            return []
+        numbered = [(int(match.group(1)), name) for name in names if (match := self._SEGMENT_PATTERN.match(name))]
+        return [os.path.join(self.archive_path, name) for _, name in sorted(numbered)]
+
+    def _read_archive(self) -> List[RawGameHistoryEntry]:
+        history = []
+        for segment_path in self._segment_paths():
+            with gzip.open(segment_path, 'rt', newline='') as f:
+                history.extend(self._parse_rows(f.read()))
+        return history
 
     def read_all(self) -> List[RawGameHistoryEntry]:
         """
-        Reads all history entries from the CSV file.
+        Reads all history entries, the archived ones included.
 
         Returns:
             List[RawGameHistoryEntry]: A list of all history entries.
         """
-        history = []
+        history = self._read_archive()
         with open(self.file_path, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                history.append(RawGameHistoryEntry(
-                    timestamp_epoch_seconds=int(row['timestamp_epoch_seconds']),
-                    level=row['level'],
-                    penalty=float(row['penalty'])
-                ))
+            history.extend(self._parse_rows(f.read()))
         return history
 
     def append(self, history_entry: RawGameHistoryEntry):
@@ -48,10 +175,115 @@ class GameHistoryPersistence:
         Args:
             history_entry (RawGameHistoryEntry): The new entry to add.
         """
-        with open(self.file_path, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writerow({
-                "timestamp_epoch_seconds": history_entry.timestamp_epoch_seconds,
-                "level": history_entry.level,
-                "penalty": history_entry.penalty
-            })
+        self._ensure_file_exists()
+        with self._locked():
+            with open(self.file_path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                writer.writerow({
+                    "timestamp_epoch_seconds": history_entry.timestamp_epoch_seconds,
+                    "level": history_entry.level,
+                    "penalty": history_entry.penalty
+                })
+        # Picks up the new row, plus any another game appended meanwhile
+        self._refresh()
+
+    def _rotate(self):
+        """Compresses the history file into the next archive segment, records it in the summary and starts a new file."""
+        temp_paths = []
+        try:
+            os.makedirs(self.archive_path, exist_ok=True)
+            with self._locked():
+                stat = os.stat(self.file_path)
+                if (stat.st_dev, stat.st_ino) != self._file_id:
+                    # Another game archived it first; the next refresh starts over from the new summary
+                    return
+                # Everything up to the end, so rows other games appended since the last refresh are archived too
+                with open(self.file_path, 'rb') as f:
+                    rows = f.read()
+                tail = rows[self._read_offset:]
+                complete_end = self._read_offset + tail.rfind(b"\n") + 1
+                for entry in self._parse_rows(rows[self._read_offset:complete_end].decode('utf-8')):
+                    self._aggregates.add(entry)
+                self._read_offset = complete_end
+
+                segment_paths = self._segment_paths()
+                next_number = int(self._SEGMENT_PATTERN.match(os.path.basename(segment_paths[-1])).group(1)) + 1 if segment_paths else 1
+                segment_path = os.path.join(self.archive_path, f"game_history_{next_number:06d}.csv.gz")
+
+                # Write to the side and swap, so a crash leaves either the old or the new state
+                for path in (segment_path, self.summary_path, self.file_path):
+                    temp_paths.append(self._temp_path_beside(path, stat.st_mode))
+                segment_temp_path, summary_temp_path, new_file_path = temp_paths
+                with gzip.open(segment_temp_path, 'wb') as f:
+                    f.write(rows[:complete_end])
+                summary = {'version': self.SUMMARY_VERSION, 'aggregates': self._aggregates.to_dict()}
+                with open(summary_temp_path, 'w') as f:
+                    json.dump(summary, f)
+                header = io.StringIO()
+                csv.DictWriter(header, fieldnames=self.fieldnames).writeheader()
+                # A line still being written by a game that doesn't lock carries over into the new file
+                with open(new_file_path, 'wb') as f:
+                    f.write(header.getvalue().encode('utf-8') + rows[complete_end:])
+                os.replace(segment_temp_path, segment_path)
+                os.replace(summary_temp_path, self.summary_path)
+                os.replace(new_file_path, self.file_path)
+                stat = os.stat(self.file_path)
+        except OSError as e:
+            print(f"Could not archive game history '{self.file_path}': {e}")
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return
+
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._read_offset = 0
+
+    @staticmethod
+    def _temp_path_beside(path: str, mode: int) -> str:
+        """A new empty file with a unique name in path's directory, with the given permissions, to be swapped in for path."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+        os.close(fd)
+        os.chmod(temp_path, mode & 0o777)
+        return temp_path
+
+    def best_per_level(self) -> List[RawGameHistoryEntry]:
+        """
+        Finds the run with the lowest penalty of every level; the earliest one if several runs tie.
+
+        Returns:
+            List[RawGameHistoryEntry]: One entry per level, ordered by level number.
+        """
+        best_scores: Dict[str, RawGameHistoryEntry] = self._refresh().best_entries()
+        return [best_scores[level] for level in sorted(best_scores, key=GameHistoryPersistence.level_sort_key)]
+
+    def recent(self, limit: int) -> List[RawGameHistoryEntry]:
+        """
+        Returns the most recent runs over all levels, newest first.
+
+        Args:
+            limit (int): The maximum number of runs to return.
+        """
+        aggregates = self._refresh()
+        if limit <= aggregates.recent_capacity:
+            return aggregates.recent_entries(limit)
+        return sorted(self.read_all(), key=lambda x: x.timestamp_epoch_seconds, reverse=True)[:limit]
+
+    def level_history(self, level: str, limit: Optional[int] = None) -> List[RawGameHistoryEntry]:
+        """
+        Returns the runs of one level, newest first.
+
+        Args:
+            level (str): The name of the level (e.g., "level_1").
+            limit (Optional[int]): The maximum number of runs to return; all of them if None.
+        """
+        aggregates = self._refresh()
+        if limit is not None and limit <= aggregates.recent_capacity:
+            return aggregates.recent_entries(limit, level)
+        history = [entry for entry in self.read_all() if entry.level == level]
+        history.sort(key=lambda x: x.timestamp_epoch_seconds, reverse=True)
+        return history[:limit] if limit is not None else history
+
+    @staticmethod
+    def level_sort_key(level: str) -> int:
+        """Orders level names like "level_10" by their number."""
+        return int(level.split('_')[-1])
@@ -0,0 +1,121 @@
+import random
+import time
+from typing import List
+import pygame as pg
+from Customer import Customer
+from GameEvents import GameEvents
+from Level import Level
+from LevelsLoader import LevelsLoader
+from HeadlessRunResult import HeadlessRunResult
+from assignment_policies.AssignmentPolicyFactory import AssignmentPolicyFactory
+
+
+class HeadlessLevelRunner:
+    # The most frames an event-driven run steps through without looking for quiet frames to skip
+    MAX_PROBE_DELAY = 16
+
+    def __init__(self, levels_loader: LevelsLoader, level_num: int, policy_name: str = "nearest", seed: int = 0, fps: int = 60, max_level_time: float = 3600.0, vectorized_customers: bool = False, verify_lift_plans: bool = False, streaming_spawns: bool = False, event_driven: bool = False):
+        """
+        Plays a level without a window, at a fixed step and as fast as the CPU allows.
+        Lift assignments are made by an AssignmentPolicy instead of the player.
+
+        Args:
+            levels_loader (LevelsLoader): The loader to read the level from.
+            level_num (int): The number of the level to run.
+            policy_name (str): The name of the assignment policy, see AssignmentPolicyFactory.
+            seed (int): Seed for the global random module, used for customer visuals and wandering.
+            fps (int): Simulated frames per second; every step advances the level by 1 / fps seconds.
+            max_level_time (float): Simulated seconds after which an unfinished run is stopped.
+            vectorized_customers (bool): Move customers with the NumPy VectorizedCustomerEngine.
+            verify_lift_plans (bool): Check the lifts' incremental stop plans against full recomputation.
+            streaming_spawns (bool): Read the time-sorted spawns file lazily while the level runs, see LevelsLoader.load.
+            event_driven (bool): Jump over the frames in which nothing but movement happens instead of stepping
+                through them, see Level.frames_until_next_event. The result is the same, frame count included.
+        """
+        self.levels_loader = levels_loader
+        self.level_num = level_num
+        self.policy_name = policy_name
+        self.seed = seed
+        self.dt = 1.0 / fps
+        self.max_level_time = max_level_time
+        self.vectorized_customers = vectorized_customers
+        self.verify_lift_plans = verify_lift_plans
+        self.streaming_spawns = streaming_spawns
+        self.event_driven = event_driven
+
+        # Game constants, same as in LiftUpGame
+        self.SCREEN_WIDTH = 800
+        self.TOP_PADDING = 50
+        self.GAME_HEIGHT = 800
+        self.STATUS_BAR_HEIGHT = 100
+
+    def run(self) -> HeadlessRunResult:
+        """Runs the level until it is complete or the time limit is hit."""
+        # Customers and lifts create fonts, but nothing needs a display
+        pg.font.init()
+        random.seed(self.seed)
+        policy = AssignmentPolicyFactory.create(self.policy_name)
+
+        level = Level(
+            raw_data=self.levels_loader.load(self.level_num, streaming=self.streaming_spawns),
+            screen_width=self.SCREEN_WIDTH,
+            game_height=self.GAME_HEIGHT,
+            top_padding=self.TOP_PADDING,
+            status_bar_height=self.STATUS_BAR_HEIGHT,
+            post_level_action=None,
+            vectorized_customers=self.vectorized_customers,
+            verify_lift_plans=self.verify_lift_plans
+        )
+
+        # Every customer is offered to the policy once, right after the frame it spawned in
+        new_customers: List[Customer] = []
+        level.event_bus.subscribe(GameEvents.CUSTOMER_SPAWNED, new_customers.append)
+
+        frames = 0
+        # Frames to step before asking the level for quiet frames again, and how many asks in a row found none
+        probe_delay = 0
+        busy_probes = 0
+        start = time.perf_counter()
+        while not level.is_complete and level.level_time < self.max_level_time:
+            if self.event_driven:
+                if probe_delay:
+                    probe_delay -= 1
+                else:
+                    quiet_frames = level.frames_until_next_event(self.dt, self.max_level_time)
+                    if quiet_frames:
+                        busy_probes = 0
+                        level.skip_frames(quiet_frames, self.dt)
+                        frames += quiet_frames
+                        continue
+                    # In busy stretches every frame has an event; ask less often the longer they last
+                    busy_probes += 1
+                    probe_delay = min(2 ** busy_probes - 1, self.MAX_PROBE_DELAY)
+            level.step(self.dt)
+            frames += 1
+            self._assign_new_customers(level, policy, new_customers)
+        wall_time = time.perf_counter() - start
+        # Stopped by the time limit, the level may still be streaming its spawns
+        level.close()
+
+        return HeadlessRunResult(
+            level_num=self.level_num,
+            policy_name=self.policy_name,
+            seed=self.seed,
+            is_complete=level.is_complete,
+            total_penalty=level.status_bar.total_penalty,
+            level_time=level.level_time,
+            frames=frames,
+            wall_time=wall_time,
+            plan_mismatches=sum(lift.plan_mismatches for lift in level.lifts)
+        )
+
+    @staticmethod
+    def _assign_new_customers(level: Level, policy, new_customers: List[Customer]):
+        """Asks the policy for a lift, once, for every customer that spawned since the last call."""
+        for customer in new_customers:
+            if customer.state != "waiting_for_lift_selection":
+                continue
+            lift_name = policy.choose_lift(level, customer)
+            if lift_name:
+                level.assign_customer(customer, lift_name)
+        new_customers.clear()
@@ -0,0 +1,31 @@
+class HeadlessRunResult:
+    def __init__(self, level_num: int, policy_name: str, seed: int, is_complete: bool, total_penalty: float, level_time: float, frames: int, wall_time: float, plan_mismatches: int = 0):
+        """
+        Holds the outcome of a single headless level run.
+
+        Args:
+            level_num (int): The number of the level that was run.
+            policy_name (str): The name of the assignment policy that played the level.
+            seed (int): The random seed the run was started with.
+            is_complete (bool): Whether the level was completed before the time limit.
+            total_penalty (float): The final penalty shown in the status bar.
+            level_time (float): Simulated seconds that passed in the level.
+            frames (int): The number of simulation steps that were run.
+            wall_time (float): Real seconds the run took.
+            plan_mismatches (int): Incremental lift plans that differed from a full recomputation, when verified.
+        """
+        self.level_num = level_num
+        self.policy_name = policy_name
+        self.seed = seed
+        self.is_complete = is_complete
+        self.total_penalty = total_penalty
+        self.level_time = level_time
+        self.frames = frames
+        self.wall_time = wall_time
+        self.plan_mismatches = plan_mismatches
+
+    def simulated_seconds_per_wall_second(self) -> float:
+        """Returns how many times faster than real time the run was."""
+        if self.wall_time <= 0:
+            return float("inf")
+        return self.level_time / self.wall_time
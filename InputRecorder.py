@@ -0,0 +1,81 @@
+from __future__ import annotations
+import json
+import os
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from GameEvents import GameEvents
+
+if TYPE_CHECKING:
+    from Level import Level
+    from Customer import Customer
+
+
+class InputRecorder:
+    FORMAT_VERSION = 1
+
+    def __init__(self, level_num: int, seed: int):
+        """
+        Logs everything a level run depends on besides the level files, so InputReplayRunner can play it again:
+        the seed the global random module was seeded with before the level was created (customer colors, popup
+        offsets and wandering directions come from it), the length of every frame, and the player's input as
+        events between frames. Popups the player hovers are logged as well as lifts picked, since hovered customers
+        stop wandering.
+
+        Frame lengths are run-length encoded as [dt, count] pairs; events are [frame, level_time, "hover",
+        customer_id or None] and [frame, level_time, "assign", customer_id, lift_name], where frame is the number of
+        frames that had passed and customers are identified by their spawn order.
+
+        Args:
+            level_num (int): The number of the level being recorded.
+            seed (int): The seed of the global random module when the level was created.
+        """
+        self.level_num = level_num
+        self.seed = seed
+        self.frames: List[List[Any]] = []
+        self.frame_count = 0
+        self.events: List[List[Any]] = []
+        self.level: Optional[Level] = None
+
+    def attach(self, level: Level):
+        """Starts recording the given level, which must not have been stepped yet."""
+        self.level = level
+        level.input_recorder = self
+        level.event_bus.subscribe(GameEvents.POPUP_HOVER_CHANGED, self._on_popup_hover_changed)
+        level.event_bus.subscribe(GameEvents.CUSTOMER_ASSIGNED, self._on_customer_assigned)
+
+    def record_frame(self, dt: float):
+        """Called by the level with the length of every frame, before it is simulated."""
+        if self.frames and self.frames[-1][0] == dt:
+            self.frames[-1][1] += 1
+        else:
+            self.frames.append([dt, 1])
+        self.frame_count += 1
+
+    def _on_popup_hover_changed(self, customer: Optional[Customer]):
+        self.events.append([self.frame_count, self.level.level_time, "hover", customer.id if customer else None])
+
+    def _on_customer_assigned(self, customer: Customer):
+        self.events.append([self.frame_count, self.level.level_time, "assign", customer.id, customer.selected_lift])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The log, along with the outcome of the run so far, as saved by save()."""
+        return {
+            'version': self.FORMAT_VERSION,
+            'level_num': self.level_num,
+            'seed': self.seed,
+            'frames': self.frames,
+            'events': self.events,
+            'frame_count': self.frame_count,
+            'level_time': self.level.level_time if self.level else 0.0,
+            'total_penalty': self.level.status_bar.total_penalty if self.level else 0.0
+        }
+
+    def save(self, file_path: str):
+        """Writes the log as compact JSON; floats are written so that they read back exactly."""
+        try:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(file_path, 'w') as f:
+                json.dump(self.to_dict(), f, separators=(',', ':'))
+        except OSError as e:
+            print(f"Could not save input log '{file_path}': {e}")
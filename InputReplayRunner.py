@@ -0,0 +1,155 @@
+import json
+import random
+import time
+from typing import Any, Dict, List
+import pygame as pg
+from Customer import Customer
+from GameEvents import GameEvents
+from InputRecorder import InputRecorder
+from Level import Level
+from LevelsLoader import LevelsLoader
+from ReplayResult import ReplayResult
+
+
+class InputReplayRunner:
+    def __init__(self, levels_loader: LevelsLoader, log_path: str):
+        """
+        Plays an input log saved by InputRecorder back into a new Level, without a window and as fast as the CPU
+        allows, and compares the final penalty with the recorded one. With unchanged rules and level files the two
+        are identical, so a changed penalty shows the effect of a rule change on a real session.
+
+        Args:
+            levels_loader (LevelsLoader): The loader to read the recorded level from.
+            log_path (str): The input log to replay.
+        """
+        self.levels_loader = levels_loader
+        self.log_path = log_path
+
+        # Game constants, same as in LiftUpGame
+        self.SCREEN_WIDTH = 800
+        self.TOP_PADDING = 50
+        self.GAME_HEIGHT = 800
+        self.STATUS_BAR_HEIGHT = 100
+
+    def run(self) -> ReplayResult:
+        """
+        Replays the log until its frames run out, or until the first input that doesn't fit the replayed run. Raises
+        ValueError if the log isn't a well-formed input log, before anything is simulated.
+        """
+        # A truncated file raises json.JSONDecodeError, which is a ValueError
+        with open(self.log_path, 'r') as f:
+            log: Dict[str, Any] = json.load(f)
+        self._validate_log(log)
+
+        # Customers and lifts create fonts, but nothing needs a display
+        pg.font.init()
+        random.seed(log['seed'])
+        level = Level(
+            raw_data=self.levels_loader.load(log['level_num']),
+            screen_width=self.SCREEN_WIDTH,
+            game_height=self.GAME_HEIGHT,
+            top_padding=self.TOP_PADDING,
+            status_bar_height=self.STATUS_BAR_HEIGHT,
+            post_level_action=None
+        )
+        customers: Dict[int, Customer] = {}
+        level.event_bus.subscribe(GameEvents.CUSTOMER_SPAWNED, lambda customer: customers.__setitem__(customer.id, customer))
+
+        events: List[List[Any]] = log['events']
+        next_event = 0
+        frames = 0
+        desync = ""
+        start = time.perf_counter()
+        for dt, count in log['frames']:
+            for _ in range(count):
+                while not desync and next_event < len(events) and events[next_event][0] == frames:
+                    desync = self._apply_event(level, customers, events[next_event])
+                    next_event += 1
+                if desync:
+                    break
+                level.step(dt)
+                frames += 1
+            if desync:
+                break
+        # Input after the last frame can't change the outcome, but is still checked
+        while not desync and next_event < len(events):
+            desync = self._apply_event(level, customers, events[next_event])
+            next_event += 1
+        wall_time = time.perf_counter() - start
+        level.close()
+
+        return ReplayResult(
+            log_path=self.log_path,
+            level_num=log['level_num'],
+            recorded_penalty=log['total_penalty'],
+            replayed_penalty=level.status_bar.total_penalty,
+            is_complete=level.is_complete,
+            frames=frames,
+            desync=desync,
+            wall_time=wall_time
+        )
+
+    def _validate_log(self, log: Any):
+        """Checks the layout InputRecorder writes, so that a damaged log fails here rather than inside the simulation."""
+        def fail(reason: str):
+            raise ValueError(f"Malformed input log '{self.log_path}': {reason}")
+
+        def is_int(value: Any) -> bool:
+            return isinstance(value, int) and not isinstance(value, bool)
+
+        def is_number(value: Any) -> bool:
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+        if not isinstance(log, dict):
+            fail("not a JSON object")
+        if log.get('version') != InputRecorder.FORMAT_VERSION:
+            raise ValueError(f"Unsupported input log version {log.get('version')} in '{self.log_path}'")
+        for key, check in (('seed', is_int), ('level_num', is_int), ('total_penalty', is_number)):
+            if not check(log.get(key)):
+                fail(f"'{key}' is missing or has the wrong type")
+
+        if not isinstance(log.get('frames'), list):
+            fail("'frames' is missing or not a list")
+        for i, entry in enumerate(log['frames']):
+            if not (isinstance(entry, list) and len(entry) == 2 and is_number(entry[0]) and entry[0] > 0 and is_int(entry[1]) and entry[1] >= 0):
+                fail(f"frames entry {i} is not a [dt, count] pair")
+
+        if not isinstance(log.get('events'), list):
+            fail("'events' is missing or not a list")
+        previous_frame = 0
+        for i, event in enumerate(log['events']):
+            if not (isinstance(event, list) and len(event) >= 4 and is_int(event[0]) and is_number(event[1])):
+                fail(f"event {i} doesn't start with a frame and a level time")
+            if event[0] < previous_frame:
+                fail(f"event {i} is out of frame order")
+            previous_frame = event[0]
+            kind, customer_id = event[2], event[3]
+            if kind == "hover":
+                if len(event) != 4 or not (customer_id is None or is_int(customer_id)):
+                    fail(f"event {i} is not a [frame, level_time, \"hover\", customer_id or null] event")
+            elif kind == "assign":
+                if len(event) != 5 or not is_int(customer_id) or not isinstance(event[4], str):
+                    fail(f"event {i} is not a [frame, level_time, \"assign\", customer_id, lift_name] event")
+            else:
+                fail(f"event {i} has the unknown kind {kind!r}")
+
+    @staticmethod
+    def _apply_event(level: Level, customers: Dict[int, Customer], event: List[Any]) -> str:
+        """
+        Feeds one recorded input event, already validated, to the level; returns why it doesn't fit the replayed run,
+        if it doesn't.
+        """
+        frame, level_time, kind, customer_id = event[:4]
+        if level_time != level.level_time:
+            return f"frame {frame}: input at {level_time}s, but the replay is at {level.level_time}s"
+        customer = customers.get(customer_id) if customer_id is not None else None
+        if customer_id is not None and customer is None:
+            return f"frame {frame}: customer {customer_id} never spawned"
+
+        if kind == "hover":
+            level.set_active_popup(customer)
+        else:
+            if customer.state != "waiting_for_lift_selection":
+                return f"frame {frame}: customer {customer_id} can't be assigned in state '{customer.state}'"
+            level.assign_customer(customer, event[4])
+        return ""
@@ -1,4 +1,7 @@
-from typing import List, Optional, Tuple
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
 import pygame as pg
 from Floor import Floor
 from Lift import Lift
@@ -6,11 +9,33 @@ from RawLevelData import RawLevelData
 from StatusBar import StatusBar
 from DeterministicCustomerFactory import DeterministicCustomerFactory
 from Customer import Customer
+from CustomerSpawnLocation import CustomerSpawnLocation
+from FloorRequestPopup import FloorRequestPopup
+from RawCustomerData import RawCustomerData
+from VectorizedCustomerEngine import VectorizedCustomerEngine
+from EventBus import EventBus
+from GameEvents import GameEvents
 from post_level.PostLevelCompleteAction import PostLevelCompleteAction
 
+if TYPE_CHECKING:
+    from InputRecorder import InputRecorder
+    from FrameProfiler import FrameProfiler
+
 
 class Level:
-    def __init__(self, raw_data: RawLevelData, screen_width: int, game_height: int, top_padding: int, status_bar_height: int, post_level_action: Optional[PostLevelCompleteAction] = None):
+    BACKGROUND_COLOR = (30, 30, 30)
+    # Lifts are this far apart around the middle of the floor, closer if there are too many to fit the lift area
+    LIFT_PITCH = 100
+    LIFT_AREA_WIDTH = 280
+    # Lift colors, in the order the lifts are declared in
+    LIFT_COLORS = [(100, 200, 100), (200, 100, 100), (100, 150, 220), (220, 190, 90),
+                   (180, 110, 200), (90, 200, 200), (230, 140, 80), (170, 170, 170)]
+    # draw_dirty() draws the whole screen instead when the changed areas, merged, cover more than this share of it or
+    # are more rects than this; restoring and presenting them one by one would then cost more than a full redraw
+    FULL_REDRAW_AREA_SHARE = 0.5
+    MAX_DIRTY_RECTS = 32
+
+    def __init__(self, raw_data: RawLevelData, screen_width: int, game_height: int, top_padding: int, status_bar_height: int, post_level_action: Optional[PostLevelCompleteAction] = None, vectorized_customers: bool = False, verify_lift_plans: bool = False):
         """
         Represents a single game level.
 
@@ -21,6 +46,8 @@ class Level:
             top_padding (int): Padding at the top of the screen.
             status_bar_height (int): Height of the status bar.
             post_level_action (PostLevelCompleteAction): Action to execute when the level is complete.
+            vectorized_customers (bool): Move all customers in one NumPy step instead of one Customer.update() each.
+            verify_lift_plans (bool): Check every incremental lift plan update against a full recomputation.
         """
         self.raw_data = raw_data
         self.screen_width = screen_width
@@ -31,22 +58,57 @@ class Level:
         
         self.num_floors = raw_data.num_floors
         self.floor_height = self.game_height // self.num_floors
+        # Platforms, lifts and customers keep their size while floors are tall enough, and shrink on lower floors
+        self.platform_height = max(1, min(10, self.floor_height // 8))
+        self.lift_height = max(2, min(80, self.floor_height * 3 // 4))
+        self.customer_height = max(2, min(40, self.floor_height // 2))
         
         # Game objects
         self.floors: List[Floor] = []
         self.lifts: List[Lift] = []
+        self._lifts_by_name: Dict[str, Lift] = {}
+        # The lifts that can take a customer from one floor to another, by (floor, target floor), filled on demand
+        self._lifts_serving: Dict[Tuple[int, int], List[Lift]] = {}
         self.active_popup_customer: Optional[Customer] = None
         self.status_bar = StatusBar(self.screen_width, self.status_bar_height, 0, self.game_height + self.top_padding)
         
+        self.verify_lift_plans = verify_lift_plans
+
+        # Bookkeeping is driven by the customers' and lifts' transitions instead of scanning them every frame
+        self.event_bus = EventBus()
+        self.active_customer_count = 0
+        self.spawned_customer_count = 0
+        self._delivered_customers: List[Customer] = []
+        self.event_bus.subscribe(GameEvents.CUSTOMER_SPAWNED, self._on_customer_spawned)
+        self.event_bus.subscribe(GameEvents.CUSTOMER_ARRIVED_AT_LIFT, self._on_customer_arrived_at_lift)
+        self.event_bus.subscribe(GameEvents.CUSTOMER_DELIVERED, self._on_customer_delivered)
+        self.customer_engine: Optional[VectorizedCustomerEngine] = VectorizedCustomerEngine() if vectorized_customers else None
+
         # Load factories
-        self.customer_factory = DeterministicCustomerFactory(raw_data.customer_spawns)
+        self.customer_factory = DeterministicCustomerFactory(raw_data.customer_spawns, streaming=raw_data.streaming_spawns)
+        # The spawn locations by ID, along with their position in floor order, for dispatching the factory's due spawns
+        self._spawn_locations_by_id: Dict[str, Tuple[int, Floor, CustomerSpawnLocation]] = {}
+        self._unknown_spawn_ids: Set[str] = set()
         
         self.is_complete = False
         self.level_time = 0.0
+        # Set by an InputRecorder that logs this level's frames and player input for replay
+        self.input_recorder: Optional[InputRecorder] = None
+        # Set to time the phases of every frame, see FrameProfiler
+        self.profiler: Optional[FrameProfiler] = None
         self.clock = pg.time.Clock()
         self.fps = 60
         self._initialize_level()
 
+        # Everything that doesn't change during the level (shafts, platforms, labels, spawn markers) is drawn once
+        # onto this surface; it is built as soon as there is a display and rebuilt when the geometry changes
+        self._background: Optional[pg.Surface] = None
+        # The screen areas the moving parts covered at the last draw_dirty(), or None after a full draw()
+        self._previous_dirty_rects: Optional[List[pg.Rect]] = None
+        self._drawn_penalty: Optional[float] = None
+        if pg.display.get_surface() is not None:
+            self._build_background(pg.display.get_surface().get_size())
+
     def _initialize_level(self):
         """Initialize floors and lifts based on raw data."""
         center_x = self.screen_width // 2
@@ -64,63 +126,304 @@ class Level:
                 total_floors=self.num_floors,
                 lift_center_x=center_x,
                 file_factory=self.customer_factory,
-                spawn_locations_data=floor_spawn_data
+                spawn_locations_data=floor_spawn_data,
+                customer_engine=self.customer_engine,
+                event_bus=self.event_bus,
+                platform_height=self.platform_height,
+                customer_height=self.customer_height
             )
             self.floors.append(floor)
+            for spawn_loc in floor.spawn_locations:
+                self._spawn_locations_by_id[spawn_loc.id] = (len(self._spawn_locations_by_id), floor, spawn_loc)
+
+        # Create lifts, side by side in the order they are declared in, each in the middle of its share of the lift area
+        lift_count = len(self.raw_data.lifts)
+        pitch = min(self.LIFT_PITCH, self.LIFT_AREA_WIDTH // lift_count)
+        lift_width = pitch * 3 // 5
+        lifts_left = center_x - lift_count * pitch // 2
+        for i, lift_data in enumerate(self.raw_data.lifts):
+            lift = Lift(
+                lift_data.name,
+                lifts_left + i * pitch + (pitch - lift_width) // 2,
+                self.num_floors,
+                self.floor_height,
+                self.floors,
+                self.top_padding,
+                self.verify_lift_plans,
+                self.event_bus,
+                width=lift_width,
+                height=self.lift_height,
+                ground_height=self.platform_height,
+                speed=lift_data.speed,
+                door_wait_time=lift_data.door_wait_time,
+                served_floors=lift_data.served_floors,
+                color=self.LIFT_COLORS[i % len(self.LIFT_COLORS)]
+            )
+            self.lifts.append(lift)
+            self._lifts_by_name[lift.name] = lift
+        # Lifts never move sideways, so where customers walk to is the same all level
+        self._lift_positions = {lift.name: lift.x + lift.width // 2 for lift in self.lifts}
+
+        # How far up and down the lift selection popups of every floor's customers can reach, negated so both lists
+        # ascend with the floor number, for finding the floors with popups under the mouse
+        popup_height = FloorRequestPopup.popup_height_for(lift_count)
+        popup_extents = [FloorRequestPopup.vertical_extent(floor.customer_y, popup_height) for floor in self.floors]
+        self._popup_tops = [-top for top, _ in popup_extents]
+        self._popup_bottoms = [-bottom for _, bottom in popup_extents]
+
+    def _on_customer_spawned(self, customer: Customer):
+        customer.id = self.spawned_customer_count
+        self.spawned_customer_count += 1
+        self.active_customer_count += 1
+        customer.popup.set_lifts(self.get_lifts_serving(customer.current_floor, customer.target_floor))
+
+    def _on_customer_arrived_at_lift(self, customer: Customer):
+        lift = self.get_lift(customer.selected_lift)
+        if lift:
+            lift.on_customer_arrived_at_lift(customer)
+
+    def _on_customer_delivered(self, customer: Customer):
+        self.active_customer_count -= 1
+        self._delivered_customers.append(customer)
+
+    def get_lift(self, lift_name: str) -> Optional[Lift]:
+        """Returns the lift with the given name, or None if there is no such lift."""
+        return self._lifts_by_name.get(lift_name)
+
+    def get_lifts_serving(self, floor: int, target_floor: int) -> List[Lift]:
+        """
+        Returns the lifts a customer can take from one floor to another, i.e. those that stop at both, in declaration order.
 
-        # Create lifts (currently hardcoded to 2, but could be data-driven later)
-        lift_a = Lift("A", center_x - 80, self.num_floors, self.floor_height, self.floors, self.top_padding)
-        lift_b = Lift("B", center_x + 20, self.num_floors, self.floor_height, self.floors, self.top_padding)
-        self.lifts.extend([lift_a, lift_b])
+        Args:
+            floor (int): The floor the customer is on.
+            target_floor (int): The floor the customer wants to go to.
+
+        Returns:
+            List[Lift]: The lifts serving both floors; the same list for every call with the same floors.
+        """
+        key = (floor, target_floor)
+        lifts = self._lifts_serving.get(key)
+        if lifts is None:
+            lifts = self._lifts_serving[key] = [lift for lift in self.lifts if lift.serves(floor) and lift.serves(target_floor)]
+        return lifts
+
+    def assign_customer(self, customer: Customer, lift_name: str):
+        """
+        Assigns a customer to a lift, as if the player picked it from the customer's popup.
+
+        Args:
+            customer (Customer): A customer that is waiting for lift selection.
+            lift_name (str): The name of the lift to send the customer to; it must serve the customer's floor and target floor.
+        """
+        lift = self.get_lift(lift_name)
+        if lift is None or lift not in self.get_lifts_serving(customer.current_floor, customer.target_floor):
+            print(f"Lift '{lift_name}' can't take customers from floor {customer.current_floor} to floor {customer.target_floor}; ignoring the assignment")
+            return
+        if customer.state == "waiting_for_lift_selection":
+            customer.select_lift(lift_name, self.level_time)
+        self._request_lift(customer)
+
+    def _request_lift(self, customer: Customer):
+        """Adds the request of an already assigned customer to its lift and clears the popup."""
+        lift = self.get_lift(customer.selected_lift)
+        if lift:
+            lift.add_customer_request(customer)
+        if customer is self.active_popup_customer:
+            # Clear active popup since customer is now waiting
+            self.set_active_popup(None)
+
+    def handle_mouse_motion(self, mouse_pos: Tuple[int, int]):
+        """Handle mouse motion within the level; the hovered popup only changes when the mouse moves."""
+        if self.is_complete:
+            return
+        start = self.profiler.now() if self.profiler else 0.0
+        self._update_active_popup(mouse_pos)
+        if self.profiler:
+            self.profiler.record("events.popup_hover", start)
 
     def handle_click(self, mouse_pos: Tuple[int, int]) -> bool:
         """Handle mouse clicks within the level."""
         if self.is_complete:
             return False
-            
+        start = self.profiler.now() if self.profiler else 0.0
+        handled = self._handle_click(mouse_pos)
+        if self.profiler:
+            self.profiler.record("events.click", start)
+        return handled
+
+    def _handle_click(self, mouse_pos: Tuple[int, int]) -> bool:
+        # A customer may have wandered under the mouse since it last moved
+        if not self.active_popup_customer:
+            self._update_active_popup(mouse_pos)
+
         # Only handle click for the active popup customer if one exists
         if self.active_popup_customer:
             if self.active_popup_customer.handle_click(mouse_pos, self.level_time):
                 # If click was handled (lift selected), add request
                 if self.active_popup_customer.selected_lift:
-                    for lift in self.lifts:
-                        if lift.name == self.active_popup_customer.selected_lift:
-                            lift.add_customer_request(self.active_popup_customer)
-                            break
-                    # Clear active popup since customer is now waiting
-                    self.active_popup_customer.is_active = False
-                    self.active_popup_customer = None
+                    self._request_lift(self.active_popup_customer)
                 return True
         return False
 
     def update(self):
-        """Update level state."""
+        """Update level state, advancing the simulation by the wall-clock time since the last frame."""
         if self.is_complete:
             return
             
+        start = self.profiler.now() if self.profiler else 0.0
         dt = self.clock.tick(self.fps) / 1000.0
+        if self.profiler:
+            self.profiler.record("update.frame_wait", start)
+        if self.input_recorder:
+            self.input_recorder.record_frame(dt)
+        self.step(dt)
+
+    def step(self, dt: float):
+        """
+        Advances the simulation by a single frame of the given length.
+        Unlike update(), this neither waits for the clock nor looks at the mouse, so it can be driven headless.
+
+        Args:
+            dt (float): The simulated length of the frame, in seconds.
+        """
+        if self.is_complete:
+            return
+
+        # Every phase starts where the previous one was recorded
+        profiler = self.profiler
+        start = profiler.now() if profiler else 0.0
+
         self.level_time += dt
+        self._spawn_due_customers()
+        if profiler:
+            start = profiler.record("update.spawns", start)
 
         # Get lift positions for customer pathfinding
-        lift_positions = {lift.name: lift.x + lift.width // 2 for lift in self.lifts}
+        lift_positions = self._get_lift_positions()
 
         # Update floors and customers
         for floor in self.floors:
             floor.update(dt, self.level_time, lift_positions)
+        if self.customer_engine:
+            self.customer_engine.update(lift_positions)
+        if profiler:
+            start = profiler.record("update.floors", start)
 
         # Update lifts
         for lift in self.lifts:
             lift.update(dt, self.level_time)
+        if profiler:
+            start = profiler.record("update.lifts", start)
 
-        # Clean up delivered customers periodically and calculate penalties
-        for floor in self.floors:
-            self._process_delivered_customers(floor)
+        # Clean up delivered customers and calculate penalties
+        self._process_delivered_customers()
+        if profiler:
+            start = profiler.record("update.delivered", start)
 
-        # Update active popup based on mouse position
-        self._update_active_popup()
-        
         # Check for level completion
         self._check_completion()
+        if profiler:
+            profiler.record("update.completion", start)
+
+    def _get_lift_positions(self) -> Dict[str, int]:
+        """The x coordinate of every lift's center, by lift name, which is where customers walk to."""
+        return self._lift_positions
+
+    def frames_until_next_event(self, dt: float, time_limit: float = float('inf')) -> Optional[int]:
+        """
+        Counts the upcoming step() calls in which nothing happens but lifts and customers moving and door timers
+        running: no spawn, and no customer or lift changing state. skip_frames() can advance through those in one go,
+        with the same outcome as stepping through them.
+
+        Args:
+            dt (float): The length of a frame, in seconds.
+            time_limit (float): Frames that would start at or after this level time are not counted.
+
+        Returns:
+            Optional[int]: The number of such frames, 0 if the next frame has an event, or None if, without a time
+            limit, nothing will ever happen again.
+        """
+        if self.is_complete:
+            return None
+
+        # The first source with an event in the next frame settles it, so the cheap lifts are asked first
+        horizon = None
+        for lift in self.lifts:
+            frames = lift.frames_until_next_event(dt)
+            if frames == 0:
+                return 0
+            if frames is not None and (horizon is None or frames < horizon):
+                horizon = frames
+        lift_positions = self._get_lift_positions()
+        if self.customer_engine:
+            sources = [self.customer_engine.frames_until_next_event(lift_positions)]
+        else:
+            sources = (floor.frames_until_next_event(lift_positions) for floor in self.floors)
+        for frames in sources:
+            if frames == 0:
+                return 0
+            if frames is not None and (horizon is None or frames < horizon):
+                horizon = frames
+
+        next_spawn_time = self.customer_factory.next_spawn_time()
+        if next_spawn_time is None and time_limit == float('inf'):
+            return horizon
+
+        # The level time is a running float sum, so count the additions instead of dividing
+        frames = 0
+        level_time = self.level_time
+        while (horizon is None or frames < horizon) and level_time < time_limit:
+            level_time += dt
+            if next_spawn_time is not None and level_time >= next_spawn_time:
+                break
+            frames += 1
+        return frames
+
+    def skip_frames(self, frames: int, dt: float):
+        """
+        Advances the simulation by the given number of frames at once. Only valid for frames in which nothing happens,
+        see frames_until_next_event(); over those it ends in exactly the state step() would have reached.
+
+        Args:
+            frames (int): The number of frames to skip.
+            dt (float): The length of a frame, in seconds.
+        """
+        if self.is_complete or frames <= 0:
+            return
+
+        for _ in range(frames):
+            self.level_time += dt
+
+        lift_positions = self._get_lift_positions()
+        if self.customer_engine:
+            self.customer_engine.skip_frames(frames, lift_positions)
+        else:
+            for floor in self.floors:
+                floor.skip_frames(frames, lift_positions)
+        for lift in self.lifts:
+            lift.skip_frames(frames, dt)
+
+    def _spawn_due_customers(self):
+        """Spawns the customers whose spawn time has been reached, in floor and spawn location order."""
+        due_spawns = self.customer_factory.pop_due_spawns(self.level_time)
+        if not due_spawns:
+            return
+        if len(due_spawns) > 1:
+            due_spawns.sort(key=self._spawn_order)
+
+        for spawn_data in due_spawns:
+            entry = self._spawn_locations_by_id.get(spawn_data.spawn_id)
+            if entry is None:
+                if spawn_data.spawn_id not in self._unknown_spawn_ids:
+                    self._unknown_spawn_ids.add(spawn_data.spawn_id)
+                    print(f"Skipping customer spawns for unknown spawn location '{spawn_data.spawn_id}'")
+                continue
+            _, floor, spawn_loc = entry
+            floor.add_spawned_customer(spawn_loc.spawn(spawn_data, self.level_time))
+
+    def _spawn_order(self, spawn_data: RawCustomerData) -> int:
+        entry = self._spawn_locations_by_id.get(spawn_data.spawn_id)
+        return entry[0] if entry else -1
 
     def _check_completion(self):
         """Checks if the level is complete and executes the post-level action."""
@@ -131,79 +434,222 @@ class Level:
         if self.customer_factory.remaining_customers_to_spawn() > 0:
             return
 
-        # 2. Check if all customers on screen have been delivered
-        for floor in self.floors:
-            if any(c.state != "delivered" for c in floor.get_all_customers()):
-                return
-                
-        # 3. Check if any lifts still have customers inside
-        for lift in self.lifts:
-            if lift.customers_inside:
-                return
+        # 2. Check if all spawned customers, whether on a floor or in a lift, have been delivered
+        if self.active_customer_count > 0:
+            return
         
         # If we reach here, the level is complete
         self.is_complete = True
+        self.close()
         if self.post_level_action:
-            self.post_level_action.execute(self)
-
-    def _process_delivered_customers(self, floor: Floor):
-        """Process delivered customers to calculate penalty and remove them."""
-        # Check spawn locations
-        for spawn_loc in floor.spawn_locations:
-            for customer in spawn_loc.spawned_customers:
-                if customer.state == "delivered" and customer.delivery_time is not None:
-                    penalty = customer.calculate_penalty(self.level_time)
-                    self.status_bar.add_penalty(penalty)
-            spawn_loc.remove_delivered_customers()
-            
-        # Check arrived customers
-        for customer in floor.arrived_customers:
-            if customer.state == "delivered" and customer.delivery_time is not None:
+            # The post-level menus block until the player picks an option, which isn't part of the frame's work
+            with self.profiler.paused() if self.profiler else nullcontext():
+                self.post_level_action.execute(self)
+
+    def close(self):
+        """Releases what the level holds open, i.e. a streamed spawns file. Call when abandoning the level before it is complete."""
+        self.raw_data.close()
+
+    def _process_delivered_customers(self):
+        """Process the customers delivered since the last frame to calculate penalty and remove them."""
+        if self.customer_engine and len(self._delivered_customers) > 1:
+            # The engine delivers in slot order; penalties are summed in the order Floor.update() delivers in,
+            # floor by floor, so both paths add up the same floats
+            self._delivered_customers.sort(key=self._delivery_order)
+        for customer in self._delivered_customers:
+            if customer.delivery_time is not None:
                 penalty = customer.calculate_penalty(self.level_time)
                 self.status_bar.add_penalty(penalty)
-        
-        floor.arrived_customers = [c for c in floor.arrived_customers if c.state != "delivered"]
+            self.floors[customer.current_floor].remove_customer(customer)
+            self._release_customer(customer)
+        self._delivered_customers.clear()
 
-    def _update_active_popup(self):
-        """Update which popup is active based on mouse position."""
-        mouse_pos = pg.mouse.get_pos()
+    def _delivery_order(self, customer: Customer) -> Tuple[int, int]:
+        return customer.current_floor, self.floors[customer.current_floor].customers.position_of(customer)
 
+    def _release_customer(self, customer: Customer):
+        """Frees the engine slot of a customer that has left the level."""
+        if self.customer_engine:
+            self.customer_engine.detach(customer)
+
+    def _update_active_popup(self, mouse_pos: Tuple[int, int]):
+        """Update which popup is active based on mouse position."""
         # Check if mouse is still over the current active popup
+        if self.active_popup_customer and self.active_popup_customer.is_mouse_over_popup(mouse_pos):
+            return  # Keep current active popup
+
+        # Check if mouse entered any popup, on the floors whose popups reach the mouse's height
+        for floor in self._floors_with_popups_at(mouse_pos[1]):
+            customer = floor.find_popup_at(mouse_pos)
+            if customer:
+                self.set_active_popup(customer)
+                return
+        self.set_active_popup(None)
+
+    def _floors_with_popups_at(self, y: int) -> List[Floor]:
+        """The floors whose lift selection popups can cover the given screen height; a few, however many floors there are."""
+        # Popups of higher floors are higher up, so the floors reaching y are those from the first one whose popups
+        # reach up to it to the last one whose popups reach down to it
+        first = bisect_left(self._popup_tops, -y)
+        last = bisect_right(self._popup_bottoms, -y)
+        return self.floors[first:last]
+
+    def set_active_popup(self, customer: Optional[Customer]):
+        """
+        Makes a customer's lift selection popup the active one, as hovering it with the mouse does; the customer
+        stops wandering while it is active.
+
+        Args:
+            customer (Optional[Customer]): The customer whose popup to activate, or None to deactivate all popups.
+        """
+        if customer is self.active_popup_customer:
+            return
         if self.active_popup_customer:
-            if self.active_popup_customer.is_mouse_over_popup(mouse_pos):
-                return  # Keep current active popup
-            else:
-                # Mouse left the popup
-                self.active_popup_customer.is_active = False
-                self.active_popup_customer = None
-        else:
-            # Check if mouse entered any popup
-            for floor in self.floors:
-                for customer in floor.get_all_customers():
-                    if customer.is_mouse_over_popup(mouse_pos):
-                        self.active_popup_customer = customer
-                        self.active_popup_customer.is_active = True
-                        return
+            self.active_popup_customer.is_active = False
+        self.active_popup_customer = customer
+        if customer:
+            customer.is_active = True
+        self.event_bus.publish(GameEvents.POPUP_HOVER_CHANGED, customer)
+
+    def invalidate_background(self):
+        """Discards the static background, so the next draw() rebuilds it. Call after changing floor or lift geometry."""
+        self._background = None
+
+    def _build_background(self, size: Tuple[int, int]):
+        """Draws the static parts of the floors and lifts onto a new background surface in the display's pixel format."""
+        background = pg.Surface(size)
+        if pg.display.get_surface() is not None:
+            background = background.convert()
+        background.fill(self.BACKGROUND_COLOR)
+        for lift in self.lifts:
+            lift.draw_static(background)
+        for floor in self.floors:
+            floor.draw_static(background)
+        self._background = background
 
     def draw(self, screen: pg.Surface):
-        """Draw the level."""
+        """Draw the level, covering the whole screen."""
+        start = self.profiler.now() if self.profiler else 0.0
+        if self._background is None or self._background.get_size() != screen.get_size():
+            self._build_background(screen.get_size())
+        screen.blit(self._background, (0, 0))
+        if self.profiler:
+            self.profiler.record("draw.background", start)
+        self._draw_moving_parts(screen)
+        self._previous_dirty_rects = None
+
+    def draw_dirty(self, screen: pg.Surface, extra_rects: Sequence[pg.Rect] = ()) -> List[pg.Rect]:
+        """
+        Draws only the parts of the level that may have changed since the last call, on a screen that still shows the
+        previous frame: the areas the lifts, customers and popups covered then and cover now are restored from the
+        background and the moving parts redrawn. Falls back to a full draw() when there is no previous frame.
+
+        Args:
+            screen (pg.Surface): The display surface.
+            extra_rects (Sequence[pg.Rect]): Areas the caller is about to draw over, to be cleared as well.
+
+        Returns:
+            List[pg.Rect]: The screen areas to pass to pg.display.update().
+        """
+        start = self.profiler.now() if self.profiler else 0.0
+        rects = [lift.get_dirty_rect() for lift in self.lifts]
+        for floor in self.floors:
+            rects.extend(customer.get_dirty_rect() for customer in floor.customers.not_in_state("in_lift"))
+        rects.extend(extra_rects)
+
+        previous_rects = self._previous_dirty_rects
+        screen_rect = screen.get_rect()
+        dirty_rects = []
+        if previous_rects is not None and self._background is not None and self._background.get_size() == screen.get_size():
+            dirty_rects = self._merge_rects([rect.clip(screen_rect) for rect in previous_rects + rects])
+        if (previous_rects is None or len(dirty_rects) > self.MAX_DIRTY_RECTS
+                or sum(rect.w * rect.h for rect in dirty_rects) > self.FULL_REDRAW_AREA_SHARE * screen_rect.w * screen_rect.h):
+            self.draw(screen)
+            self._previous_dirty_rects = rects
+            self._drawn_penalty = self.status_bar.total_penalty
+            return [screen_rect]
+        self._previous_dirty_rects = rects
+
+        for rect in dirty_rects:
+            screen.blit(self._background, rect, rect)
+        if self.profiler:
+            self.profiler.record("draw.background", start)
+
+        # The status bar is opaque and only changes with the penalty
+        status_bar_changed = self.status_bar.total_penalty != self._drawn_penalty
+        if status_bar_changed:
+            self._drawn_penalty = self.status_bar.total_penalty
+            dirty_rects.append(self.status_bar.get_rect())
+        self._draw_moving_parts(screen, draw_status_bar=status_bar_changed)
+        return dirty_rects
+
+    @staticmethod
+    def _merge_rects(rects: List[pg.Rect]) -> List[pg.Rect]:
+        """
+        Replaces every group of overlapping rects by their bounding rect, until none overlap, so no screen area is
+        restored and presented twice. Empty rects are dropped.
+        """
+        pending = [rect for rect in rects if rect]
+        merged: List[pg.Rect] = []
+        while pending:
+            rect = pending.pop()
+            # Growing the rect can make it reach rects it missed before, including already merged ones
+            while True:
+                pending_hits = rect.collidelistall(pending)
+                merged_hits = rect.collidelistall(merged)
+                if not pending_hits and not merged_hits:
+                    break
+                rect = rect.unionall([pending[i] for i in pending_hits] + [merged[i] for i in merged_hits])
+                for i in reversed(pending_hits):
+                    del pending[i]
+                for i in reversed(merged_hits):
+                    del merged[i]
+            merged.append(rect)
+        return merged
+
+    def _floors_between(self, top: int, bottom: int) -> List[Floor]:
+        """The floors whose area overlaps the screen rows from top to bottom, without looking at the others."""
+        highest = self.num_floors - 1 - (top - self.top_padding) // self.floor_height
+        lowest = self.num_floors - 1 - (bottom - 1 - self.top_padding) // self.floor_height
+        return self.floors[max(0, lowest):max(0, min(self.num_floors, highest + 1))]
+
+    def _draw_moving_parts(self, screen: pg.Surface, draw_status_bar: bool = True):
+        """Draws everything that is not part of the static background."""
+        profiler = self.profiler
+        start = profiler.now() if profiler else 0.0
+
         # Draw lifts first (so customers appear in front)
         for lift in self.lifts:
             lift.draw(screen)
+            # Platforms are in front of lifts passing between floors, so copy them back from the background
+            lift_rect = pg.Rect(lift.x, lift.y, lift.width, lift.height)
+            for floor in self._floors_between(lift_rect.top, lift_rect.bottom):
+                overlap = lift_rect.clip(floor.get_platform_rect())
+                if overlap:
+                    screen.blit(self._background, overlap, overlap)
+        if profiler:
+            start = profiler.record("draw.lifts", start)
 
         # Draw floors (without popups)
         for floor in self.floors:
             floor.draw(screen, draw_popups=False)
+        if profiler:
+            start = profiler.record("draw.customers", start)
 
         # Draw non-active popups first
         for floor in self.floors:
-            for customer in floor.get_all_customers():
-                if customer != self.active_popup_customer and customer.state != "in_lift":
+            for customer in floor.customers.not_in_state("in_lift"):
+                if customer != self.active_popup_customer:
                     customer.draw(screen, draw_popup=True)
 
         # Draw active popup last (on top of everything)
         if self.active_popup_customer:
             self.active_popup_customer.draw(screen, draw_popup=True)
+        if profiler:
+            start = profiler.record("draw.popups", start)
         
         # Draw status bar
-        self.status_bar.draw(screen)
+        if draw_status_bar:
+            self.status_bar.draw(screen)
+            if profiler:
+                profiler.record("draw.status_bar", start)
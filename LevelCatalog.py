@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+from LevelsLoader import LevelsLoader
+from LevelCatalogEntry import LevelCatalogEntry
+from CompiledLevelCache import CompiledLevelCache
+
+
+class LevelCatalog:
+    MANIFEST_VERSION = 2
+    # The permissions of a manifest written for the first time
+    NEW_MANIFEST_MODE = 0o644
+
+    def __init__(self, levels_loader: LevelsLoader, manifest_path: Optional[str] = None):
+        """
+        An index of the playable levels under the loader's root directory, level_1 up to the first missing one, with the
+        spawn count, floor and lift counts and duration of each.
+        The levels are checked once on construction and again on refresh(); lookups in between touch no files.
+        A level's files are only parsed again when their modification time or size changed since they were indexed,
+        and with a manifest path the index is kept on disk, so that holds across runs as well.
+
+        Args:
+            levels_loader (LevelsLoader): The loader for the levels to index.
+            manifest_path (Optional[str]): A JSON file to keep the index in between runs; no manifest if None.
+        """
+        self.levels_loader = levels_loader
+        self.manifest_path = manifest_path
+        self._entries: Dict[int, LevelCatalogEntry] = {}
+        self._available_levels: List[int] = []
+
+        if self.manifest_path:
+            self._entries = self._read_manifest()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Re-scans the levels directory, re-reading only the levels whose files changed.
+
+        Returns:
+            bool: True if the index changed.
+        """
+        # Levels are numbered consecutively starting at 1; anything after a gap can't be reached, so isn't indexed
+        entries: Dict[int, LevelCatalogEntry] = {}
+        level_num = 1
+        while True:
+            entry = self._index_level(level_num)
+            if entry is None:
+                break
+            entries[level_num] = entry
+            level_num += 1
+
+        changed = entries.keys() != self._entries.keys() or any(entries[num] is not self._entries[num] for num in entries)
+        self._entries = entries
+        self._available_levels = sorted(entries)
+
+        if changed and self.manifest_path:
+            self._write_manifest()
+        return changed
+
+    def _index_level(self, level_num: int) -> Optional[LevelCatalogEntry]:
+        """Returns the entry of a level, reusing the indexed one if its files didn't change, or None if it is incomplete."""
+        customer_spawns_path, spawn_locations_path = self.levels_loader.level_file_paths(level_num)
+        customer_spawns_stamp = self._file_stamp(customer_spawns_path)
+        spawn_locations_stamp = self._file_stamp(spawn_locations_path)
+        if customer_spawns_stamp is None or spawn_locations_stamp is None:
+            return None
+        # The level config is optional
+        level_config_stamp = self._file_stamp(self.levels_loader.level_config_path(level_num)) or ""
+
+        entry = self._entries.get(level_num)
+        if (entry and entry.customer_spawns_stamp == customer_spawns_stamp and entry.spawn_locations_stamp == spawn_locations_stamp
+                and entry.level_config_stamp == level_config_stamp):
+            return entry
+
+        try:
+            # The compiled cache has the counts in packed columns; otherwise the CSV is streamed, so summarizing even
+            # a very long schedule doesn't hold it in memory
+            summary = CompiledLevelCache.read_summary(customer_spawns_path, spawn_locations_path) if self.levels_loader.use_compiled_cache else None
+            if summary:
+                spawn_count, duration, spawn_location_count = summary
+                num_floors, lifts = self.levels_loader.load_level_config(level_num)
+            else:
+                spawn_count, duration = 0, 0.0
+                raw_data = self.levels_loader.load(level_num, streaming=True)
+                for spawn in raw_data.customer_spawns:
+                    spawn_count += 1
+                    duration = max(duration, spawn.timestamp)
+                spawn_location_count = sum(len(locations) for locations in raw_data.spawn_locations.values())
+                num_floors, lifts = raw_data.num_floors, raw_data.lifts
+        except Exception as e:
+            print(f"Could not index level {level_num}: {e}")
+            return None
+        return LevelCatalogEntry(
+            level_num=level_num,
+            spawn_count=spawn_count,
+            spawn_location_count=spawn_location_count,
+            num_floors=num_floors,
+            duration=duration,
+            customer_spawns_stamp=customer_spawns_stamp,
+            spawn_locations_stamp=spawn_locations_stamp,
+            lift_count=len(lifts),
+            level_config_stamp=level_config_stamp
+        )
+
+    @staticmethod
+    def _file_stamp(path: str) -> Optional[str]:
+        """Returns the modification time and size of a file as one comparable string, or None if it doesn't exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _read_manifest(self) -> Dict[int, LevelCatalogEntry]:
+        """Reads the entries kept by a previous run, or none if there is no usable manifest."""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != self.MANIFEST_VERSION:
+                return {}
+            entries = [LevelCatalogEntry.from_dict(data) for data in manifest['levels']]
+        except Exception as e:
+            print(f"Ignoring unreadable level catalog manifest '{self.manifest_path}': {e}")
+            return {}
+        return {entry.level_num: entry for entry in entries}
+
+    def _write_manifest(self):
+        manifest = {
+            'version': self.MANIFEST_VERSION,
+            'levels': [self._entries[num].to_dict() for num in sorted(self._entries)]
+        }
+        temp_path = None
+        try:
+            manifest_dir = os.path.dirname(self.manifest_path)
+            if manifest_dir:
+                os.makedirs(manifest_dir, exist_ok=True)
+            # Write to a file of its own next to the manifest and swap it in, so neither a crash nor another process
+            # refreshing at the same time leaves half a manifest behind
+            fd, temp_path = tempfile.mkstemp(dir=manifest_dir or None, prefix=os.path.basename(self.manifest_path) + ".", suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            # mkstemp makes the file private; keep the manifest's permissions
+            mode = os.stat(self.manifest_path).st_mode & 0o777 if os.path.exists(self.manifest_path) else self.NEW_MANIFEST_MODE
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Could not write level catalog manifest '{self.manifest_path}': {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def level_exists(self, level_num: int) -> bool:
+        """Whether the level's directory and files exist."""
+        return level_num in self._entries
+
+    def available_levels(self) -> List[int]:
+        """The numbers of all playable levels, in order."""
+        return list(self._available_levels)
+
+    def get(self, level_num: int) -> Optional[LevelCatalogEntry]:
+        """The summary of a level, or None if it isn't indexed."""
+        return self._entries.get(level_num)
@@ -0,0 +1,45 @@
+from typing import Any, Dict
+
+
+class LevelCatalogEntry:
+    def __init__(self, level_num: int, spawn_count: int, spawn_location_count: int, num_floors: int, duration: float, customer_spawns_stamp: str, spawn_locations_stamp: str, lift_count: int = 2, level_config_stamp: str = ""):
+        """
+        A summary of one level in the LevelCatalog, along with the stamps of the files it was read from.
+
+        Args:
+            level_num (int): The number of the level.
+            spawn_count (int): The number of customers the level spawns.
+            spawn_location_count (int): The number of spawn locations over all floors.
+            num_floors (int): The number of floors.
+            duration (float): The time of the last customer spawn, in seconds.
+            customer_spawns_stamp (str): The modification time and size of the customer spawns file, see LevelCatalog.
+            spawn_locations_stamp (str): The modification time and size of the spawn locations file, see LevelCatalog.
+            lift_count (int): The number of lifts.
+            level_config_stamp (str): The modification time and size of the level config file, or "" if there is none.
+        """
+        self.level_num = level_num
+        self.spawn_count = spawn_count
+        self.spawn_location_count = spawn_location_count
+        self.num_floors = num_floors
+        self.duration = duration
+        self.customer_spawns_stamp = customer_spawns_stamp
+        self.spawn_locations_stamp = spawn_locations_stamp
+        self.lift_count = lift_count
+        self.level_config_stamp = level_config_stamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'LevelCatalogEntry':
+        return LevelCatalogEntry(
+            level_num=int(data['level_num']),
+            spawn_count=int(data['spawn_count']),
+            spawn_location_count=int(data['spawn_location_count']),
+            num_floors=int(data['num_floors']),
+            duration=float(data['duration']),
+            customer_spawns_stamp=str(data['customer_spawns_stamp']),
+            spawn_locations_stamp=str(data['spawn_locations_stamp']),
+            lift_count=int(data['lift_count']),
+            level_config_stamp=str(data['level_config_stamp'])
+        )
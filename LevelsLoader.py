@@ -1,20 +1,54 @@
 import csv
+import json
 import os
-from typing import List, Dict
+from typing import Any, Iterator, List, Dict, Tuple
 from RawLevelData import RawLevelData
 from RawCustomerData import RawCustomerData
 from RawSpawnLocationData import RawSpawnLocationData
+from RawLiftData import RawLiftData
+from CompiledLevelCache import CompiledLevelCache
 
 
 class LevelsLoader:
-    def __init__(self, levels_root_path: str):
+    # Used for levels without a level config file
+    DEFAULT_NUM_FLOORS = 5
+
+    def __init__(self, levels_root_path: str, use_compiled_cache: bool = True):
         """
         Initializes the LevelsLoader.
 
         Args:
             levels_root_path (str): The root directory containing level folders.
+            use_compiled_cache (bool): Load levels from their compiled form (see CompiledLevelCache) when it is up to
+                date, and compile them after parsing the CSVs otherwise.
         """
         self.levels_root_path = levels_root_path
+        self.use_compiled_cache = use_compiled_cache
+
+    def level_file_paths(self, level_num: int) -> Tuple[str, str]:
+        """
+        Returns the paths of the files a level consists of, whether they exist or not.
+
+        Args:
+            level_num (int): The number of the level.
+
+        Returns:
+            Tuple[str, str]: The paths of the customer spawns and spawn locations files.
+        """
+        level_path = os.path.join(self.levels_root_path, f"level_{level_num}")
+        return os.path.join(level_path, "customer_spawns.csv"), os.path.join(level_path, "spawn_locations.csv")
+
+    def level_config_path(self, level_num: int) -> str:
+        """
+        Returns the path of a level's optional config file, which declares its floors and lifts, see load_level_config().
+
+        Args:
+            level_num (int): The number of the level.
+
+        Returns:
+            str: The path of the level config file, whether it exists or not.
+        """
+        return os.path.join(self.levels_root_path, f"level_{level_num}", "level_config.json")
 
     def level_exists(self, level_num: int) -> bool:
         """
@@ -26,21 +60,36 @@ class LevelsLoader:
         Returns:
             bool: True if the level exists and is valid, False otherwise.
         """
-        level_name = f"level_{level_num}"
-        level_path = os.path.join(self.levels_root_path, level_name)
-        customer_spawns_path = os.path.join(level_path, "customer_spawns.csv")
-        spawn_locations_path = os.path.join(level_path, "spawn_locations.csv")
+        level_path = os.path.join(self.levels_root_path, f"level_{level_num}")
+        customer_spawns_path, spawn_locations_path = self.level_file_paths(level_num)
 
         return (os.path.isdir(level_path) and
                 os.path.exists(customer_spawns_path) and
                 os.path.exists(spawn_locations_path))
 
-    def load(self, level_num: int) -> RawLevelData:
+    def available_levels(self) -> List[int]:
+        """
+        Finds all playable levels, which are numbered consecutively starting at 1.
+
+        Returns:
+            List[int]: The numbers of all levels that exist.
+        """
+        available_levels = []
+        level_num = 1
+        while self.level_exists(level_num):
+            available_levels.append(level_num)
+            level_num += 1
+        return available_levels
+
+    def load(self, level_num: int, streaming: bool = False) -> RawLevelData:
         """
-        Loads a level by name.
+        Loads a level by name. Raises ValueError if a spawn location is on, or a customer heads to, a floor the level
+        doesn't have; when streaming, a customer's target floor is checked as its row is read.
 
         Args:
             level_num (int): The number of the level.
+            streaming (bool): Read the customer spawns lazily, row by row, while the level is played instead of all
+                up front. The spawns file must then be sorted by timestamp. The compiled cache is not used.
 
         Returns:
             RawLevelData: The loaded raw level data.
@@ -49,21 +98,143 @@ class LevelsLoader:
         if not self.level_exists(level_num):
             raise FileNotFoundError(f"Level '{level_name}' not found or is incomplete.")
 
-        level_path = os.path.join(self.levels_root_path, level_name)
-        customer_spawns_path = os.path.join(level_path, "customer_spawns.csv")
-        spawn_locations_path = os.path.join(level_path, "spawn_locations.csv")
+        customer_spawns_path, spawn_locations_path = self.level_file_paths(level_num)
+        num_floors, lifts = self.load_level_config(level_num)
+
+        if streaming:
+            spawn_locations = self._load_spawn_locations(spawn_locations_path)
+            self._validate_spawn_locations(spawn_locations, num_floors)
+            return RawLevelData(
+                level_num=level_num,
+                customer_spawns=self.stream_customer_spawns(customer_spawns_path, num_floors),
+                spawn_locations=spawn_locations,
+                num_floors=num_floors,
+                streaming_spawns=True,
+                lifts=lifts
+            )
+
+        compiled = CompiledLevelCache.read(customer_spawns_path, spawn_locations_path) if self.use_compiled_cache else None
+        if compiled:
+            customer_spawns, spawn_locations = compiled
+            # The floor count comes from the level config, which the compiled form doesn't cover
+            self._validate_spawn_locations(spawn_locations, num_floors)
+            self._validate_target_floors(customer_spawns, num_floors)
+        else:
+            # Signed before parsing, so CSVs edited in between are recompiled next time rather than cached as current
+            source_signature = CompiledLevelCache.source_signature(customer_spawns_path, spawn_locations_path) if self.use_compiled_cache else None
+            spawn_locations = self._load_spawn_locations(spawn_locations_path)
+            customer_spawns = self._load_customer_spawns(customer_spawns_path)
+            self._validate_spawn_locations(spawn_locations, num_floors)
+            self._validate_target_floors(customer_spawns, num_floors)
+            if source_signature:
+                CompiledLevelCache.write(customer_spawns_path, spawn_locations_path, customer_spawns, spawn_locations, source_signature)
 
-        spawn_locations = self._load_spawn_locations(spawn_locations_path)
-        customer_spawns = self._load_customer_spawns(customer_spawns_path)
-        
-        # Currently hardcoding num_floors to 5, but this could also be loaded from a config file
         return RawLevelData(
             level_num=level_num,
             customer_spawns=customer_spawns,
             spawn_locations=spawn_locations,
-            num_floors=5
+            num_floors=num_floors,
+            lifts=lifts
         )
 
+    def load_level_config(self, level_num: int) -> Tuple[int, List[RawLiftData]]:
+        """
+        Loads the floors and lifts a level declares in its level_config.json, for example:
+
+            {"floors": 12,
+             "lifts": [{"name": "A"},
+                       {"name": "B", "speed": 5.0, "door_wait_time": 1.5},
+                       {"name": "X", "served_floors": [0, "8-11"]}]}
+
+        Lifts are listed from left to right. Speed (pixels per frame, a multiple of 0.5) and door wait time (seconds)
+        default to 2.5 and 2.0, and a lift serves all floors unless it lists them, as floor numbers or "low-high"
+        ranges. Any two floors must be connected by at least one lift. A level without the file has
+        DEFAULT_NUM_FLOORS floors and lifts "A" and "B".
+
+        Args:
+            level_num (int): The number of the level.
+
+        Returns:
+            Tuple[int, List[RawLiftData]]: The number of floors and the lifts.
+        """
+        config_path = self.level_config_path(level_num)
+        if not os.path.exists(config_path):
+            return self.DEFAULT_NUM_FLOORS, [RawLiftData("A"), RawLiftData("B")]
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            num_floors = int(config.get('floors', self.DEFAULT_NUM_FLOORS))
+            if num_floors < 2:
+                raise ValueError("a level needs at least two floors")
+            lifts = [self._parse_lift(lift_config, num_floors) for lift_config in config.get('lifts', [{"name": "A"}, {"name": "B"}])]
+            self._validate_lifts(lifts, num_floors)
+        except Exception as e:
+            print(f"Error parsing level config file: {e}")
+            raise e
+        return num_floors, lifts
+
+    @staticmethod
+    def _parse_lift(lift_config: Dict[str, Any], num_floors: int) -> RawLiftData:
+        """Parses and checks one entry of a level config's lift list."""
+        name = str(lift_config['name'])
+        speed = float(lift_config.get('speed', 2.5))
+        door_wait_time = float(lift_config.get('door_wait_time', 2.0))
+        # Floor positions are whole pixels, and frame skipping relies on moves of whole half pixels
+        if speed <= 0 or (speed * 2) % 1 != 0:
+            raise ValueError(f"lift '{name}' has speed {speed}, which is not a positive multiple of 0.5")
+        if door_wait_time < 0:
+            raise ValueError(f"lift '{name}' has a negative door wait time")
+
+        served_floors = None
+        if 'served_floors' in lift_config:
+            floors = set()
+            for entry in lift_config['served_floors']:
+                if isinstance(entry, str) and '-' in entry:
+                    low, high = (int(part) for part in entry.split('-', 1))
+                    floors.update(range(low, high + 1))
+                else:
+                    floors.add(int(entry))
+            if any(floor < 0 or floor >= num_floors for floor in floors):
+                raise ValueError(f"lift '{name}' serves floors outside 0-{num_floors - 1}")
+            if len(floors) < 2:
+                raise ValueError(f"lift '{name}' must serve at least two floors")
+            served_floors = sorted(floors)
+        return RawLiftData(name, speed, door_wait_time, served_floors)
+
+    @staticmethod
+    def _validate_lifts(lifts: List[RawLiftData], num_floors: int):
+        """Checks that lift names are unique and that a customer on any floor has a lift to every other floor."""
+        if not lifts:
+            raise ValueError("a level needs at least one lift")
+        names = [lift.name for lift in lifts]
+        if len(set(names)) != len(names) or not all(names):
+            raise ValueError("lift names must be unique and not empty")
+
+        all_floors = (1 << num_floors) - 1
+        masks = [sum(1 << floor for floor in lift.served_floors) if lift.served_floors is not None else all_floors for lift in lifts]
+        for floor in range(num_floors):
+            reachable = 0
+            for mask in masks:
+                if mask >> floor & 1:
+                    reachable |= mask
+            if reachable != all_floors:
+                unreachable = [target for target in range(num_floors) if not reachable >> target & 1]
+                raise ValueError(f"no lift goes from floor {floor} to floor {unreachable[0]}")
+
+    @staticmethod
+    def _validate_spawn_locations(spawn_locations: Dict[int, List[RawSpawnLocationData]], num_floors: int):
+        """Checks that every spawn location is on one of the level's floors."""
+        for floor in spawn_locations:
+            if floor < 0 or floor >= num_floors:
+                raise ValueError(f"a spawn location is on floor {floor}, outside 0-{num_floors - 1}")
+
+    @staticmethod
+    def _validate_target_floors(customer_spawns: List[RawCustomerData], num_floors: int):
+        """Checks that every customer heads to one of the level's floors."""
+        for spawn in customer_spawns:
+            if spawn.target_floor < 0 or spawn.target_floor >= num_floors:
+                raise ValueError(f"a customer spawning at {spawn.timestamp}s heads to floor {spawn.target_floor}, outside 0-{num_floors - 1}")
+
     def _load_spawn_locations(self, file_path: str) -> Dict[int, List[RawSpawnLocationData]]:
         """Loads spawn location data from a CSV file."""
         locations: Dict[int, List[RawSpawnLocationData]] = {}
@@ -81,6 +252,23 @@ class LevelsLoader:
             raise e
         return locations
 
+    def stream_customer_spawns(self, file_path: str, num_floors: int) -> Iterator[RawCustomerData]:
+        """
+        Yields the customer spawns of a CSV file one row at a time, keeping only the current row in memory. Raises
+        ValueError on the first row whose target floor is outside 0..num_floors-1.
+        """
+        try:
+            with open(file_path, 'r') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    target_floor = int(row['TargetFloor'])
+                    if target_floor < 0 or target_floor >= num_floors:
+                        raise ValueError(f"a customer spawning at {row['Timestamp']}s heads to floor {target_floor}, outside 0-{num_floors - 1}")
+                    yield RawCustomerData(float(row['Timestamp']), row['SpawnLocation'], row['Priority'], target_floor)
+        except Exception as e:
+            print(f"Error parsing customer spawns file: {e}")
+            raise e
+
     def _load_customer_spawns(self, file_path: str) -> List[RawCustomerData]:
         """Loads customer spawn data from a CSV file."""
         spawns: List[RawCustomerData] = []
@@ -1,56 +1,139 @@
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Tuple
 import pygame as pg
 from Customer import Customer
 from Floor import Floor
+from EventBus import EventBus
+from GameEvents import GameEvents
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
+
+
+# A snapshot of everything the stop planner looks at: floor, direction, delivery floors, target floors of the customers
+# waiting on each floor, floors with customers waiting to go up, floors with customers waiting to go down, request queue.
+# Sets of floors are integer bitmasks with one bit per floor.
+PlanState = Tuple[int, str, int, Dict[int, int], int, int, List[int]]
+
+
+def _floors_above(floor: int) -> int:
+    """Bitmask of all floors strictly above the given one."""
+    return ~((1 << (floor + 1)) - 1)
+
+
+def _floors_below(floor: int) -> int:
+    """Bitmask of all floors strictly below the given one."""
+    return (1 << floor) - 1
+
+
+def _lowest_floor(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+def _highest_floor(mask: int) -> int:
+    return mask.bit_length() - 1
 
 
 class Lift:
-    def __init__(self, name: str, x: int, total_floors: int, floor_height: int, floors: Optional[List[Floor]] = None, top_padding: int = 0):
+    def __init__(self, name: str, x: int, total_floors: int, floor_height: int, floors: Optional[List[Floor]] = None, top_padding: int = 0, verify_plan: bool = False, event_bus: Optional[EventBus] = None,
+                 width: int = 60, height: int = 80, ground_height: int = 10, speed: float = 2.5, door_wait_time: float = 2.0, served_floors: Optional[List[int]] = None, color: Tuple[int, int, int] = (100, 200, 100)):
         self.name = name
         self.x = x
-        self.width = 60
-        self.height = 80
-        self.current_floor = 0
+        self.width = width
+        self.height = height
+        self.color = color
+        # The floors the lift stops at, ascending, also as a bitmask; customers are only assigned to lifts that serve
+        # both their floor and their target floor, so the stop planner never sees other floors
+        self.served_floors = served_floors if served_floors is not None else list(range(total_floors))
+        self.served_mask = sum(1 << floor for floor in self.served_floors)
+        self.current_floor = self.served_floors[0]
         self.customers_inside: List[Customer] = []
         self.waiting_customers: Dict[int, List[Customer]] = {}
+        # Per floor, how many of the waiting customers are still walking to the lift; see on_customer_arrived_at_lift()
+        self.walking_customer_counts: Dict[int, int] = {}
+        self.event_bus = event_bus
         self.request_queue: List[int] = []
+
+        # Bitmask views of the customers above, one bit per floor, kept in sync for the stop planner
+        self.delivery_mask = 0
+        self.pickup_mask = 0
+        self.up_pickup_mask = 0
+        self.down_pickup_mask = 0
+        self.waiting_target_masks: Dict[int, int] = {}
+
         self.state = "idle"  # "idle", "moving_up", "moving_down", "waiting"
         self.direction = "up"
-        self.speed = 2.5
+        self.speed = speed
         self.total_floors = total_floors
         self.floor_height = floor_height
         self.top_padding = top_padding
-        self.y = self._floor_to_y(0)
+        self.ground_height = ground_height
+        # How close the car has to be to a floor to count as there; less than half a floor on low floors
+        self.arrival_tolerance = min(5, floor_height / 2)
+        self.y = self._floor_to_y(self.current_floor)
         self.door_open = False
         self.door_timer = 0.0
-        self.door_wait_time = 2.0
+        self.door_wait_time = door_wait_time
         self.floors: List[Floor] = floors or []
-        self.stop_list_font = pg.font.Font(None, 18)
+        # Labels shrink with the car; the load and stop list are left out when it is too small for them
+        self.name_font = FontRegistry.get(None, max(8, min(36, self.width * 3 // 5, self.height // 2)))
+        self._name_size = self.name_font.size(self.name)
+        self.stop_list_font = FontRegistry.get(None, 18)
+        self.show_details = self.width >= 40 and self.height >= 60
         self.target_sequence: List[int] = []
 
+        # The stop plan is maintained incrementally; the floor and direction it was planned from tell whether it can be reused
+        self.verify_plan = verify_plan
+        self.plan_mismatches = 0
+        self._plan_origin: Optional[Tuple[int, str]] = None
+
     def _floor_to_y(self, floor: int) -> int:
-        ground_height = 10
-        return self.top_padding + (self.total_floors - 1 - floor) * self.floor_height + self.floor_height - ground_height - self.height
+        return self.top_padding + (self.total_floors - 1 - floor) * self.floor_height + self.floor_height - self.ground_height - self.height
 
     def _y_to_floor(self) -> int:
-        for floor in range(self.total_floors):
-            floor_y = self._floor_to_y(floor)
-            if abs(self.y - floor_y) < 5:
-                return floor
+        # Floors are evenly spaced, so only the nearest one needs checking
+        floor = round((self._floor_to_y(0) - self.y) / self.floor_height)
+        if 0 <= floor < self.total_floors and abs(self.y - self._floor_to_y(floor)) < self.arrival_tolerance:
+            return floor
         return self.current_floor
 
+    def serves(self, floor: int) -> bool:
+        """Whether the lift stops at the given floor."""
+        return bool(self.served_mask >> floor & 1)
+
     def add_customer_request(self, customer: Customer):
         if customer.current_floor not in self.waiting_customers:
             self.waiting_customers[customer.current_floor] = []
-        if customer.current_floor not in self.request_queue:
+        if not self.pickup_mask >> customer.current_floor & 1:
             self.request_queue.append(customer.current_floor)
+            self.pickup_mask |= 1 << customer.current_floor
 
         self.waiting_customers[customer.current_floor].append(customer)
+        if customer.state == "walking_to_lift":
+            self.walking_customer_counts[customer.current_floor] = self.walking_customer_counts.get(customer.current_floor, 0) + 1
+        self.waiting_target_masks[customer.current_floor] = self.waiting_target_masks.get(customer.current_floor, 0) | (1 << customer.target_floor)
+        self._update_pickup_intents(customer.current_floor)
+
+        self._apply_request_to_target_sequence(customer.current_floor)
+
+    def _update_pickup_intents(self, floor: int):
+        """Refreshes the up/down pickup bits of a floor from the target floors of the customers waiting there."""
+        targets = self.waiting_target_masks.get(floor, 0)
+        bit = 1 << floor
+        if targets & _floors_above(floor):
+            self.up_pickup_mask |= bit
+        else:
+            self.up_pickup_mask &= ~bit
+        if targets & _floors_below(floor):
+            self.down_pickup_mask |= bit
+        else:
+            self.down_pickup_mask &= ~bit
 
-        if self.state == "idle":
-            self._update_target_sequence()
+    def on_customer_arrived_at_lift(self, customer: Customer):
+        """Called when a customer waiting for this lift has finished walking to it."""
+        count = self.walking_customer_counts.get(customer.current_floor, 0) - 1
+        if count > 0:
+            self.walking_customer_counts[customer.current_floor] = count
         else:
-            self._update_target_sequence()
+            self.walking_customer_counts.pop(customer.current_floor, None)
 
     def update(self, dt: float, level_time: float):
         if self.state == "idle":
@@ -63,9 +146,43 @@ class Lift:
         elif self.state in ["moving_up", "moving_down"]:
             self._move_towards_target(level_time)
 
+    def frames_until_next_event(self, dt: float) -> Optional[int]:
+        """
+        The number of upcoming update() calls that only move the car or run the door timer, before the one in which
+        the lift arrives, closes its door or starts moving. None if the lift is idle with nothing to do.
+        """
+        if self.state == "idle":
+            return 0 if self.target_sequence else None
+        if self.state == "waiting":
+            # The timer is a running float sum, so count the additions instead of dividing
+            frames = 0
+            door_timer = self.door_timer + dt
+            while door_timer < self.door_wait_time:
+                door_timer += dt
+                frames += 1
+            return frames
+        next_floor = self._get_next_floor()
+        if next_floor is None:
+            return 0
+        return int(abs(self.y - self._floor_to_y(next_floor)) // self.speed)
+
+    def skip_frames(self, frames: int, dt: float):
+        """Does what the given number of update() calls would do, given that none of them is an event."""
+        if self.state == "waiting":
+            for _ in range(frames):
+                self.door_timer += dt
+        elif self.state in ["moving_up", "moving_down"] and frames > 0:
+            # Floor positions are whole pixels and the speed is a multiple of half a pixel, so this is exact
+            if self.y > self._floor_to_y(self._get_next_floor()): self.y -= frames * self.speed
+            else: self.y += frames * self.speed
+
     def _set_idle(self):
+        was_idle = self.state == "idle"
         self.state = "idle"
         self.target_sequence = []
+        self._plan_origin = (self.current_floor, self.direction)
+        if self.event_bus and not was_idle:
+            self.event_bus.publish(GameEvents.LIFT_IDLE, self)
 
     def _start_moving(self, level_time: float):
         if not self.target_sequence:
@@ -79,87 +196,160 @@ class Lift:
             
         target_y = self._floor_to_y(next_floor)
 
-        if abs(self.y - target_y) < 5:
+        if abs(self.y - target_y) < self.arrival_tolerance:
             self._arrive_at_floor(level_time)
         else:
+            # Turning towards the first planned stop doesn't change the plan, so it stays reusable
+            plan_was_reusable = self._is_plan_reusable()
             if self.y > target_y:
                 self.state = "moving_up"
                 self.direction = "up"
             else:
                 self.state = "moving_down"
                 self.direction = "down"
+            if plan_was_reusable:
+                self._plan_origin = (self.current_floor, self.direction)
 
     def _get_next_floor(self) -> Optional[int]:
         """The next floor is simply the first one in our sequence."""
         return self.target_sequence[0] if self.target_sequence else None
 
-    def _find_best_stop(self, current_floor: int, direction: str, delivery_floors: Set[int], waiting_customers: Dict[int, List[int]], request_queue: List[int]) -> Optional[int]:
-        """Pure function to find the single best next stop."""
-        if not delivery_floors:
+    def _find_best_stop(self, current_floor: int, direction: str, delivery_mask: int, up_pickup_mask: int, down_pickup_mask: int, request_queue: List[int]) -> Optional[int]:
+        """Pure function to find the single best next stop. Floor sets are bitmasks, one bit per floor."""
+        if not delivery_mask:
             return request_queue[0] if request_queue else None
 
-        if direction == "up":
-            deliveries_above = [f for f in delivery_floors if f > current_floor]
-            if deliveries_above:
-                limit = max(deliveries_above)
-                pickups_on_way = [f for f, targets in waiting_customers.items() if current_floor < f <= limit and any(t > f for t in targets)]
-                return min(deliveries_above + pickups_on_way)
-            else:
-                deliveries_below = [f for f in delivery_floors if f < current_floor]
-                if not deliveries_below: return None
-                limit = min(deliveries_below)
-                pickups_on_way = [f for f, targets in waiting_customers.items() if limit <= f < current_floor and any(t < f for t in targets)]
-                return max(deliveries_below + pickups_on_way)
-        else:  # "down"
-            deliveries_below = [f for f in delivery_floors if f < current_floor]
-            if deliveries_below:
-                limit = min(deliveries_below)
-                pickups_on_way = [f for f, targets in waiting_customers.items() if limit <= f < current_floor and any(t < f for t in targets)]
-                return max(deliveries_below + pickups_on_way)
+        deliveries_above = delivery_mask & _floors_above(current_floor)
+        deliveries_below = delivery_mask & _floors_below(current_floor)
+        if direction == "up" and deliveries_above or direction == "down" and not deliveries_below:
+            # Nearest delivery above, or pickup heading up on the way to the highest delivery
+            if not deliveries_above: return None
+            on_the_way = _floors_above(current_floor) & _floors_below(_highest_floor(deliveries_above) + 1)
+            return _lowest_floor(deliveries_above | (up_pickup_mask & on_the_way))
+        else:
+            # Nearest delivery below, or pickup heading down on the way to the lowest delivery
+            if not deliveries_below: return None
+            on_the_way = _floors_below(current_floor) & _floors_above(_lowest_floor(deliveries_below) - 1)
+            return _highest_floor(deliveries_below | (down_pickup_mask & on_the_way))
+
+    def _get_plan_state(self) -> PlanState:
+        """Copies the lift's current state into the form the stop planner simulates on."""
+        return (
+            self.current_floor,
+            self.direction,
+            self.delivery_mask,
+            dict(self.waiting_target_masks),
+            self.up_pickup_mask,
+            self.down_pickup_mask,
+            list(self.request_queue)
+        )
+
+    @staticmethod
+    def _apply_stop(state: PlanState, next_stop: int) -> PlanState:
+        """Simulates the lift stopping at next_stop: drop-offs, pickups and the request queue."""
+        sim_floor, sim_direction, sim_deliveries, sim_waiting, sim_up, sim_down, sim_requests = state
+
+        if next_stop > sim_floor: sim_direction = "up"
+        elif next_stop < sim_floor: sim_direction = "down"
+        sim_floor = next_stop
+
+        floor_bit = 1 << sim_floor
+        sim_deliveries &= ~floor_bit
+
+        if sim_floor in sim_waiting:
+            targets = sim_waiting.pop(sim_floor)
+            if not sim_deliveries:
+                pickup_targets = targets
+            elif sim_direction == "up":
+                pickup_targets = targets & _floors_above(sim_floor)
             else:
-                deliveries_above = [f for f in delivery_floors if f > current_floor]
-                if not deliveries_above: return None
-                limit = max(deliveries_above)
-                pickups_on_way = [f for f, targets in waiting_customers.items() if current_floor < f <= limit and any(t > f for t in targets)]
-                return min(deliveries_above + pickups_on_way)
+                pickup_targets = targets & _floors_below(sim_floor)
+            sim_deliveries |= pickup_targets
+            sim_up &= ~floor_bit
+            sim_down &= ~floor_bit
 
-    def _update_target_sequence(self):
-        """Calculates the entire optimal sequence of stops and stores it."""
-        # The set of all floors that need to be visited
-        all_target_floors = set(self.request_queue) | set(c.target_floor for c in self.customers_inside)
-        if not all_target_floors:
-            self.target_sequence = []
-            return
+        if sim_floor in sim_requests:
+            sim_requests.remove(sim_floor)
 
-        sim_floor = self.current_floor
-        sim_direction = self.direction
-        sim_deliveries = set(c.target_floor for c in self.customers_inside)
-        sim_waiting = {f: [c.target_floor for c in v] for f, v in self.waiting_customers.items()}
-        sim_requests = list(self.request_queue)
+        return sim_floor, sim_direction, sim_deliveries, sim_waiting, sim_up, sim_down, sim_requests
 
+    def _simulate_stops(self, state: PlanState) -> List[int]:
+        """Plans stops greedily from the given state until there is nothing left to do."""
         sequence = []
-        while sim_deliveries or sim_requests:
-            next_stop = self._find_best_stop(sim_floor, sim_direction, sim_deliveries, sim_waiting, sim_requests)
+        while state[2] or state[6]:
+            sim_floor, sim_direction, sim_deliveries, _, sim_up, sim_down, sim_requests = state
+            next_stop = self._find_best_stop(sim_floor, sim_direction, sim_deliveries, sim_up, sim_down, sim_requests)
 
             if next_stop is None: break
             sequence.append(next_stop)
+            state = self._apply_stop(state, next_stop)
+        return sequence
 
-            if next_stop > sim_floor: sim_direction = "up"
-            elif next_stop < sim_floor: sim_direction = "down"
-            sim_floor = next_stop
+    def _compute_target_sequence(self) -> List[int]:
+        """Calculates the entire optimal sequence of stops from scratch."""
+        return self._simulate_stops(self._get_plan_state())
 
-            sim_deliveries.discard(sim_floor)
+    def _update_target_sequence(self):
+        """Recalculates the entire optimal sequence of stops and stores it."""
+        self.target_sequence = self._compute_target_sequence()
+        self._plan_origin = (self.current_floor, self.direction)
+
+    def _is_plan_reusable(self) -> bool:
+        """The stored plan can only be patched if it was made from where the lift plans from now."""
+        return self._plan_origin == (self.current_floor, self.direction)
+
+    def _apply_request_to_target_sequence(self, request_floor: int):
+        """
+        Updates the plan after a customer started waiting on request_floor.
+        Stops before the first one the new customer can influence are kept; only the rest is re-simulated.
+        """
+        if not self._is_plan_reusable():
+            self._update_target_sequence()
+            return
 
-            if sim_floor in sim_waiting:
-                pickup_targets = [t for t in sim_waiting[sim_floor] if (sim_direction == "up" and t > sim_floor) or (sim_direction == "down" and t < sim_floor)]
-                if not sim_deliveries: pickup_targets = sim_waiting[sim_floor]
-                sim_deliveries.update(pickup_targets)
-                sim_waiting.pop(sim_floor, None)
+        # The new customer can change a decision only by becoming a closer pickup on the way,
+        # and changes what happens after the stop on its own floor. Everything before stays.
+        sim_floor = self.current_floor
+        keep = len(self.target_sequence)
+        for i, stop in enumerate(self.target_sequence):
+            if stop == request_floor or min(sim_floor, stop) < request_floor < max(sim_floor, stop):
+                keep = i
+                break
+            sim_floor = stop
+
+        state = self._get_plan_state()
+        for stop in self.target_sequence[:keep]:
+            state = self._apply_stop(state, stop)
+        self.target_sequence = self.target_sequence[:keep] + self._simulate_stops(state)
+        self._verify_target_sequence("request")
+
+    def _apply_arrival_to_target_sequence(self, arrival_floor: int):
+        """
+        Updates the plan after drop-offs and pickups on arrival_floor.
+        If everyone waiting there got in, the lift is exactly where the plan expected it to be,
+        so the rest of the plan still holds and only the reached stop is removed.
+        """
+        planned_as_expected = (self.target_sequence and self.target_sequence[0] == arrival_floor
+                               and arrival_floor not in self.waiting_customers
+                               and not self.pickup_mask >> arrival_floor & 1
+                               and self._plan_origin is not None)
+        if not planned_as_expected:
+            self._update_target_sequence()
+            return
 
-            if sim_floor in sim_requests:
-                sim_requests.remove(sim_floor)
+        self.target_sequence.pop(0)
+        self._plan_origin = (self.current_floor, self.direction)
+        self._verify_target_sequence("arrival")
 
-        self.target_sequence = sequence
+    def _verify_target_sequence(self, reason: str):
+        """In verification mode, checks the incrementally maintained plan against a full recomputation."""
+        if not self.verify_plan:
+            return
+        expected = self._compute_target_sequence()
+        if expected != self.target_sequence:
+            self.plan_mismatches += 1
+            print(f"Lift {self.name}: incremental plan after {reason} was {self.target_sequence}, full recomputation gives {expected}. Using the latter.")
+            self.target_sequence = expected
 
     def _move_towards_target(self, level_time: float):
         next_floor = self._get_next_floor()
@@ -195,6 +385,7 @@ class Lift:
                 customers_to_remove.append(customer)
         for customer in customers_to_remove:
             self.customers_inside.remove(customer)
+        self.delivery_mask &= ~(1 << self.current_floor)
 
         # Pick up customers
         if self.current_floor in self.waiting_customers:
@@ -214,19 +405,29 @@ class Lift:
                     self.floors[customer.current_floor].remove_customer(customer)
                 customer.enter_lift()
                 self.customers_inside.append(customer)
+                self.delivery_mask |= 1 << customer.target_floor
 
             self.waiting_customers[self.current_floor] = [c for c in self.waiting_customers[self.current_floor] if c.state != "in_lift"]
             if not self.waiting_customers[self.current_floor]:
                 del self.waiting_customers[self.current_floor]
-                if self.current_floor in self.request_queue:
+                del self.waiting_target_masks[self.current_floor]
+                if self.pickup_mask >> self.current_floor & 1:
                     self.request_queue.remove(self.current_floor)
+                    self.pickup_mask &= ~(1 << self.current_floor)
+            else:
+                remaining_targets = 0
+                for customer in self.waiting_customers[self.current_floor]:
+                    remaining_targets |= 1 << customer.target_floor
+                self.waiting_target_masks[self.current_floor] = remaining_targets
+            self._update_pickup_intents(self.current_floor)
+
+        self._apply_arrival_to_target_sequence(self.current_floor)
 
-        self._update_target_sequence()
+        if self.event_bus:
+            self.event_bus.publish(GameEvents.LIFT_ARRIVED, self)
 
     def _has_customers_still_walking_to_current_floor(self) -> bool:
-        if self.current_floor in self.waiting_customers:
-            return any(c.state == "walking_to_lift" for c in self.waiting_customers[self.current_floor])
-        return False
+        return self.current_floor in self.walking_customer_counts
 
     def _close_door_and_continue(self, level_time: float):
         if self._has_customers_still_walking_to_current_floor():
@@ -239,33 +440,47 @@ class Lift:
         else:
             self._set_idle()
 
-    def draw(self, screen: pg.Surface):
-        color = (100, 200, 100) if self.name == "A" else (200, 100, 100)
+    def draw_static(self, surface: pg.Surface):
+        """Draws the parts of the lift that never move, i.e. the shaft outline on every floor it serves."""
         shaft_color = (200, 200, 200)
-        for floor_num in range(self.total_floors):
-            floor_y = self.top_padding + (self.total_floors - 1 - floor_num) * self.floor_height + self.floor_height - self.height - 10
-            pg.draw.rect(screen, shaft_color, (self.x - 5, floor_y, self.width + 10, self.height), 1)
+        # Narrow lifts stand close together, so their shafts get a narrower margin
+        margin = min(5, self.width // 6)
+        for floor_num in self.served_floors:
+            pg.draw.rect(surface, shaft_color, (self.x - margin, self._floor_to_y(floor_num), self.width + 2 * margin, self.height), 1)
+
+    def get_dirty_rect(self) -> pg.Rect:
+        """The screen area draw() covers: the car with its name, load and stop list."""
+        car_rect = pg.Rect(self.x, self.y, self.width, self.height)
+        # On small cars the name may stick out
+        name_rect = pg.Rect((0, 0), self._name_size)
+        name_rect.center = car_rect.center
+        return car_rect.union(name_rect).inflate(2, 2)
 
-        pg.draw.rect(screen, color, (self.x, self.y, self.width, self.height))
-        pg.draw.rect(screen, (0, 0, 0), (self.x, self.y, self.width, self.height), 2)
+    def draw(self, screen: pg.Surface):
+        """Draws the lift car; the shaft is part of the level's static background, see draw_static()."""
+        pg.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
+        pg.draw.rect(screen, (0, 0, 0), (self.x, self.y, self.width, self.height), 2 if self.width >= 20 else 1)
 
         if self.door_open:
             door_color = (255, 255, 100)
-            pg.draw.rect(screen, door_color, (self.x + 5, self.y + 5, self.width - 10, 5))
+            door_inset = min(5, self.width // 6)
+            pg.draw.rect(screen, door_color, (self.x + door_inset, self.y + door_inset, self.width - 2 * door_inset, min(5, max(1, self.height // 8))))
 
-        font = pg.font.Font(None, 36)
-        text = font.render(self.name, True, (0, 0, 0))
+        text = TextRenderCache.render(self.name_font, self.name, True, (0, 0, 0))
         text_rect = text.get_rect(center=(self.x + self.width // 2, self.y + self.height // 2))
         screen.blit(text, text_rect)
 
+        if not self.show_details:
+            return
+
         if self.customers_inside:
-            count_font = pg.font.Font(None, 24)
-            count_text = count_font.render(f"{len(self.customers_inside)}", True, (255, 255, 255))
+            count_font = FontRegistry.get(None, 24)
+            count_text = TextRenderCache.render(count_font, f"{len(self.customers_inside)}", True, (255, 255, 255))
             screen.blit(count_text, (self.x + 5, self.y + self.height - 25))
             
         # Draw the first 5 stops from the data store
         if self.target_sequence:
             for i, floor_num in enumerate(self.target_sequence[:5]):
                 y_offset = self.height - (i * 15) - 15
-                stop_text = self.stop_list_font.render(str(floor_num), True, (255, 255, 255))
+                stop_text = TextRenderCache.render(self.stop_list_font, str(floor_num), True, (255, 255, 255))
                 screen.blit(stop_text, (self.x + self.width - 15, self.y + y_offset))
@@ -1,7 +1,11 @@
+import random
+from typing import List, Optional
 import pygame as pg
 from Level import Level
 from LevelsLoader import LevelsLoader
+from LevelCatalog import LevelCatalog
 from GameHistoryPersistence import GameHistoryPersistence
+from SqliteGameHistoryPersistence import SqliteGameHistoryPersistence
 from post_level.GameHistoryUpdaterAction import GameHistoryUpdaterAction
 from post_level.CompositePostLevelCompleteAction import CompositePostLevelCompleteAction
 from post_level.LoadLevelAction import LoadLevelAction
@@ -9,10 +13,27 @@ from post_level.LevelSelectionAction import LevelSelectionAction
 from post_level.LevelTransitionAction import LevelTransitionAction
 from post_level.GameHistoryShowAction import GameHistoryShowAction
 from post_level.ExitAction import ExitAction
+from post_level.InputLogSaverAction import InputLogSaverAction
+from InputRecorder import InputRecorder
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
+from FrameProfiler import FrameProfiler
+from CountingSurface import CountingSurface
 
 
 class LiftUpGame:
-    def __init__(self):
+    def __init__(self, dirty_rects: bool = False, history_backend: str = "sqlite", record_inputs: bool = True, profile: bool = False, profile_overlay: bool = False, profile_trace_path: Optional[str] = None):
+        """
+        Args:
+            dirty_rects (bool): Redraw and update only the screen areas that changed, instead of flipping the whole screen.
+            history_backend (str): Where the game history is kept: "sqlite" for game_history.db, which imports an
+                existing game_history.csv on first use, or "csv" for game_history.csv.
+            record_inputs (bool): Save an input log of every completed level to data/output/recordings, see InputRecorder.
+            profile (bool): Time the phases of every frame and count its draw calls and blits with a FrameProfiler,
+                and print their rolling percentiles on exit. F3 toggles the on-screen overlay.
+            profile_overlay (bool): Profile, and show the overlay from the start.
+            profile_trace_path (Optional[str]): Profile, and write a Chrome/Perfetto trace to this file on exit.
+        """
         pg.init()
 
         # Game constants
@@ -26,7 +47,24 @@ class LiftUpGame:
         self.screen = pg.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
         pg.display.set_caption("Lift Up Game")
         
-        self.game_history_persistence = GameHistoryPersistence("data/output")
+        self.dirty_rects = dirty_rects
+        self.record_inputs = record_inputs
+
+        # Blits can only be counted on a surface of our own, so while profiling the level is drawn off-screen
+        self.profiler: Optional[FrameProfiler] = None
+        self.profile_trace_path = profile_trace_path
+        self.draw_surface = self.screen
+        if profile or profile_overlay or profile_trace_path:
+            self.profiler = FrameProfiler()
+            self.profiler.show_overlay = profile_overlay
+            self.profiler.install_draw_counters()
+            self.draw_surface = CountingSurface(self.screen, self.profiler)
+        if history_backend == "csv":
+            self.game_history_persistence = GameHistoryPersistence("data/output")
+        else:
+            self.game_history_persistence = SqliteGameHistoryPersistence("data/output")
+        self.levels_loader = LevelsLoader("data/levels")
+        self.level_catalog = LevelCatalog(self.levels_loader, "data/output/level_catalog.json")
         self.current_level = None
         self.has_exited = False
         # self.load_and_set_level(LevelsLoader("data/levels"), 1)
@@ -35,7 +73,7 @@ class LiftUpGame:
         """
         Loads all data for a given level number and sets it as the current level.
         """
-        if not levels_loader.level_exists(level_num):
+        if not self.level_catalog.level_exists(level_num):
             print(f"Attempted to load level '{level_num}', but it does not exist or is incomplete. Game will end.")
             self.exit()
             return
@@ -43,31 +81,43 @@ class LiftUpGame:
         # Create post-level actions
         next_level_num = level_num + 1
         
-        level_select_action = LevelSelectionAction(levels_loader, lambda num: LoadLevelAction(self, levels_loader, num))
+        level_select_action = LevelSelectionAction(self.level_catalog, lambda num: LoadLevelAction(self, levels_loader, num))
         
-        post_level_actions = CompositePostLevelCompleteAction([
-            GameHistoryUpdaterAction(level_num, self.game_history_persistence),
+        # The level's random draws all follow from this seed, so the input log can reproduce them
+        seed = random.randrange(2 ** 32)
+        recorder = InputRecorder(level_num, seed) if self.record_inputs else None
+
+        post_level_actions = [GameHistoryUpdaterAction(level_num, self.game_history_persistence)]
+        if recorder:
+            post_level_actions.append(InputLogSaverAction(recorder, "data/output/recordings"))
+        post_level_actions.append(
             LevelTransitionAction(
                 game=self,
                 level_num=level_num,
                 persistence=self.game_history_persistence,
-                next_level_action=LoadLevelAction(self, levels_loader, next_level_num) if levels_loader.level_exists(next_level_num) else None,
+                next_level_action=LoadLevelAction(self, levels_loader, next_level_num) if self.level_catalog.level_exists(next_level_num) else None,
                 replay_action=LoadLevelAction(self, levels_loader, level_num),
                 level_select_action=level_select_action,
                 game_history_show_action=GameHistoryShowAction(self, self.game_history_persistence, level_select_action, ExitAction(self)),
                 exit_action=ExitAction(self)
             )
-        ])
+        )
         
         # Initialize Level
+        if self.current_level:
+            self.current_level.close()
+        random.seed(seed)
         self.current_level = Level(
             raw_data=levels_loader.load(level_num),
             screen_width=self.SCREEN_WIDTH,
             game_height=self.GAME_HEIGHT,
             top_padding=self.TOP_PADDING,
             status_bar_height=self.STATUS_BAR_HEIGHT,
-            post_level_action=post_level_actions
+            post_level_action=CompositePostLevelCompleteAction(post_level_actions)
         )
+        if recorder:
+            recorder.attach(self.current_level)
+        self.current_level.profiler = self.profiler
 
     def exit(self):
         """Signals the game to exit by setting the has_exited flag to True."""
@@ -75,39 +125,119 @@ class LiftUpGame:
 
     def handle_events(self):
         """Handle pygame events"""
+        start = self.profiler.now() if self.profiler else 0.0
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 self.exit()
+            elif self.profiler and event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self.profiler.show_overlay = not self.profiler.show_overlay
+            elif self.current_level and event.type == pg.MOUSEMOTION:
+                self.current_level.handle_mouse_motion(event.pos)
             elif self.current_level and event.type == pg.MOUSEBUTTONDOWN:
                 mouse_pos = pg.mouse.get_pos()
                 self.current_level.handle_click(mouse_pos)
+        if self.profiler:
+            self.profiler.record("events", start)
 
     def update(self):
         """Update game state"""
         if self.current_level:
             self.current_level.update()
         else:
-            loader = LevelsLoader("data/levels")
-            LevelSelectionAction(loader, lambda num: LoadLevelAction(self, loader, num)).execute(None)
+            LevelSelectionAction(self.level_catalog, lambda num: LoadLevelAction(self, self.levels_loader, num)).execute(None)
 
     def draw(self):
         """Draw everything"""
-        self.screen.fill((30, 30, 30))
-        
+        if self.dirty_rects and self.current_level:
+            self._draw_dirty()
+            return
+
         if self.current_level:
-            self.current_level.draw(self.screen)
+            # The level's background covers the whole screen
+            self.current_level.draw(self.draw_surface)
             
             # Draw level time
-            font = pg.font.Font(None, 24)
-            time_text = font.render(f"Time: {self.current_level.level_time:.1f}s", True, (255, 255, 255))
-            self.screen.blit(time_text, (self.SCREEN_WIDTH - 120, 10))
+            start = self.profiler.now() if self.profiler else 0.0
+            font = FontRegistry.get(None, 24)
+            time_text = TextRenderCache.render(font, f"Time: {self.current_level.level_time:.1f}s", True, (255, 255, 255))
+            self.draw_surface.blit(time_text, (self.SCREEN_WIDTH - 120, 10))
+            if self.profiler:
+                self.profiler.record("draw.hud", start)
+        else:
+            self.draw_surface.fill((30, 30, 30))
 
+        if self.profiler:
+            self._present_profiled([self.screen.get_rect()])
+            return
         pg.display.flip()
 
+    def _draw_dirty(self):
+        """Draws the level in dirty-rect mode and updates only the changed parts of the display."""
+        start = self.profiler.now() if self.profiler else 0.0
+        font = FontRegistry.get(None, 24)
+        time_text = TextRenderCache.render(font, f"Time: {self.current_level.level_time:.1f}s", True, (255, 255, 255))
+        time_rect = time_text.get_rect(topleft=(self.SCREEN_WIDTH - 120, 10))
+        extra_rects = [time_rect]
+        if self.profiler and self.profiler.overlay_rect():
+            # Where the overlay is drawn, or was before it was hidden, the level has to be restored
+            extra_rects.append(self.profiler.overlay_rect())
+        if self.profiler:
+            self.profiler.record("draw.hud", start)
+
+        dirty_rects = self.current_level.draw_dirty(self.draw_surface, extra_rects)
+
+        start = self.profiler.now() if self.profiler else 0.0
+        self.draw_surface.blit(time_text, time_rect)
+        if self.profiler:
+            self.profiler.record("draw.hud", start)
+            self._present_profiled(dirty_rects)
+            return
+        pg.display.update(dirty_rects)
+
+    def _present_profiled(self, dirty_rects: List[pg.Rect]):
+        """Draws the profiler overlay, copies the changed areas of the off-screen frame to the display and shows them."""
+        start = self.profiler.now()
+        if self.profiler.show_overlay:
+            dirty_rects = dirty_rects + [self.profiler.draw_overlay(self.draw_surface)]
+            start = self.profiler.record("draw.overlay", start)
+        for rect in dirty_rects:
+            self.screen.blit(self.draw_surface, rect, rect)
+        start = self.profiler.record("draw.copy_to_display", start)
+        pg.display.update(dirty_rects)
+        self.profiler.record("draw.present", start)
+
     def run(self):
         """Main game loop"""
         while not self.has_exited:
+            if self.profiler:
+                self.profiler.begin_frame()
             self.handle_events()
             self.update()
             self.draw()
+            if self.profiler:
+                self.profiler.end_frame()
+        if self.current_level:
+            self.current_level.close()
+        if self.profiler:
+            self._finish_profiling()
         pg.quit()
+        if isinstance(self.game_history_persistence, SqliteGameHistoryPersistence):
+            self.game_history_persistence.close()
+        # The fonts and the surfaces rendered with them died with pygame
+        TextRenderCache.clear()
+        FontRegistry.clear()
+
+    def _finish_profiling(self):
+        """Prints the rolling frame phase percentiles and writes the trace, if one was asked for."""
+        self.profiler.uninstall_draw_counters()
+        print(f"Frame profile over the last {len(self.profiler.phase_windows.get('frame', ()))} frames:")
+        for line in self.profiler.summary_lines():
+            print(f"  {line}")
+        print(f"  Fonts:      {FontRegistry.stats()}")
+        print(f"  Text cache: {TextRenderCache.stats()}")
+        if self.profile_trace_path:
+            try:
+                self.profiler.write_trace(self.profile_trace_path)
+                print(f"Frame trace written to {self.profile_trace_path}")
+            except OSError as e:
+                print(f"Could not write frame trace '{self.profile_trace_path}': {e}")
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Customer import Customer
+
+
+class PopupHitIndex:
+    def __init__(self, cell_width: int):
+        """
+        A uniform grid over the x axis of a floor, holding the customers whose lift selection popup can be hovered.
+        Each customer sits in the cell of its x coordinate and is moved to another cell only when it crosses a cell
+        border, so finding the popup under the mouse only looks at the customers of three cells instead of all of them.
+
+        Args:
+            cell_width (int): The width of a cell; must be at least the width of the widest indexed popup.
+        """
+        self.cell_width = cell_width
+        self._cells: Dict[int, Dict[Customer, None]] = {}
+        self._customer_cells: Dict[Customer, int] = {}
+
+    def cell_of(self, x: float) -> int:
+        return int(x // self.cell_width)
+
+    def add(self, customer: Customer):
+        """Indexes a customer; the customer keeps the index up to date itself while it wanders."""
+        cell = self.cell_of(customer.x)
+        self._cells.setdefault(cell, {})[customer] = None
+        self._customer_cells[customer] = cell
+        customer.popup_index = self
+
+    def remove(self, customer: Customer):
+        """Removes the customer if it is indexed; does nothing otherwise."""
+        cell = self._customer_cells.pop(customer, None)
+        if cell is None:
+            return
+        self._remove_from_cell(customer, cell)
+        customer.popup_index = None
+
+    def move(self, customer: Customer):
+        """Moves an indexed customer to the cell of its current x coordinate, if it changed."""
+        cell = self.cell_of(customer.x)
+        old_cell = self._customer_cells[customer]
+        if cell == old_cell:
+            return
+        self._remove_from_cell(customer, old_cell)
+        self._cells.setdefault(cell, {})[customer] = None
+        self._customer_cells[customer] = cell
+
+    def _remove_from_cell(self, customer: Customer, cell: int):
+        customers = self._cells[cell]
+        del customers[customer]
+        if not customers:
+            del self._cells[cell]
+
+    def find_popup_at(self, mouse_pos: Tuple[int, int]) -> Optional[Customer]:
+        """
+        Returns an indexed customer whose popup is under the mouse, or None.
+
+        Args:
+            mouse_pos (Tuple[int, int]): The mouse position in screen coordinates.
+        """
+        # A popup is no wider than a cell and starts at most a cell left of its customer, so its customer is in one of these
+        mouse_cell = self.cell_of(mouse_pos[0])
+        for cell in (mouse_cell - 1, mouse_cell, mouse_cell + 1):
+            for customer in self._cells.get(cell, ()):
+                if customer.is_mouse_over_popup(mouse_pos):
+                    return customer
+        return None
+
+    def __contains__(self, customer: Customer) -> bool:
+        return customer in self._customer_cells
+
+    def __len__(self) -> int:
+        return len(self._customer_cells)
@@ -1,6 +1,7 @@
 import random
 from typing import Optional
 from Customer import Customer
+from FloorRequestPopup import FloorRequestPopup
 
 
 class RandomCustomerFactory:
@@ -13,7 +14,7 @@ class RandomCustomerFactory:
         # Randomize properties
         target_floor = self._request_random_floor(spawn_floor, total_floors)
         color = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
-        popup_offset_y = random.randint(-5, 9)
+        popup_offset_y = random.randint(*FloorRequestPopup.OFFSET_Y_RANGE)
         is_high_priority = random.random() < self.high_priority_prob
 
         # Create and return a customer instance with deterministic properties
@@ -1,20 +1,30 @@
-from typing import List, Dict
+from typing import Iterable, Dict, List, Optional
 from RawCustomerData import RawCustomerData
 from RawSpawnLocationData import RawSpawnLocationData
+from RawLiftData import RawLiftData
 
 
 class RawLevelData:
-    def __init__(self, level_num: int, customer_spawns: List[RawCustomerData], spawn_locations: Dict[int, List[RawSpawnLocationData]], num_floors: int = 5):
+    def __init__(self, level_num: int, customer_spawns: Iterable[RawCustomerData], spawn_locations: Dict[int, List[RawSpawnLocationData]], num_floors: int = 5, streaming_spawns: bool = False, lifts: Optional[List[RawLiftData]] = None):
         """
         Holds the raw data required to initialize a Level.
 
         Args:
             level_num (int): The number of the level.
-            customer_spawns (list[RawCustomerData]): List of customer spawn events.
+            customer_spawns (Iterable[RawCustomerData]): Customer spawn events; a list, or a lazy iterator in spawn time order if streaming_spawns.
             spawn_locations (dict[int, list[RawSpawnLocationData]]): Dictionary mapping floor numbers to lists of spawn location data.
             num_floors (int): Number of floors in the level.
+            streaming_spawns (bool): Whether customer_spawns is read lazily, see LevelsLoader.load(streaming=True).
+            lifts (Optional[List[RawLiftData]]): The lifts, from left to right; lifts "A" and "B" serving all floors if None.
         """
         self.level_num = level_num
         self.customer_spawns = customer_spawns
         self.spawn_locations = spawn_locations
         self.num_floors = num_floors
+        self.streaming_spawns = streaming_spawns
+        self.lifts = lifts if lifts is not None else [RawLiftData("A"), RawLiftData("B")]
+
+    def close(self):
+        """Closes the spawns file of a streaming level if it is still open; the spawns not read yet are dropped."""
+        if self.streaming_spawns and hasattr(self.customer_spawns, 'close'):
+            self.customer_spawns.close()
@@ -0,0 +1,18 @@
+from typing import List, Optional
+
+
+class RawLiftData:
+    def __init__(self, name: str, speed: float = 2.5, door_wait_time: float = 2.0, served_floors: Optional[List[int]] = None):
+        """
+        Holds raw data for a single lift.
+
+        Args:
+            name (str): The name of the lift, shown on it and on the lift selection buttons.
+            speed (float): The distance the lift moves per frame, in pixels; a multiple of half a pixel.
+            door_wait_time (float): How long the door stays open at a stop, in seconds.
+            served_floors (Optional[List[int]]): The floors the lift stops at, ascending; all floors if None.
+        """
+        self.name = name
+        self.speed = speed
+        self.door_wait_time = door_wait_time
+        self.served_floors = served_floors
@@ -0,0 +1,27 @@
+class ReplayResult:
+    def __init__(self, log_path: str, level_num: int, recorded_penalty: float, replayed_penalty: float, is_complete: bool, frames: int, desync: str, wall_time: float):
+        """
+        Holds the outcome of replaying one input log.
+
+        Args:
+            log_path (str): The input log that was replayed.
+            level_num (int): The number of the level the log was recorded on.
+            recorded_penalty (float): The final penalty when the log was recorded.
+            replayed_penalty (float): The penalty at the end of the replay, which stops at the first desync.
+            is_complete (bool): Whether the level was complete at the end of the replay.
+            frames (int): The number of frames that were replayed, up to the first desync.
+            desync (str): Why the replay went off the recorded run, e.g. an assigned customer that didn't exist; empty if it didn't.
+            wall_time (float): Real seconds the replay took.
+        """
+        self.log_path = log_path
+        self.level_num = level_num
+        self.recorded_penalty = recorded_penalty
+        self.replayed_penalty = replayed_penalty
+        self.is_complete = is_complete
+        self.frames = frames
+        self.desync = desync
+        self.wall_time = wall_time
+
+    def matches(self) -> bool:
+        """Whether the replay reproduced the recorded run exactly."""
+        return not self.desync and self.replayed_penalty == self.recorded_penalty
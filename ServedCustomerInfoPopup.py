@@ -1,5 +1,8 @@
 import pygame as pg
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
+from FloorRequestPopup import FloorRequestPopup
 
 if TYPE_CHECKING:
     from Customer import Customer
@@ -10,8 +13,14 @@ class ServedCustomerInfoPopup:
         self.customer = customer
         self.width = 150  # Increased width for new layout
         self.height = 60
-        self.font = pg.font.Font(None, 18)
-        self.circle_font = pg.font.Font(None, 28)
+        self.font = FontRegistry.get(None, 18)
+        self.circle_font = FontRegistry.get(None, 28)
+
+    def get_popup_rect(self) -> Tuple[int, int, int, int]:
+        """Get the popup rectangle"""
+        popup_x = self.customer.x - self.width // 2 + self.customer.width // 2
+        popup_y = self.customer.y - self.height - 5
+        return popup_x, popup_y, self.width, self.height
 
     def draw(self, screen: pg.Surface):
         # Don't draw if customer is in lift
@@ -24,8 +33,7 @@ class ServedCustomerInfoPopup:
         penalty = self.customer.calculate_penalty(current_time)
 
         # --- Position and Background ---
-        popup_x = self.customer.x - self.width // 2 + self.customer.width // 2
-        popup_y = self.customer.y - self.height - 5
+        popup_x, popup_y, _, _ = self.get_popup_rect()
         
         pg.draw.rect(screen, self.customer.color, (popup_x, popup_y, self.width, self.height))
         pg.draw.rect(screen, (0, 0, 0), (popup_x, popup_y, self.width, self.height), 1)
@@ -34,26 +42,20 @@ class ServedCustomerInfoPopup:
         circle_radius = 22
         circle_x = popup_x + circle_radius + 8
         circle_y = popup_y + self.height // 2
-        pg.draw.circle(screen, (255, 255, 255), (circle_x, circle_y), circle_radius)
-        pg.draw.circle(screen, (0, 0, 0), (circle_x, circle_y), circle_radius, 2)
-        
-        target_text_surf = self.circle_font.render(str(self.customer.target_floor), True, (0, 0, 0))
-        target_text_rect = target_text_surf.get_rect(center=(circle_x, circle_y))
-        screen.blit(target_text_surf, target_text_rect)
+        badge = FloorRequestPopup.target_floor_badge(self.circle_font, self.customer.target_floor, circle_radius)
+        screen.blit(badge, badge.get_rect(center=(circle_x, circle_y)))
 
         # --- Draw Text Info (to the right of the circle) ---
         text_x = popup_x + (2 * circle_radius) + 15
         
         # Draw semi-transparent background for text
         text_bg_rect = pg.Rect(text_x - 3, popup_y + 8, self.width - (text_x - popup_x) - 5, 44)
-        text_bg_surf = pg.Surface(text_bg_rect.size, pg.SRCALPHA)
-        text_bg_surf.fill((255, 255, 255, 128))
-        screen.blit(text_bg_surf, text_bg_rect.topleft)
+        screen.blit(FloorRequestPopup.text_background(text_bg_rect.size), text_bg_rect.topleft)
         
         # Wait Time
-        wait_text = self.font.render(f"Wait: {waiting_time:.1f}s", True, (0, 0, 0))
+        wait_text = TextRenderCache.render(self.font, f"Wait: {waiting_time:.1f}s", True, (0, 0, 0))
         screen.blit(wait_text, (text_x, popup_y + 10))
         
         # Penalty
-        penalty_text = self.font.render(f"Penalty: {int(penalty)}", True, (200, 0, 0))
+        penalty_text = TextRenderCache.render(self.font, f"Penalty: {int(penalty)}", True, (200, 0, 0))
         screen.blit(penalty_text, (text_x, popup_y + 32))
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+from typing import List, Optional
+from GameHistoryPersistence import GameHistoryPersistence
+from RawGameHistoryEntry import RawGameHistoryEntry
+
+
+class SqliteGameHistoryPersistence:
+    FILE_NAME = "game_history.db"
+
+    def __init__(self, output_path: str):
+        """
+        Handles reading and writing game history data in an SQLite database, with the same methods as
+        GameHistoryPersistence. The queries the post-level screens make are answered from indexes, so they don't get
+        slower as the history grows.
+
+        When the database is created, the runs in the game_history.csv next to it are imported once.
+
+        Args:
+            output_path (str): The directory where the database, and any CSV history to import, is stored.
+        """
+        os.makedirs(output_path, exist_ok=True)
+        self.file_path = os.path.join(output_path, self.FILE_NAME)
+        self.csv_file_path = os.path.join(output_path, "game_history.csv")
+        self.connection = sqlite3.connect(self.file_path)
+        # Appends don't block readers, and a crash can't leave a half-written run behind
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """Creates the tables if they don't exist, imports the CSV history if that wasn't done yet, then adds the indexes."""
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS game_history (
+                    id INTEGER PRIMARY KEY,
+                    timestamp_epoch_seconds INTEGER NOT NULL,
+                    level TEXT NOT NULL,
+                    penalty REAL NOT NULL
+                )""")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        # Importing before indexing is much faster than keeping the indexes up to date row by row
+        if self.connection.execute("SELECT 1 FROM metadata WHERE key = 'csv_imported'").fetchone() is None:
+            self._import_csv()
+
+        with self.connection:
+            self.connection.execute("CREATE INDEX IF NOT EXISTS game_history_level_penalty ON game_history (level, penalty)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS game_history_level_timestamp ON game_history (level, timestamp_epoch_seconds)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS game_history_timestamp ON game_history (timestamp_epoch_seconds)")
+
+    def _import_csv(self):
+        """Copies the runs of the CSV history into the database, in one transaction, and marks the import as done."""
+        entries: List[RawGameHistoryEntry] = []
+        if os.path.exists(self.csv_file_path):
+            try:
+                entries = GameHistoryPersistence(os.path.dirname(self.csv_file_path)).read_all()
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Could not import game history '{self.csv_file_path}': {e}")
+                return
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO game_history (timestamp_epoch_seconds, level, penalty) VALUES (?, ?, ?)",
+                ((entry.timestamp_epoch_seconds, entry.level, entry.penalty) for entry in entries)
+            )
+            self.connection.execute("INSERT INTO metadata (key, value) VALUES ('csv_imported', ?)", (str(len(entries)),))
+        if entries:
+            print(f"Imported {len(entries)} runs from '{self.csv_file_path}' into '{self.file_path}'.")
+
+    @staticmethod
+    def _to_entries(rows) -> List[RawGameHistoryEntry]:
+        return [RawGameHistoryEntry(timestamp_epoch_seconds=timestamp, level=level, penalty=penalty) for timestamp, level, penalty in rows]
+
+    def read_all(self) -> List[RawGameHistoryEntry]:
+        """
+        Reads all history entries, in the order they were added.
+
+        Returns:
+            List[RawGameHistoryEntry]: A list of all history entries.
+        """
+        return self._to_entries(self.connection.execute("SELECT timestamp_epoch_seconds, level, penalty FROM game_history ORDER BY id"))
+
+    def append(self, history_entry: RawGameHistoryEntry):
+        """
+        Adds a new history entry.
+
+        Args:
+            history_entry (RawGameHistoryEntry): The new entry to add.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO game_history (timestamp_epoch_seconds, level, penalty) VALUES (?, ?, ?)",
+                (history_entry.timestamp_epoch_seconds, history_entry.level, history_entry.penalty)
+            )
+
+    def best_per_level(self) -> List[RawGameHistoryEntry]:
+        """
+        Finds the run with the lowest penalty of every level; the earliest one if several runs tie.
+
+        Returns:
+            List[RawGameHistoryEntry]: One entry per level, ordered by level number.
+        """
+        # Hop from level to level through the index, and then one lookup per level, rather than a scan over every run
+        levels = [level for (level,) in self.connection.execute("""
+            WITH RECURSIVE levels(level) AS (
+                SELECT MIN(level) FROM game_history
+                UNION ALL
+                SELECT (SELECT MIN(level) FROM game_history WHERE level > levels.level) FROM levels WHERE level IS NOT NULL
+            )
+            SELECT level FROM levels WHERE level IS NOT NULL""")]
+        best = []
+        for level in sorted(levels, key=GameHistoryPersistence.level_sort_key):
+            best.extend(self._to_entries(self.connection.execute(
+                "SELECT timestamp_epoch_seconds, level, penalty FROM game_history WHERE level = ? ORDER BY penalty, id LIMIT 1",
+                (level,)
+            )))
+        return best
+
+    def recent(self, limit: int) -> List[RawGameHistoryEntry]:
+        """
+        Returns the most recent runs over all levels, newest first.
+
+        Args:
+            limit (int): The maximum number of runs to return.
+        """
+        return self._to_entries(self.connection.execute(
+            "SELECT timestamp_epoch_seconds, level, penalty FROM game_history ORDER BY timestamp_epoch_seconds DESC, id LIMIT ?",
+            (limit,)
+        ))
+
+    def level_history(self, level: str, limit: Optional[int] = None) -> List[RawGameHistoryEntry]:
+        """
+        Returns the runs of one level, newest first.
+
+        Args:
+            level (str): The name of the level (e.g., "level_1").
+            limit (Optional[int]): The maximum number of runs to return; all of them if None.
+        """
+        return self._to_entries(self.connection.execute(
+            "SELECT timestamp_epoch_seconds, level, penalty FROM game_history WHERE level = ? ORDER BY timestamp_epoch_seconds DESC, id LIMIT ?",
+            (level, limit if limit is not None else -1)
+        ))
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
@@ -1,4 +1,6 @@
 import pygame as pg
+from FontRegistry import FontRegistry
+from TextRenderCache import TextRenderCache
 
 
 class StatusBar:
@@ -9,16 +11,19 @@ class StatusBar:
         self.y = y
         self.surface = pg.Surface((width, height))
         self.total_penalty = 0.0
-        self.font = pg.font.Font(None, 36)
+        self.font = FontRegistry.get(None, 36)
 
     def add_penalty(self, penalty: float):
         self.total_penalty += penalty
 
+    def get_rect(self) -> pg.Rect:
+        return pg.Rect(self.x, self.y, self.width, self.height)
+
     def draw(self, screen: pg.Surface):
         self.surface.fill((50, 50, 50))  # Dark gray background
         
         # Draw penalty text
-        text = self.font.render(f"Total Penalty: {self.total_penalty:.2f}", True, (255, 255, 255))
+        text = TextRenderCache.render(self.font, f"Total Penalty: {self.total_penalty:.2f}", True, (255, 255, 255))
         text_rect = text.get_rect(center=(self.width // 2, self.height // 2))
         self.surface.blit(text, text_rect)
         
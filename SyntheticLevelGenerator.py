@@ -0,0 +1,184 @@
+import json
+import os
+from typing import List, Tuple
+import numpy as np
+
+
+class SyntheticLevelGenerator:
+    ARRIVAL_PROCESSES = ("poisson", "rush_hour")
+    # Rush hours as (time as a share of the duration, direction): a morning peak of customers going up from the
+    # ground floor, and an evening peak of customers going down to it
+    RUSH_HOURS = ((0.25, "up"), (0.75, "down"))
+    # The standard deviation of a rush hour peak, as a share of the duration
+    RUSH_HOUR_WIDTH = 0.04
+    # Spawn locations are kept clear of the lift shafts around the middle of the floor
+    SPAWN_AREAS = ((60, 260), (540, 740))
+    # Spawn rows are formatted and written in chunks of this many, so the text of a huge level is never all in memory
+    CHUNK_ROWS = 1 << 20
+
+    def __init__(self, spawn_count: int, duration: float, num_floors: int = 5, spawn_locations_per_floor: int = 2, arrivals: str = "poisson", high_priority_share: float = 0.3, rush_hour_share: float = 0.6, seed: int = 0, lift_count: int = 2):
+        """
+        Generates levels with NumPy, in the CSV layout LevelsLoader reads, for stress and scale testing.
+
+        Arrivals are a Poisson process with spawn_count arrivals over the duration: with "poisson" at a constant
+        rate, with "rush_hour" at a base rate plus a morning and an evening peak, see RUSH_HOURS. Outside the
+        peaks, customers appear on a random floor and go to a random other floor; in the morning peak they come
+        in on the ground floor, and in the evening peak they leave to it.
+
+        Args:
+            spawn_count (int): The number of customers to spawn.
+            duration (float): The time span of the spawns, in seconds.
+            num_floors (int): The number of floors.
+            spawn_locations_per_floor (int): The number of spawn locations on every floor.
+            arrivals (str): The arrival process, one of ARRIVAL_PROCESSES.
+            high_priority_share (float): The share of customers with high priority.
+            rush_hour_share (float): With "rush_hour", the share of customers arriving in the peaks.
+            seed (int): The seed of the random generator; the same arguments and seed give the same level.
+            lift_count (int): The number of lifts, all of them serving every floor.
+        """
+        if arrivals not in self.ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process '{arrivals}', expected one of {', '.join(self.ARRIVAL_PROCESSES)}")
+        if num_floors < 2:
+            raise ValueError("A level needs at least two floors")
+        if spawn_locations_per_floor < 1:
+            raise ValueError("Every floor needs at least one spawn location")
+        if lift_count < 1:
+            raise ValueError("A level needs at least one lift")
+        if spawn_count < 0 or duration <= 0:
+            raise ValueError("The spawn count can't be negative and the duration must be positive")
+        if not 0.0 <= high_priority_share <= 1.0 or not 0.0 <= rush_hour_share <= 1.0:
+            raise ValueError("Shares must be between 0 and 1")
+        self.spawn_count = spawn_count
+        self.duration = duration
+        self.num_floors = num_floors
+        self.spawn_locations_per_floor = spawn_locations_per_floor
+        self.arrivals = arrivals
+        self.high_priority_share = high_priority_share
+        self.rush_hour_share = rush_hour_share
+        self.seed = seed
+        self.lift_count = lift_count
+
+    def spawn_location_xs(self) -> List[int]:
+        """The x positions of every floor's spawn locations, ascending, so location k has the ID "<floor>-<k>"."""
+        left_count = (self.spawn_locations_per_floor + 1) // 2
+        right_count = self.spawn_locations_per_floor - left_count
+        xs = []
+        for (start, end), count in zip(self.SPAWN_AREAS, (left_count, right_count)):
+            xs.extend(int(x) for x in np.linspace(start, end, count + 2)[1:-1].round())
+        return sorted(xs)
+
+    def lift_names(self) -> List[str]:
+        """The names of the lifts, from left to right: "A" to "Z", then "AA", "AB" and so on."""
+        names = []
+        for i in range(self.lift_count):
+            name = ""
+            i += 1
+            while i:
+                i, letter = divmod(i - 1, 26)
+                name = chr(ord("A") + letter) + name
+            names.append(name)
+        return names
+
+    def generate(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Generates all spawns, sorted by time.
+
+        Returns:
+            Tuple of arrays, one entry per spawn: timestamps in milliseconds (int64), spawn floors, spawn location
+            numbers (1-based, as in the spawn ID), whether the customer has high priority, and target floors.
+        """
+        rng = np.random.default_rng(self.seed)
+        n = self.spawn_count
+
+        # Given the number of arrivals, the arrival times of a Poisson process are independent draws from its
+        # rate function, normalized; the rush hour rate is a mixture of a constant rate and one peak per rush hour
+        if self.arrivals == "rush_hour":
+            peak_shares = [self.rush_hour_share / len(self.RUSH_HOURS)] * len(self.RUSH_HOURS)
+            component = rng.choice(len(self.RUSH_HOURS) + 1, size=n, p=[1.0 - self.rush_hour_share] + peak_shares)
+        else:
+            component = np.zeros(n, dtype=np.int64)
+        times = rng.uniform(0.0, self.duration, n)
+        for i, (center, _) in enumerate(self.RUSH_HOURS, start=1):
+            in_peak = component == i
+            times[in_peak] = rng.normal(center * self.duration, self.RUSH_HOUR_WIDTH * self.duration, int(in_peak.sum()))
+
+        # Milliseconds, not before the first frame of the level
+        timestamps = np.clip(np.rint(times * 1000.0), 1, max(1, round(self.duration * 1000.0))).astype(np.int64)
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, component = timestamps[order], component[order]
+
+        floors = rng.integers(0, self.num_floors, n)
+        # A random floor other than the spawn floor
+        targets = rng.integers(0, self.num_floors - 1, n)
+        targets += targets >= floors
+        for i, (_, direction) in enumerate(self.RUSH_HOURS, start=1):
+            in_peak = component == i
+            peak_size = int(in_peak.sum())
+            if direction == "up":
+                floors[in_peak] = 0
+                targets[in_peak] = rng.integers(1, self.num_floors, peak_size)
+            else:
+                floors[in_peak] = rng.integers(1, self.num_floors, peak_size)
+                targets[in_peak] = 0
+
+        locations = rng.integers(1, self.spawn_locations_per_floor + 1, n)
+        is_high_priority = rng.random(n) < self.high_priority_share
+        return timestamps, floors, locations, is_high_priority, targets
+
+    def write(self, levels_root_path: str, level_num: int, overwrite: bool = False) -> str:
+        """
+        Generates the level and writes it as level_<level_num> under levels_root_path, with a level config
+        declaring its floors and lifts.
+
+        Args:
+            levels_root_path (str): The root directory of the levels, as given to LevelsLoader.
+            level_num (int): The number of the level to write.
+            overwrite (bool): Replace the level if it already exists; otherwise that is an error.
+
+        Returns:
+            str: The directory the level was written to.
+        """
+        level_path = os.path.join(levels_root_path, f"level_{level_num}")
+        customer_spawns_path = os.path.join(level_path, "customer_spawns.csv")
+        spawn_locations_path = os.path.join(level_path, "spawn_locations.csv")
+        level_config_path = os.path.join(level_path, "level_config.json")
+        if not overwrite and (os.path.exists(customer_spawns_path) or os.path.exists(spawn_locations_path)):
+            raise FileExistsError(f"Level '{level_path}' already exists")
+        os.makedirs(level_path, exist_ok=True)
+
+        with open(level_config_path, 'w') as f:
+            json.dump({"floors": self.num_floors, "lifts": [{"name": name} for name in self.lift_names()]}, f, indent=2)
+
+        xs = self.spawn_location_xs()
+        with open(spawn_locations_path, 'w', newline='') as f:
+            f.write("Floor,X\n")
+            f.write("".join(f"{floor},{x}\n" for floor in range(self.num_floors) for x in xs))
+
+        timestamps, floors, locations, is_high_priority, targets = self.generate()
+        suffixes = self._row_suffixes()
+        fractions = [f".{ms:03d}" for ms in range(1000)]
+        with open(customer_spawns_path, 'w', newline='') as f:
+            f.write("Timestamp,SpawnLocation,Priority,TargetFloor\n")
+            for start in range(0, self.spawn_count, self.CHUNK_ROWS):
+                chunk = slice(start, start + self.CHUNK_ROWS)
+                # Whole seconds plus a preformatted fraction, then the rest of the row from the table
+                seconds = (timestamps[chunk] // 1000).tolist()
+                milliseconds = (timestamps[chunk] % 1000).tolist()
+                keys = self._row_suffix_key(floors[chunk], locations[chunk], is_high_priority[chunk].astype(np.int64), targets[chunk]).tolist()
+                f.write("".join([f"{second}{fractions[ms]}{suffixes[key]}" for second, ms, key in zip(seconds, milliseconds, keys)]))
+        return level_path
+
+    def _row_suffixes(self) -> List[str]:
+        """
+        Everything in a spawn row after the timestamp, for every (floor, location, priority, target) combination,
+        indexed by _row_suffix_key(). There are few combinations, so rows are formatted by looking them up.
+        """
+        return [f",{floor}-{location},{'HIGH' if high else 'LOW'},{target}\n"
+                for floor in range(self.num_floors)
+                for location in range(1, self.spawn_locations_per_floor + 1)
+                for high in (0, 1)
+                for target in range(self.num_floors)]
+
+    def _row_suffix_key(self, floor: np.ndarray, location: np.ndarray, high: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """The index of each spawn's (floor, location, priority, target) combination in _row_suffixes()."""
+        return ((floor * self.spawn_locations_per_floor + (location - 1)) * 2 + high) * self.num_floors + target
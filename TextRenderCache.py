@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Tuple
+import pygame as pg
+
+
+class TextRenderCache:
+    """
+    A process-wide, bounded LRU cache of rendered text surfaces, keyed by (font, text, color, antialias).
+    Most labels are the same from one frame to the next, so they are rendered once and blitted from here.
+    Numbers should be formatted with a fixed precision (e.g. wait times to 0.1 s) before rendering, so that
+    consecutive frames produce the same string. The returned surfaces are shared; blit them, don't draw on them.
+    """
+    capacity = 512
+    _surfaces: "OrderedDict[Tuple[pg.font.Font, str, Tuple[int, ...], bool], pg.Surface]" = OrderedDict()
+    hit_count = 0
+    miss_count = 0
+    eviction_count = 0
+
+    @classmethod
+    def render(cls, font: pg.font.Font, text: str, antialias: bool, color: Tuple[int, ...]) -> pg.Surface:
+        """
+        Returns the surface of font.render(text, antialias, color), rendering it only if it isn't cached.
+
+        Args:
+            font (pg.font.Font): The font to render with, usually from FontRegistry.
+            text (str): The text to render.
+            antialias (bool): Whether to render with antialiasing.
+            color (Tuple[int, ...]): The text color.
+        """
+        key = (font, text, tuple(color), antialias)
+        surface = cls._surfaces.get(key)
+        if surface is not None:
+            cls._surfaces.move_to_end(key)
+            cls.hit_count += 1
+            return surface
+
+        cls.miss_count += 1
+        surface = font.render(text, antialias, color)
+        cls._surfaces[key] = surface
+        if len(cls._surfaces) > cls.capacity:
+            cls._surfaces.popitem(last=False)
+            cls.eviction_count += 1
+        return surface
+
+    @classmethod
+    def clear(cls):
+        """Drops all cached surfaces and resets the counters."""
+        cls._surfaces.clear()
+        cls.hit_count = 0
+        cls.miss_count = 0
+        cls.eviction_count = 0
+
+    @classmethod
+    def stats(cls) -> str:
+        """A one-line summary of the cache's hits, misses and evictions."""
+        requests = cls.hit_count + cls.miss_count
+        hit_rate = cls.hit_count / requests if requests else 0.0
+        return f"{cls.hit_count} hits, {cls.miss_count} misses ({hit_rate:.1%}), {cls.eviction_count} evictions, {len(cls._surfaces)}/{cls.capacity} cached"
@@ -0,0 +1,222 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from Customer import Customer
+
+
+class VectorizedCustomerEngine:
+    STATES = ("waiting_for_lift_selection", "walking_to_lift", "waiting_at_lift", "in_lift", "exiting_lift", "delivered")
+    WAITING_FOR_LIFT_SELECTION, WALKING_TO_LIFT, WAITING_AT_LIFT, IN_LIFT, EXITING_LIFT, DELIVERED = range(len(STATES))
+    _STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+    WANDERING_MARGIN = 100
+
+    def __init__(self, initial_capacity: int = 256):
+        """
+        A structure-of-arrays store that moves all customers of a level in one vectorized step.
+        Attached customers keep their usual API; their x and wandering_direction simply read from and
+        write to the arrays below, while state and is_active are kept as plain attributes and mirrored
+        in both directions, so Floor and Level don't notice the difference.
+
+        Args:
+            initial_capacity (int): The number of slots to allocate up front; grows on demand.
+        """
+        self.capacity = 0
+        self.x = np.zeros(0, dtype=np.float64)
+        self.state = np.zeros(0, dtype=np.int8)
+        self.speed = np.zeros(0, dtype=np.float64)
+        self.wandering_speed = np.zeros(0, dtype=np.float64)
+        self.direction = np.zeros(0, dtype=np.int8)
+        self.min_x = np.zeros(0, dtype=np.float64)
+        self.max_x = np.zeros(0, dtype=np.float64)
+        self.lift_index = np.zeros(0, dtype=np.int16)
+        self.exit_target_x = np.zeros(0, dtype=np.float64)
+        self.is_active = np.zeros(0, dtype=bool)
+        self.in_use = np.zeros(0, dtype=bool)
+        # The PopupHitIndex cell of wandering customers; a cell width of 0 marks customers that are not indexed
+        self.popup_cell = np.zeros(0, dtype=np.int64)
+        self.popup_cell_width = np.zeros(0, dtype=np.float64)
+
+        self.customers: List[Optional[Customer]] = []
+        self.free_slots: List[int] = []
+        self.lift_indices: Dict[str, int] = {}
+        self._grow(initial_capacity)
+
+    def _grow(self, new_capacity: int):
+        """Reallocates all arrays with room for new_capacity customers."""
+        extra = new_capacity - self.capacity
+        self.x = np.concatenate([self.x, np.zeros(extra, dtype=np.float64)])
+        self.state = np.concatenate([self.state, np.full(extra, self.DELIVERED, dtype=np.int8)])
+        self.speed = np.concatenate([self.speed, np.zeros(extra, dtype=np.float64)])
+        self.wandering_speed = np.concatenate([self.wandering_speed, np.zeros(extra, dtype=np.float64)])
+        self.direction = np.concatenate([self.direction, np.ones(extra, dtype=np.int8)])
+        self.min_x = np.concatenate([self.min_x, np.zeros(extra, dtype=np.float64)])
+        self.max_x = np.concatenate([self.max_x, np.zeros(extra, dtype=np.float64)])
+        self.lift_index = np.concatenate([self.lift_index, np.full(extra, -1, dtype=np.int16)])
+        self.exit_target_x = np.concatenate([self.exit_target_x, np.zeros(extra, dtype=np.float64)])
+        self.is_active = np.concatenate([self.is_active, np.zeros(extra, dtype=bool)])
+        self.in_use = np.concatenate([self.in_use, np.zeros(extra, dtype=bool)])
+        self.popup_cell = np.concatenate([self.popup_cell, np.zeros(extra, dtype=np.int64)])
+        self.popup_cell_width = np.concatenate([self.popup_cell_width, np.zeros(extra, dtype=np.float64)])
+
+        self.customers.extend([None] * extra)
+        # Pop from the end, so lower slots get used first
+        self.free_slots.extend(reversed(range(self.capacity, new_capacity)))
+        self.capacity = new_capacity
+
+    def attach(self, customer: Customer):
+        """Moves a customer's movement state into the arrays. From now on, update() moves the customer."""
+        if not self.free_slots:
+            self._grow(max(1, self.capacity * 2))
+        slot = self.free_slots.pop()
+
+        self.x[slot] = customer.x
+        self.state[slot] = self._STATE_CODES[customer.state]
+        self.speed[slot] = customer.speed
+        self.wandering_speed[slot] = customer.wandering_speed
+        self.direction[slot] = customer.wandering_direction
+        self.min_x[slot] = self.WANDERING_MARGIN
+        self.max_x[slot] = customer.floor_width - self.WANDERING_MARGIN - customer.width
+        self.lift_index[slot] = self._get_lift_index(customer.selected_lift) if customer.selected_lift else -1
+        self.exit_target_x[slot] = customer.target_spawn_x if customer.target_spawn_x else customer.spawn_x
+        self.is_active[slot] = customer.is_active
+        self.in_use[slot] = True
+        if customer.popup_index is not None:
+            self.popup_cell[slot] = customer.popup_index.cell_of(customer.x)
+            self.popup_cell_width[slot] = customer.popup_index.cell_width
+        else:
+            self.popup_cell_width[slot] = 0
+
+        self.customers[slot] = customer
+        customer.attach_to_engine(self, slot)
+
+    def detach(self, customer: Customer):
+        """Hands the movement state back to the customer object and frees its slot."""
+        slot = customer._slot
+        if customer._engine is not self or slot < 0:
+            return
+        customer.detach_from_engine(float(self.x[slot]), int(self.direction[slot]))
+        self.in_use[slot] = False
+        self.state[slot] = self.DELIVERED
+        self.customers[slot] = None
+        self.free_slots.append(slot)
+
+    def attached_count(self) -> int:
+        """Returns the number of customers currently moved by this engine."""
+        return self.capacity - len(self.free_slots)
+
+    def set_state(self, slot: int, state: str):
+        self.state[slot] = self._STATE_CODES[state]
+
+    def set_lift(self, slot: int, lift_name: str):
+        self.lift_index[slot] = self._get_lift_index(lift_name)
+
+    def set_exit_target(self, slot: int, target_x: float):
+        self.exit_target_x[slot] = target_x
+
+    def _lift_x(self, lift_positions: Dict[str, int]) -> np.ndarray:
+        """The lift positions as an array indexed like lift_index."""
+        for name in lift_positions:
+            self._get_lift_index(name)
+        lift_x = np.zeros(max(1, len(self.lift_indices)), dtype=np.float64)
+        for name, position in lift_positions.items():
+            lift_x[self.lift_indices[name]] = position
+        return lift_x
+
+    def _get_lift_index(self, lift_name: str) -> int:
+        if lift_name not in self.lift_indices:
+            self.lift_indices[lift_name] = len(self.lift_indices)
+        return self.lift_indices[lift_name]
+
+    def update(self, lift_positions: Dict[str, int]):
+        """
+        Advances every attached customer by one frame; the vectorized equivalent of Customer.update().
+
+        Args:
+            lift_positions (Dict[str, int]): The x coordinate of every lift's center, by lift name.
+        """
+        lift_x = self._lift_x(lift_positions)
+
+        # Wandering, until the player picks a lift
+        wandering = (self.state == self.WAITING_FOR_LIFT_SELECTION) & ~self.is_active
+        if wandering.any():
+            x = self.x[wandering] + self.wandering_speed[wandering] * self.direction[wandering]
+            direction = self.direction[wandering]
+            too_far_left = x < self.min_x[wandering]
+            too_far_right = ~too_far_left & (x > self.max_x[wandering])
+            x = np.where(too_far_left, self.min_x[wandering], np.where(too_far_right, self.max_x[wandering], x))
+            direction = np.where(too_far_left, 1, np.where(too_far_right, -1, direction)).astype(np.int8)
+            self.x[wandering] = x
+            self.direction[wandering] = direction
+            self._move_in_popup_index(np.flatnonzero(wandering))
+
+        # Walking to the selected lift
+        walking = (self.state == self.WALKING_TO_LIFT) & (self.lift_index >= 0)
+        if walking.any():
+            self._walk(walking, lift_x[self.lift_index[walking]], self.WAITING_AT_LIFT)
+
+        # Walking away from the lift on the target floor
+        exiting = self.state == self.EXITING_LIFT
+        if exiting.any():
+            self._walk(exiting, self.exit_target_x[exiting], self.DELIVERED)
+
+    def _walk_targets(self, lift_positions: Dict[str, int]):
+        """The slots of the walking customers, whether they walk to a lift or away from one, and where they walk to."""
+        lift_x = self._lift_x(lift_positions)
+        walking = (self.state == self.WALKING_TO_LIFT) & (self.lift_index >= 0)
+        exiting = self.state == self.EXITING_LIFT
+        slots = np.flatnonzero(walking | exiting)
+        target_x = np.where(walking[slots], lift_x[np.maximum(self.lift_index[slots], 0)], self.exit_target_x[slots])
+        return slots, target_x
+
+    def frames_until_next_event(self, lift_positions: Dict[str, int]) -> Optional[int]:
+        """
+        The vectorized equivalent of Customer.frames_until_next_event() over all attached customers: the number of
+        upcoming update() calls before the first one in which a customer changes state, or None if none will.
+        """
+        if ((self.state == self.WAITING_FOR_LIFT_SELECTION) & ~self.is_active & self.in_use).any():
+            return 0
+        slots, target_x = self._walk_targets(lift_positions)
+        if not len(slots):
+            return None
+        return int((np.abs(self.x[slots] - target_x) // self.speed[slots]).min())
+
+    def skip_frames(self, frames: int, lift_positions: Dict[str, int]):
+        """Does what the given number of update() calls would do, given that no customer changes state in them."""
+        slots, target_x = self._walk_targets(lift_positions)
+        if frames <= 0 or not len(slots):
+            return
+        x = self.x[slots]
+        step = frames * self.speed[slots]
+        self.x[slots] = np.where(x < target_x, x + step, x - step)
+
+    def _move_in_popup_index(self, slots: np.ndarray):
+        """Moves the given wandering customers to their new PopupHitIndex cell, for those that crossed into one."""
+        slots = slots[self.popup_cell_width[slots] > 0]
+        cells = np.floor_divide(self.x[slots], self.popup_cell_width[slots]).astype(np.int64)
+        changed = cells != self.popup_cell[slots]
+        if not changed.any():
+            return
+        self.popup_cell[slots[changed]] = cells[changed]
+        for slot in slots[changed].tolist():
+            customer = self.customers[slot]
+            if customer.popup_index is not None:
+                customer.popup_index.move(customer)
+
+    def _walk(self, mask: np.ndarray, target_x: np.ndarray, arrived_state: int):
+        """Moves the masked customers towards target_x, switching those that arrive to arrived_state."""
+        slots = np.flatnonzero(mask)
+        x = self.x[slots]
+        speed = self.speed[slots]
+        arrived = np.abs(x - target_x) < speed
+        step = np.where(x < target_x, speed, -speed)
+        self.x[slots] = np.where(arrived, target_x, x + step)
+
+        # Only the customers that arrived change state, so only they are written back to the objects
+        arrived_slots = slots[arrived]
+        self.state[arrived_slots] = arrived_state
+        state_name = self.STATES[arrived_state]
+        for slot in arrived_slots.tolist():
+            self.customers[slot].sync_state(state_name)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from Level import Level
+    from Customer import Customer
+
+
+class AssignmentPolicy(ABC):
+    @abstractmethod
+    def choose_lift(self, level: Level, customer: Customer) -> Optional[str]:
+        """
+        Picks the lift a newly spawned customer should be sent to, in place of the player, from the lifts that
+        serve both its floor and its target floor (Level.get_lifts_serving()).
+
+        Args:
+            level (Level): The level the customer belongs to.
+            customer (Customer): A customer that is waiting for lift selection.
+
+        Returns:
+            Optional[str]: The name of the chosen lift, or None to leave the customer unassigned.
+        """
+        pass
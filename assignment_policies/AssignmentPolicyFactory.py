@@ -0,0 +1,33 @@
+from typing import Callable, Dict, List
+from assignment_policies.AssignmentPolicy import AssignmentPolicy
+from assignment_policies.NearestLiftPolicy import NearestLiftPolicy
+from assignment_policies.RoundRobinPolicy import RoundRobinPolicy
+from assignment_policies.LeastLoadedLiftPolicy import LeastLoadedLiftPolicy
+
+
+class AssignmentPolicyFactory:
+    _POLICIES: Dict[str, Callable[[], AssignmentPolicy]] = {
+        "nearest": NearestLiftPolicy,
+        "round_robin": RoundRobinPolicy,
+        "least_loaded": LeastLoadedLiftPolicy,
+    }
+
+    @staticmethod
+    def names() -> List[str]:
+        """Returns the names of all known assignment policies."""
+        return list(AssignmentPolicyFactory._POLICIES.keys())
+
+    @staticmethod
+    def create(name: str) -> AssignmentPolicy:
+        """
+        Creates a fresh assignment policy by name.
+
+        Args:
+            name (str): One of the names returned by names().
+
+        Returns:
+            AssignmentPolicy: A new policy instance.
+        """
+        if name not in AssignmentPolicyFactory._POLICIES:
+            raise ValueError(f"Unknown assignment policy '{name}'. Known policies: {', '.join(AssignmentPolicyFactory.names())}")
+        return AssignmentPolicyFactory._POLICIES[name]()
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from assignment_policies.AssignmentPolicy import AssignmentPolicy
+
+if TYPE_CHECKING:
+    from Level import Level
+    from Customer import Customer
+
+
+class LeastLoadedLiftPolicy(AssignmentPolicy):
+    """
+    Sends each customer to the lift with the fewest customers inside and waiting for it.
+    """
+    def choose_lift(self, level: Level, customer: Customer) -> Optional[str]:
+        lifts = level.get_lifts_serving(customer.current_floor, customer.target_floor)
+        if not lifts:
+            return None
+        best_lift = min(lifts, key=lambda lift: len(lift.customers_inside) + sum(len(waiting) for waiting in lift.waiting_customers.values()))
+        return best_lift.name
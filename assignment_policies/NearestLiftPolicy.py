@@ -0,0 +1,20 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from assignment_policies.AssignmentPolicy import AssignmentPolicy
+
+if TYPE_CHECKING:
+    from Level import Level
+    from Customer import Customer
+
+
+class NearestLiftPolicy(AssignmentPolicy):
+    """
+    Sends each customer to the lift that is currently closest to the customer's floor.
+    Ties are broken by the number of stops the lift has already planned.
+    """
+    def choose_lift(self, level: Level, customer: Customer) -> Optional[str]:
+        lifts = level.get_lifts_serving(customer.current_floor, customer.target_floor)
+        if not lifts:
+            return None
+        best_lift = min(lifts, key=lambda lift: (abs(lift.current_floor - customer.current_floor), len(lift.target_sequence)))
+        return best_lift.name
@@ -0,0 +1,23 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from assignment_policies.AssignmentPolicy import AssignmentPolicy
+
+if TYPE_CHECKING:
+    from Level import Level
+    from Customer import Customer
+
+
+class RoundRobinPolicy(AssignmentPolicy):
+    """
+    Sends customers to the lifts in turn, regardless of where the lifts are.
+    """
+    def __init__(self):
+        self.next_index = 0
+
+    def choose_lift(self, level: Level, customer: Customer) -> Optional[str]:
+        lifts = level.get_lifts_serving(customer.current_floor, customer.target_floor)
+        if not lifts:
+            return None
+        lift = lifts[self.next_index % len(lifts)]
+        self.next_index += 1
+        return lift.name
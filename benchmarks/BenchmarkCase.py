@@ -0,0 +1,21 @@
+from typing import Callable
+
+
+class BenchmarkCase:
+    def __init__(self, name: str, setup: Callable[[], Callable[[], object]], number: int, inner: int = 1):
+        """
+        One benchmark: what to build untimed, and what to time on it.
+
+        Args:
+            name (str): The name results are reported and compared under, e.g. "floor.update[customers=100]".
+            setup (Callable[[], Callable[[], object]]): Builds fresh state for a round, untimed, and returns the
+                callable to time on it.
+            number (int): How often the callable is called per round. Rounds always start from a fresh setup, so
+                a benchmark that changes its state (such as stepping a level) times the same frames every round.
+            inner (int): How many operations one call performs, for callables that loop over several inputs
+                themselves; times are reported per operation.
+        """
+        self.name = name
+        self.setup = setup
+        self.number = number
+        self.inner = inner
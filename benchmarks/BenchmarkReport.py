@@ -0,0 +1,128 @@
+import json
+import os
+import platform
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pygame as pg
+from benchmarks.BenchmarkResult import BenchmarkResult
+
+# Name, baseline median, current median (both None if the benchmark is missing on that side), ratio, status
+Comparison = Tuple[str, Optional[float], Optional[float], Optional[float], str]
+
+
+class BenchmarkReport:
+    FORMAT_VERSION = 1
+
+    def __init__(self, results: List[BenchmarkResult], environment: Optional[Dict[str, Any]] = None, created_epoch_seconds: Optional[int] = None):
+        """
+        The results of one benchmark run, along with the environment they were measured in, as saved to JSON.
+
+        Args:
+            results (List[BenchmarkResult]): The results, in run order.
+            environment (Optional[Dict[str, Any]]): Python, library and machine details; the current ones if None.
+            created_epoch_seconds (Optional[int]): When the run was made; now if None.
+        """
+        self.results = results
+        self.environment = environment if environment is not None else self.current_environment()
+        self.created_epoch_seconds = created_epoch_seconds if created_epoch_seconds is not None else int(time.time())
+
+    @staticmethod
+    def current_environment() -> Dict[str, Any]:
+        return {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "pygame": pg.version.ver,
+            "sdl": ".".join(str(part) for part in pg.get_sdl_version()),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.FORMAT_VERSION,
+            "created_epoch_seconds": self.created_epoch_seconds,
+            "environment": self.environment,
+            "unit": "seconds per operation",
+            "benchmarks": [result.to_dict() for result in self.results]
+        }
+
+    def save(self, path: str):
+        """Writes the report as JSON, creating the directory if needed."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: str) -> 'BenchmarkReport':
+        """Reads a report saved by save(); raises ValueError for a report of another format version."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get("version") != BenchmarkReport.FORMAT_VERSION:
+            raise ValueError(f"unsupported benchmark report version {data.get('version')}")
+        return BenchmarkReport(
+            results=[BenchmarkResult.from_dict(result) for result in data["benchmarks"]],
+            environment=data.get("environment", {}),
+            created_epoch_seconds=data.get("created_epoch_seconds")
+        )
+
+    def compare(self, baseline: 'BenchmarkReport', threshold: float) -> List[Comparison]:
+        """
+        Compares the median of every benchmark against the baseline.
+
+        Args:
+            baseline (BenchmarkReport): The report to compare against.
+            threshold (float): The relative change that counts, e.g. 0.1 for 10 %. Slower than that is "regressed",
+                faster is "improved", anything in between "unchanged".
+
+        Returns:
+            List[Comparison]: One row per benchmark in either report: this run's first, in run order, then the ones
+            only the baseline has, with status "new" or "missing" respectively.
+        """
+        baseline_medians = {result.name: result.median for result in baseline.results}
+        comparisons: List[Comparison] = []
+        for result in self.results:
+            baseline_median = baseline_medians.pop(result.name, None)
+            if baseline_median is None:
+                comparisons.append((result.name, None, result.median, None, "new"))
+                continue
+            ratio = result.median / baseline_median if baseline_median > 0 else float('inf')
+            if ratio > 1.0 + threshold:
+                status = "regressed"
+            elif ratio < 1.0 - threshold:
+                status = "improved"
+            else:
+                status = "unchanged"
+            comparisons.append((result.name, baseline_median, result.median, ratio, status))
+        for name, baseline_median in baseline_medians.items():
+            comparisons.append((name, baseline_median, None, None, "missing"))
+        return comparisons
+
+    @staticmethod
+    def format_time(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return "-"
+        for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+            if seconds >= scale:
+                return f"{seconds / scale:.3f} {unit}"
+        return f"{seconds / 1e-9:.1f} ns"
+
+    @staticmethod
+    def format_comparison_table(comparisons: List[Comparison]) -> str:
+        """Formats a comparison as an aligned text table."""
+        header = ("Benchmark", "Baseline", "Current", "Change", "Status")
+        rows = [header]
+        for name, baseline_median, current_median, ratio, status in comparisons:
+            change = f"{(ratio - 1.0) * 100:+.1f}%" if ratio is not None else "-"
+            rows.append((name, BenchmarkReport.format_time(baseline_median), BenchmarkReport.format_time(current_median), change, status))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = ["  ".join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))) for row in rows]
+        lines.insert(1, "-" * len(lines[0]))
+        return "\n".join(lines)
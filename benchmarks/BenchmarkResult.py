@@ -0,0 +1,57 @@
+import statistics
+from typing import Any, Dict, List
+
+
+class BenchmarkResult:
+    def __init__(self, name: str, rounds: int, number: int, min: float, median: float, mean: float, stdev: float):
+        """
+        The timings of one benchmark, in seconds per operation.
+
+        Args:
+            name (str): The name of the benchmark, see BenchmarkCase.
+            rounds (int): The number of timed rounds.
+            number (int): The number of operations per round.
+            min (float): The fastest round.
+            median (float): The median round; this is what baselines are compared on.
+            mean (float): The mean over all rounds.
+            stdev (float): The standard deviation over all rounds.
+        """
+        self.name = name
+        self.rounds = rounds
+        self.number = number
+        self.min = min
+        self.median = median
+        self.mean = mean
+        self.stdev = stdev
+
+    @staticmethod
+    def from_round_times(name: str, round_times: List[float], number: int) -> 'BenchmarkResult':
+        """Summarizes the wall times of whole rounds of number operations each."""
+        per_operation = [round_time / number for round_time in round_times]
+        return BenchmarkResult(
+            name=name,
+            rounds=len(per_operation),
+            number=number,
+            min=min(per_operation),
+            median=statistics.median(per_operation),
+            mean=statistics.fmean(per_operation),
+            stdev=statistics.stdev(per_operation) if len(per_operation) > 1 else 0.0
+        )
+
+    def operations_per_second(self) -> float:
+        return 1.0 / self.median if self.median > 0 else float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'BenchmarkResult':
+        return BenchmarkResult(
+            name=str(data['name']),
+            rounds=int(data['rounds']),
+            number=int(data['number']),
+            min=float(data['min']),
+            median=float(data['median']),
+            mean=float(data['mean']),
+            stdev=float(data['stdev'])
+        )
@@ -0,0 +1,62 @@
+import gc
+import time
+from typing import Callable, List, Optional
+from benchmarks.BenchmarkCase import BenchmarkCase
+from benchmarks.BenchmarkResult import BenchmarkResult
+
+
+class BenchmarkRunner:
+    def __init__(self, rounds: int = 7, warmup_rounds: int = 1):
+        """
+        Times BenchmarkCases round by round, with the garbage collector off while a round is timed (as timeit does),
+        so a collection triggered by one benchmark's garbage doesn't land in another's timings.
+
+        Args:
+            rounds (int): Timed rounds per benchmark.
+            warmup_rounds (int): Untimed rounds run first, to fill caches (fonts, rendered text, compiled levels).
+        """
+        self.rounds = rounds
+        self.warmup_rounds = warmup_rounds
+
+    def run_case(self, case: BenchmarkCase) -> BenchmarkResult:
+        """Runs the warm-up and timed rounds of one benchmark, each on a fresh setup."""
+        round_times = []
+        for round_index in range(self.warmup_rounds + self.rounds):
+            round_time = self._time_round(case)
+            if round_index >= self.warmup_rounds:
+                round_times.append(round_time)
+        return BenchmarkResult.from_round_times(case.name, round_times, case.number * case.inner)
+
+    @staticmethod
+    def _time_round(case: BenchmarkCase) -> float:
+        function = case.setup()
+        gc.collect()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(case.number):
+                function()
+            return time.perf_counter() - start
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def run(self, cases: List[BenchmarkCase], on_result: Optional[Callable[[BenchmarkResult], None]] = None) -> List[BenchmarkResult]:
+        """
+        Runs all benchmarks in order.
+
+        Args:
+            cases (List[BenchmarkCase]): The benchmarks to run.
+            on_result (Optional[Callable[[BenchmarkResult], None]]): Called with every result as soon as it is ready.
+
+        Returns:
+            List[BenchmarkResult]: The results, in the order of the cases.
+        """
+        results = []
+        for case in cases:
+            result = self.run_case(case)
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results
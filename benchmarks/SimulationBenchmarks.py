@@ -0,0 +1,254 @@
+import csv
+import os
+import random
+from typing import Callable, List, Tuple
+import pygame as pg
+from Customer import Customer
+from DeterministicCustomerFactory import DeterministicCustomerFactory
+from Floor import Floor
+from GameEvents import GameEvents
+from GameHistoryPersistence import GameHistoryPersistence
+from HeadlessLevelRunner import HeadlessLevelRunner
+from Level import Level
+from LevelsLoader import LevelsLoader
+from Lift import Lift
+from RawCustomerData import RawCustomerData
+from SqliteGameHistoryPersistence import SqliteGameHistoryPersistence
+from SyntheticLevelGenerator import SyntheticLevelGenerator
+from VectorizedCustomerEngine import VectorizedCustomerEngine
+from assignment_policies.AssignmentPolicyFactory import AssignmentPolicyFactory
+from benchmarks.BenchmarkCase import BenchmarkCase
+
+
+class SimulationBenchmarks:
+    # Game constants, same as in LiftUpGame
+    SCREEN_WIDTH = 800
+    TOP_PADDING = 50
+    GAME_HEIGHT = 800
+    STATUS_BAR_HEIGHT = 100
+    DT = 1.0 / 60
+    LIFT_POSITIONS = {"A": 320, "B": 420}
+
+    # Synthetic levels written to the work directory: a busy one to play and draw, a long one to load, and the busy
+    # one's arrivals in a tall building with many lifts
+    DENSE_LEVEL_NUM = 1
+    LARGE_LEVEL_NUM = 2
+    TOWER_LEVEL_NUM = 3
+    TOWER_FLOORS = 120
+    TOWER_LIFTS = 16
+    LARGE_LEVEL_SPAWNS = 50_000
+    # Simulated seconds the dense level is played before its frames are timed, so the lifts and floors are busy
+    DENSE_LEVEL_WARMUP_SECONDS = 60.0
+    # Simulated seconds a level is played for at most when finding the frame it completes in
+    MAX_LEVEL_SECONDS = 3600.0
+
+    def __init__(self, levels_root_path: str, work_dir: str):
+        """
+        The benchmarks of the simulation and render hot paths. Fixtures (synthetic levels, large history files) are
+        written to work_dir the first time a benchmark needs them.
+
+        Args:
+            levels_root_path (str): The game's levels, for benchmarks on the real levels.
+            work_dir (str): An empty scratch directory.
+        """
+        self.levels_root_path = levels_root_path
+        self.work_dir = work_dir
+        self.synthetic_levels_path = os.path.join(work_dir, "levels")
+
+    def cases(self) -> List[BenchmarkCase]:
+        """All benchmarks, cheapest first within each group."""
+        cases = []
+        for floors, customers, number in ((5, 20, 3000), (20, 200, 600), (60, 1000, 200)):
+            cases.append(BenchmarkCase(f"lift.update_target_sequence[floors={floors},customers={customers}]", lambda floors=floors, customers=customers: self._setup_target_sequence(floors, customers), number))
+        cases.append(BenchmarkCase("lift.find_best_stop[floors=60]", self._setup_find_best_stop, 500, inner=64))
+        for customers, number in ((10, 3000), (100, 500), (1000, 60)):
+            cases.append(BenchmarkCase(f"floor.update[customers={customers}]", lambda customers=customers: self._setup_floor_update(customers, vectorized=False), number))
+            cases.append(BenchmarkCase(f"customer_engine.update[customers={customers}]", lambda customers=customers: self._setup_floor_update(customers, vectorized=True), number))
+        # Level 5 is timed from its start to the frame it completes in; frames after that return straight away
+        cases.append(BenchmarkCase("level.step[level=5]", lambda: self._setup_level_step(self.levels_root_path, 5, warmup_seconds=0.0), self._frames_until_complete(self.levels_root_path, 5)))
+        cases.append(BenchmarkCase("level.step[level=dense]", lambda: self._setup_level_step(self.synthetic_levels_path, self._dense_level(), self.DENSE_LEVEL_WARMUP_SECONDS), 1200))
+        cases.append(BenchmarkCase("level.step[level=tower]", lambda: self._setup_level_step(self.synthetic_levels_path, self._tower_level(), self.DENSE_LEVEL_WARMUP_SECONDS), 1200))
+        for name, level in (("dense", self._dense_level), ("tower", self._tower_level)):
+            cases.append(BenchmarkCase(f"level.draw[level={name}]", lambda level=level: self._setup_level_draw(level(), dirty_rects=False), 100))
+            cases.append(BenchmarkCase(f"level.draw_dirty[level={name}]", lambda level=level: self._setup_level_draw(level(), dirty_rects=True), 100))
+        cases.append(BenchmarkCase("levels_loader.load[level=5,source=csv]", lambda: self._setup_load(self.levels_root_path, 5, use_compiled_cache=False, streaming=False), 200))
+        for source in ("csv", "compiled", "streaming"):
+            cases.append(BenchmarkCase(f"levels_loader.load[spawns={self.LARGE_LEVEL_SPAWNS},source={source}]",
+                                       lambda source=source: self._setup_load(self.synthetic_levels_path, self._large_level(), use_compiled_cache=source == "compiled", streaming=source == "streaming"), 1))
+        for rows, number in ((1_000, 50), (10_000, 5), (100_000, 1)):
+            cases.append(BenchmarkCase(f"game_history.read_all[rows={rows}]", lambda rows=rows: self._setup_history_read_all(rows, sqlite=False), number))
+            cases.append(BenchmarkCase(f"sqlite_game_history.read_all[rows={rows}]", lambda rows=rows: self._setup_history_read_all(rows, sqlite=True), number))
+        return cases
+
+    @staticmethod
+    def _create_customer(factory: DeterministicCustomerFactory, floor: int, x: int, target_floor: int, total_floors: int) -> Customer:
+        spawn_data = RawCustomerData(0.0, f"{floor}-1", random.choice(["HIGH", "LOW"]), target_floor)
+        return factory.create_customer(spawn_data, 0.0, floor, x, total_floors, SimulationBenchmarks.SCREEN_WIDTH)
+
+    @staticmethod
+    def _random_target_floor(floor: int, total_floors: int) -> int:
+        """A random floor other than the given one."""
+        target_floor = random.randrange(total_floors - 1)
+        return target_floor + 1 if target_floor >= floor else target_floor
+
+    def _setup_target_sequence(self, floors: int, customers: int) -> Callable[[], None]:
+        """A lift with customers waiting on random floors; times planning all its stops from scratch."""
+        random.seed(0)
+        factory = DeterministicCustomerFactory([])
+        lift = Lift("A", self.LIFT_POSITIONS["A"], floors, self.GAME_HEIGHT // floors)
+        for _ in range(customers):
+            floor = random.randrange(floors)
+            customer = self._create_customer(factory, floor, 150, self._random_target_floor(floor, floors), floors)
+            customer.select_lift(lift.name, 0.0)
+            lift.add_customer_request(customer)
+        return lift._update_target_sequence
+
+    def _setup_find_best_stop(self) -> Callable[[], None]:
+        """Random planner states on 60 floors, an eighth of them with nothing to deliver; times one decision on each."""
+        random.seed(0)
+        floors = 60
+        lift = Lift("A", self.LIFT_POSITIONS["A"], floors, self.GAME_HEIGHT // floors)
+        states = []
+        for i in range(64):
+            delivery_mask = 0 if i % 8 == 0 else random.getrandbits(floors)
+            request_queue = random.sample(range(floors), random.randrange(1, floors))
+            states.append((random.randrange(floors), random.choice(["up", "down"]), delivery_mask, random.getrandbits(floors), random.getrandbits(floors), request_queue))
+        find_best_stop = lift._find_best_stop
+
+        def run():
+            for state in states:
+                find_best_stop(*state)
+        return run
+
+    def _setup_floor_update(self, customers: int, vectorized: bool) -> Callable[[], None]:
+        """
+        A floor with customers spread over its width, half of them wandering and half walking to a lift; times one
+        frame of moving them, by Floor.update or, vectorized, by the engine's update that replaces it.
+        """
+        random.seed(0)
+        factory = DeterministicCustomerFactory([])
+        engine = VectorizedCustomerEngine() if vectorized else None
+        floor = Floor(0, self.TOP_PADDING, self.SCREEN_WIDTH, self.GAME_HEIGHT // 5, 5, self.SCREEN_WIDTH // 2, file_factory=factory, customer_engine=engine)
+        for i in range(customers):
+            customer = self._create_customer(factory, 0, random.randrange(20, self.SCREEN_WIDTH - 20), random.randrange(1, 5), 5)
+            floor.add_spawned_customer(customer)
+            if i % 2:
+                customer.select_lift(random.choice(["A", "B"]), 0.0)
+
+        if engine:
+            return lambda: engine.update(self.LIFT_POSITIONS)
+        return lambda: floor.update(self.DT, 0.0, self.LIFT_POSITIONS)
+
+    def _create_level(self, levels_root_path: str, level_num: int) -> Level:
+        return Level(
+            raw_data=LevelsLoader(levels_root_path).load(level_num),
+            screen_width=self.SCREEN_WIDTH,
+            game_height=self.GAME_HEIGHT,
+            top_padding=self.TOP_PADDING,
+            status_bar_height=self.STATUS_BAR_HEIGHT
+        )
+
+    def _play_level(self, levels_root_path: str, level_num: int, warmup_seconds: float) -> Tuple[Level, Callable[[], None]]:
+        """
+        Starts a level with the nearest lift policy assigning customers, as HeadlessLevelRunner plays it, and plays it
+        for warmup_seconds. Returns the level and the function that plays one more frame.
+        """
+        random.seed(0)
+        level = self._create_level(levels_root_path, level_num)
+        policy = AssignmentPolicyFactory.create("nearest")
+        new_customers: List[Customer] = []
+        level.event_bus.subscribe(GameEvents.CUSTOMER_SPAWNED, new_customers.append)
+
+        def play_frame():
+            level.step(self.DT)
+            HeadlessLevelRunner._assign_new_customers(level, policy, new_customers)
+
+        while level.level_time < warmup_seconds:
+            play_frame()
+        return level, play_frame
+
+    def _frames_until_complete(self, levels_root_path: str, level_num: int) -> int:
+        """
+        The number of frames _play_level plays a level for until it is complete. Levels are seeded and assigned the
+        same way every round, so every round completes in the same frame.
+        """
+        level, play_frame = self._play_level(levels_root_path, level_num, warmup_seconds=0.0)
+        frames = 0
+        while not level.is_complete and level.level_time < self.MAX_LEVEL_SECONDS:
+            play_frame()
+            frames += 1
+        level.close()
+        return frames
+
+    def _setup_level_step(self, levels_root_path: str, level_num: int, warmup_seconds: float) -> Callable[[], None]:
+        """Times Level.step, the simulation part of Level.update, which otherwise waits for the frame clock."""
+        _, play_frame = self._play_level(levels_root_path, level_num, warmup_seconds)
+        return play_frame
+
+    def _setup_level_draw(self, level_num: int, dirty_rects: bool) -> Callable[[], None]:
+        """Times drawing one frame of a busy synthetic level onto the display surface, without presenting it."""
+        screen = pg.display.get_surface()
+        if screen is None:
+            screen = pg.display.set_mode((self.SCREEN_WIDTH, self.TOP_PADDING + self.GAME_HEIGHT + self.STATUS_BAR_HEIGHT))
+        level, _ = self._play_level(self.synthetic_levels_path, level_num, self.DENSE_LEVEL_WARMUP_SECONDS)
+        # The first frame is always drawn in full; dirty drawing is timed on the frames after it
+        level.draw(screen)
+        if dirty_rects:
+            level.draw_dirty(screen)
+            return lambda: level.draw_dirty(screen)
+        return lambda: level.draw(screen)
+
+    @staticmethod
+    def _setup_load(levels_root_path: str, level_num: int, use_compiled_cache: bool, streaming: bool) -> Callable[[], None]:
+        loader = LevelsLoader(levels_root_path, use_compiled_cache=use_compiled_cache)
+        if use_compiled_cache:
+            # Compiles the level, if it wasn't already
+            loader.load(level_num)
+        if streaming:
+            # The spawns are only read as they are consumed
+            return lambda: sum(1 for _ in loader.load(level_num, streaming=True).customer_spawns)
+        return lambda: loader.load(level_num)
+
+    def _setup_history_read_all(self, rows: int, sqlite: bool) -> Callable[[], None]:
+        history_path = self._history_dir(rows)
+        if sqlite:
+            # Importing the CSV is a one-off, done when the database is first opened
+            persistence = SqliteGameHistoryPersistence(history_path)
+        else:
+            persistence = GameHistoryPersistence(history_path)
+        return persistence.read_all
+
+    def _dense_level(self) -> int:
+        """Ten minutes of Poisson arrivals, a customer every half second on average, from two spawn locations per floor."""
+        self._write_level(self.DENSE_LEVEL_NUM, SyntheticLevelGenerator(1200, 600.0, seed=self.DENSE_LEVEL_NUM))
+        return self.DENSE_LEVEL_NUM
+
+    def _tower_level(self) -> int:
+        """The dense level's arrivals spread over TOWER_FLOORS floors, served by TOWER_LIFTS lifts."""
+        self._write_level(self.TOWER_LEVEL_NUM, SyntheticLevelGenerator(1200, 600.0, num_floors=self.TOWER_FLOORS, lift_count=self.TOWER_LIFTS, seed=self.DENSE_LEVEL_NUM))
+        return self.TOWER_LEVEL_NUM
+
+    def _large_level(self) -> int:
+        self._write_level(self.LARGE_LEVEL_NUM, SyntheticLevelGenerator(self.LARGE_LEVEL_SPAWNS, 5000.0, seed=self.LARGE_LEVEL_NUM))
+        return self.LARGE_LEVEL_NUM
+
+    def _write_level(self, level_num: int, generator: SyntheticLevelGenerator):
+        """Generates a level, unless it was generated before."""
+        if not os.path.isdir(os.path.join(self.synthetic_levels_path, f"level_{level_num}")):
+            generator.write(self.synthetic_levels_path, level_num)
+
+    def _history_dir(self, rows: int) -> str:
+        """A history directory holding a CSV file of the given number of runs, spread over five levels and a year."""
+        history_path = os.path.join(self.work_dir, f"history_{rows}")
+        if os.path.isdir(history_path):
+            return history_path
+        os.makedirs(history_path)
+        rng = random.Random(rows)
+        with open(os.path.join(history_path, "game_history.csv"), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp_epoch_seconds", "level", "penalty"])
+            timestamp = 1_700_000_000
+            for _ in range(rows):
+                timestamp += rng.randrange(1, 600)
+                writer.writerow([timestamp, f"level_{rng.randrange(1, 6)}", round(rng.uniform(100.0, 2000.0), 2)])
+        return history_path
@@ -0,0 +1,97 @@
+"""
+Times the simulation and render hot paths and compares them against a saved baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                      # run all, compare against the baseline if there is one
+    python -m benchmarks.run_benchmarks --save-baseline      # run all and make the result the new baseline
+    python -m benchmarks.run_benchmarks -k level. -k lift.   # only the benchmarks whose names contain a pattern
+
+Exits with status 1 if any benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# No window and no sound; must be set before pygame initializes its video and audio systems
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+from benchmarks.BenchmarkReport import BenchmarkReport
+from benchmarks.BenchmarkResult import BenchmarkResult
+from benchmarks.BenchmarkRunner import BenchmarkRunner
+from benchmarks.SimulationBenchmarks import SimulationBenchmarks
+
+DEFAULT_OUTPUT = os.path.join("data", "output", "benchmarks", "latest.json")
+DEFAULT_BASELINE = os.path.join("data", "output", "benchmarks", "baseline.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lift Up Game microbenchmarks")
+    parser.add_argument("-k", dest="patterns", action="append", help="Only run benchmarks whose names contain this; may be repeated.")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit.")
+    parser.add_argument("--rounds", type=int, default=7, help="Timed rounds per benchmark.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON file to write the results to.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON results to compare against, if the file exists.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to the baseline file.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown of the median that counts as a regression.")
+    return parser.parse_args()
+
+
+def print_result(result: BenchmarkResult):
+    print(f"{result.name:<58} median {BenchmarkReport.format_time(result.median):>12}  "
+          f"min {BenchmarkReport.format_time(result.min):>12}  stdev {BenchmarkReport.format_time(result.stdev):>12}")
+
+
+def main() -> int:
+    args = parse_args()
+    pg.init()
+
+    with tempfile.TemporaryDirectory(prefix="liftup_benchmarks_") as work_dir:
+        benchmarks = SimulationBenchmarks("data/levels", work_dir)
+        cases = [case for case in benchmarks.cases() if not args.patterns or any(pattern in case.name for pattern in args.patterns)]
+        if args.list:
+            for case in cases:
+                print(case.name)
+            return 0
+        if not cases:
+            print("No benchmarks match.")
+            return 0
+
+        results = BenchmarkRunner(rounds=args.rounds).run(cases, on_result=print_result)
+
+    pg.quit()
+    report = BenchmarkReport(results)
+    report.save(args.output)
+    print(f"Results written to {args.output}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        try:
+            baseline = BenchmarkReport.load(args.baseline)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read baseline '{args.baseline}': {e}")
+
+    regressed = False
+    if baseline and not args.save_baseline:
+        if baseline.environment != report.environment:
+            print("Note: the baseline was measured in a different environment; differences may not be regressions.")
+        # Benchmarks filtered out of this run are not reported as missing
+        comparisons = [row for row in report.compare(baseline, args.threshold) if row[4] != "missing" or not args.patterns]
+        print(BenchmarkReport.format_comparison_table(comparisons))
+        regressed = any(row[4] == "regressed" for row in comparisons)
+
+    if args.save_baseline:
+        if baseline and args.patterns:
+            # Only the benchmarks that were run are replaced
+            run_names = {result.name for result in results}
+            report = BenchmarkReport(results + [result for result in baseline.results if result.name not in run_names])
+        report.save(args.baseline)
+        print(f"Baseline written to {args.baseline}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,136 @@
+import argparse
+import glob
+import os
+import time
 from LiftUpGame import LiftUpGame
+from LevelsLoader import LevelsLoader
+from HeadlessLevelRunner import HeadlessLevelRunner
+from BatchScenarioRunner import BatchScenarioRunner
+from InputReplayRunner import InputReplayRunner
+from SyntheticLevelGenerator import SyntheticLevelGenerator
+from assignment_policies.AssignmentPolicyFactory import AssignmentPolicyFactory
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lift Up Game")
+    parser.add_argument("--headless", action="store_true", help="Run a level without a window, as fast as possible, with lifts assigned by a policy.")
+    parser.add_argument("--level", type=int, default=1, help="Level to run in headless mode.")
+    parser.add_argument("--policy", default="nearest", choices=AssignmentPolicyFactory.names(), help="Lift assignment policy for headless mode.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for headless mode and level generation.")
+    parser.add_argument("--fps", type=int, default=60, help="Simulated frames per second for headless mode.")
+    parser.add_argument("--vectorized", action="store_true", help="Move customers with the NumPy engine in headless and batch mode.")
+    parser.add_argument("--verify-lift-plans", action="store_true", help="Check incremental lift plans against a full recomputation in headless mode.")
+    parser.add_argument("--stream-spawns", action="store_true", help="Read the level's time-sorted spawns lazily in headless mode, for very long schedules.")
+    parser.add_argument("--event-driven", action="store_true", help="Jump between events instead of stepping every frame in headless and batch mode; same results, faster on levels with quiet stretches.")
+    parser.add_argument("--batch", action="store_true", help="Run every level with every seed and policy in a process pool and print a results table.")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="Random seeds for batch mode.")
+    parser.add_argument("--policies", nargs="+", default=AssignmentPolicyFactory.names(), choices=AssignmentPolicyFactory.names(), help="Lift assignment policies for batch mode.")
+    parser.add_argument("--levels", type=int, nargs="+", help="Levels for batch mode; all available levels by default.")
+    parser.add_argument("--workers", type=int, help="Worker processes for batch mode; one per CPU core by default.")
+    parser.add_argument("--dirty-rects", action="store_true", help="Only redraw and update the changed parts of the screen while playing.")
+    parser.add_argument("--history-backend", default="sqlite", choices=["sqlite", "csv"], help="Keep the game history in an SQLite database (importing the CSV once) or in the CSV file.")
+    parser.add_argument("--no-record", action="store_true", help="Don't save input logs of completed levels while playing.")
+    parser.add_argument("--replay", nargs="+", metavar="PATH", help="Replay input logs (files, or directories of them) headless and check their penalties.")
+    parser.add_argument("--profile", action="store_true", help="Time the phases of every frame while playing and print their p50/p95/p99 on exit; F3 toggles an overlay.")
+    parser.add_argument("--profile-overlay", action="store_true", help="Profile frames and show the overlay from the start.")
+    parser.add_argument("--profile-trace", metavar="PATH", help="Profile frames and write a Chrome/Perfetto trace JSON to PATH on exit.")
+    parser.add_argument("--generate-level", type=int, metavar="N", help="Generate a synthetic level as data/levels/level_N and exit.")
+    parser.add_argument("--spawns", type=int, default=100_000, help="Customers in the generated level.")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Seconds over which the generated level's customers arrive.")
+    parser.add_argument("--floors", type=int, default=5, help="Floors of the generated level.")
+    parser.add_argument("--lifts", type=int, default=2, help="Lifts of the generated level, all serving every floor.")
+    parser.add_argument("--spawn-locations-per-floor", type=int, default=2, help="Spawn locations on every floor of the generated level.")
+    parser.add_argument("--arrivals", default="poisson", choices=SyntheticLevelGenerator.ARRIVAL_PROCESSES, help="Arrival process of the generated level: constant rate, or with morning and evening peaks.")
+    parser.add_argument("--high-priority-share", type=float, default=0.3, help="Share of high priority customers in the generated level.")
+    parser.add_argument("--rush-hour-share", type=float, default=0.6, help="Share of the generated level's customers arriving in the rush hour peaks.")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the level to generate if it exists.")
+    parser.add_argument("--output", help="CSV file to write the per-run batch results to.")
+    return parser.parse_args()
+
+
+def run_headless(args):
+    runner = HeadlessLevelRunner(LevelsLoader("data/levels"), args.level, policy_name=args.policy, seed=args.seed, fps=args.fps, vectorized_customers=args.vectorized, verify_lift_plans=args.verify_lift_plans, streaming_spawns=args.stream_spawns, event_driven=args.event_driven)
+    result = runner.run()
+    status = "complete" if result.is_complete else "NOT complete"
+    print(f"Level {result.level_num} {status} with policy '{result.policy_name}' (seed {result.seed})")
+    print(f"  Final penalty:  {result.total_penalty:.2f}")
+    print(f"  Simulated time: {result.level_time:.1f}s in {result.frames} frames")
+    if args.verify_lift_plans:
+        print(f"  Lift plan mismatches: {result.plan_mismatches}")
+    print(f"  Wall time:      {result.wall_time:.3f}s ({result.simulated_seconds_per_wall_second():.1f} simulated s / wall s)")
+
+
+def run_batch(args):
+    runner = BatchScenarioRunner("data/levels", args.seeds, args.policies, level_nums=args.levels, workers=args.workers, vectorized_customers=args.vectorized, event_driven=args.event_driven)
+    results = runner.run()
+    print(BatchScenarioRunner.format_results_table(results))
+    print(f"{len(results)} runs on {runner.workers} workers in {runner.wall_time:.2f}s")
+    if args.output:
+        BatchScenarioRunner.write_csv(results, args.output)
+        print(f"Per-run results written to {args.output}")
+
+
+def run_replay(args):
+    log_paths = []
+    for path in args.replay:
+        log_paths.extend(sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path])
+
+    levels_loader = LevelsLoader("data/levels")
+    matching = 0
+    unreadable = 0
+    for log_path in log_paths:
+        # An unreadable or malformed log is reported and skipped, so it doesn't stop the other replays; errors
+        # inside the simulation are bugs and still stop the batch
+        try:
+            result = InputReplayRunner(levels_loader, log_path).run()
+        except (OSError, ValueError) as e:
+            unreadable += 1
+            print(f"{log_path}: could not replay ({type(e).__name__}: {e}) - SKIPPED")
+            continue
+        if result.matches():
+            matching += 1
+            status = "ok"
+        else:
+            status = f"STOPPED, desync ({result.desync})" if result.desync else "CHANGED"
+        print(f"{log_path}: level {result.level_num}, recorded {result.recorded_penalty:.2f}, replayed {result.replayed_penalty:.2f} "
+              f"in {result.frames} frames, {result.wall_time:.3f}s - {status}")
+    print(f"{matching} of {len(log_paths)} replays reproduced their recorded penalty" + (f", {unreadable} could not be replayed" if unreadable else ""))
+
+
+def run_generate_level(args):
+    try:
+        generator = SyntheticLevelGenerator(args.spawns, args.duration, num_floors=args.floors, spawn_locations_per_floor=args.spawn_locations_per_floor,
+                                            arrivals=args.arrivals, high_priority_share=args.high_priority_share, rush_hour_share=args.rush_hour_share, seed=args.seed,
+                                            lift_count=args.lifts)
+    except ValueError as e:
+        print(f"Could not generate level {args.generate_level}: {e}")
+        return
+    start = time.perf_counter()
+    try:
+        level_path = generator.write("data/levels", args.generate_level, overwrite=args.overwrite)
+    except FileExistsError as e:
+        print(f"{e}; use --overwrite to replace it")
+        return
+    print(f"Generated {args.spawns} spawns ({args.arrivals}) over {args.duration:.0f}s on {args.floors} floors "
+          f"with {args.spawn_locations_per_floor} spawn locations each and {args.lifts} lifts into {level_path} in {time.perf_counter() - start:.2f}s")
 
 
 def main():
-    game = LiftUpGame()
+    args = parse_args()
+    if args.batch:
+        run_batch(args)
+        return
+    if args.replay:
+        run_replay(args)
+        return
+    if args.generate_level is not None:
+        run_generate_level(args)
+        return
+    if args.headless:
+        run_headless(args)
+        return
+    game = LiftUpGame(dirty_rects=args.dirty_rects, history_backend=args.history_backend, record_inputs=not args.no_record,
+                      profile=args.profile, profile_overlay=args.profile_overlay, profile_trace_path=args.profile_trace)
     game.run()
 
 
@@ -1,10 +1,12 @@
 from __future__ import annotations
 import pygame as pg
 import time
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Union
 from post_level.PostLevelCompleteAction import PostLevelCompleteAction
+from post_level.MenuScreen import MenuScreen
 from GameHistoryPersistence import GameHistoryPersistence
-from RawGameHistoryEntry import RawGameHistoryEntry
+from SqliteGameHistoryPersistence import SqliteGameHistoryPersistence
+from FontRegistry import FontRegistry
 
 if TYPE_CHECKING:
     from Level import Level
@@ -15,7 +17,7 @@ if TYPE_CHECKING:
 class GameHistoryShowAction(PostLevelCompleteAction):
     def __init__(self,
                  game: LiftUpGame,
-                 persistence: GameHistoryPersistence,
+                 persistence: Union[GameHistoryPersistence, SqliteGameHistoryPersistence],
                  level_select_action: PostLevelCompleteAction,
                  exit_action: ExitAction):
         self.game = game
@@ -30,20 +32,14 @@ class GameHistoryShowAction(PostLevelCompleteAction):
         # --- Surface Setup ---
         button_panel_height = 120
         history_panel_height = height - button_panel_height
-        history_surface = pg.Surface((width, history_panel_height))
-        button_surface = pg.Surface((width, button_panel_height))
+        history_surface = pg.Surface((width, height)).convert()
 
         # --- Data Processing ---
-        all_history = self.persistence.read_all()
-        best_scores: Dict[str, RawGameHistoryEntry] = {}
-        for entry in all_history:
-            if entry.level not in best_scores or entry.penalty < best_scores[entry.level].penalty:
-                best_scores[entry.level] = entry
-        sorted_levels = sorted(best_scores.keys(), key=lambda x: int(x.split('_')[-1]))
-        recent_runs = sorted(all_history, key=lambda x: x.timestamp_epoch_seconds, reverse=True)[:10]
+        best_scores = self.persistence.best_per_level()
+        recent_runs = self.persistence.recent(10)
 
         # --- UI Setup ---
-        title_font, header_font, row_font, small_row_font, button_font = pg.font.Font(None, 74), pg.font.Font(None, 50), pg.font.Font(None, 36), pg.font.Font(None, 28), pg.font.Font(None, 32)
+        title_font, header_font, row_font, small_row_font, button_font = FontRegistry.get(None, 74), FontRegistry.get(None, 50), FontRegistry.get(None, 36), FontRegistry.get(None, 28), FontRegistry.get(None, 32)
         WHITE, GREY, RED, PURPLE, GOLD, BACKGROUND, PANEL_BG = (255, 255, 255), (150, 150, 150), (200, 100, 100), (170, 100, 200), (255, 215, 0), (30, 30, 30), (40, 40, 40)
 
         # --- Button Setup ---
@@ -51,7 +47,7 @@ class GameHistoryShowAction(PostLevelCompleteAction):
         button_width, button_height = 180, 60
         total_width = len(buttons) * button_width + (len(buttons) - 1) * 40
         start_x = (width - total_width) / 2
-        button_rects = [(pg.Rect(start_x + i * (button_width + 40), (button_panel_height - button_height) / 2, button_width, button_height), text, color, action) for i, (text, color, action) in enumerate(buttons)]
+        button_rects = [(pg.Rect(start_x + i * (button_width + 40), history_panel_height + (button_panel_height - button_height) / 2, button_width, button_height), text, color, action) for i, (text, color, action) in enumerate(buttons)]
 
         # --- Pre-render History Surface ---
         history_surface.fill(BACKGROUND)
@@ -64,8 +60,8 @@ class GameHistoryShowAction(PostLevelCompleteAction):
         history_surface.blit(header_font.render("Date", True, WHITE), header_font.render("Date", True, WHITE).get_rect(center=(col_date_x, y_offset)))
         pg.draw.line(history_surface, GOLD, (50, y_offset + 30), (width - 50, y_offset + 30), 2)
         y_offset += 60
-        for level_name in sorted_levels:
-            entry = best_scores[level_name]
+        for entry in best_scores:
+            level_name = entry.level
             history_surface.blit(row_font.render(level_name.replace('_', ' ').title(), True, WHITE), row_font.render(level_name.replace('_', ' ').title(), True, WHITE).get_rect(center=(col_level_x, y_offset)))
             history_surface.blit(row_font.render(f"{entry.penalty:.2f}", True, WHITE), row_font.render(f"{entry.penalty:.2f}", True, WHITE).get_rect(center=(col_penalty_x, y_offset)))
             history_surface.blit(row_font.render(time.strftime('%Y-%m-%d', time.localtime(entry.timestamp_epoch_seconds)), True, GREY), row_font.render(time.strftime('%Y-%m-%d', time.localtime(entry.timestamp_epoch_seconds)), True, GREY).get_rect(center=(col_date_x, y_offset)))
@@ -82,26 +78,13 @@ class GameHistoryShowAction(PostLevelCompleteAction):
             history_surface.blit(small_row_font.render(time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.timestamp_epoch_seconds)), True, GREY), small_row_font.render(time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.timestamp_epoch_seconds)), True, GREY).get_rect(center=(col_date_x, y_offset)))
             y_offset += 30
 
+        # The button panel covers whatever didn't fit into the history panel
+        history_surface.fill(PANEL_BG, (0, history_panel_height, width, button_panel_height))
+
         # --- Main Loop ---
-        running = True
-        while running:
-            for event in pg.event.get():
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    mouse_pos = pg.mouse.get_pos()
-                    # Adjust mouse_pos for button surface
-                    mouse_y_on_button_surface = mouse_pos[1] - history_panel_height
-                    for rect, _, _, action in button_rects:
-                        if rect.collidepoint((mouse_pos[0], mouse_y_on_button_surface)):
-                            action.execute(level)
-                            running = False
-                            break
-            
-            button_surface.fill(PANEL_BG)
-            for rect, text, color, _ in button_rects:
-                pg.draw.rect(button_surface, color, rect, border_radius=10)
-                text_surf = button_font.render(text, True, BACKGROUND if color != GREY else WHITE)
-                button_surface.blit(text_surf, text_surf.get_rect(center=rect.center))
+        menu = MenuScreen(screen, history_surface, button_font)
+        for rect, text, color, action in button_rects:
+            menu.add_button(rect, text, color, BACKGROUND if color != GREY else WHITE, action)
 
-            screen.blit(history_surface, (0, 0))
-            screen.blit(button_surface, (0, history_panel_height))
-            pg.display.flip()
+        action = menu.run()
+        (action or self.exit_action).execute(level)
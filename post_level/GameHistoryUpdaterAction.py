@@ -1,8 +1,9 @@
 from __future__ import annotations
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
 from post_level.PostLevelCompleteAction import PostLevelCompleteAction
 from GameHistoryPersistence import GameHistoryPersistence
+from SqliteGameHistoryPersistence import SqliteGameHistoryPersistence
 from RawGameHistoryEntry import RawGameHistoryEntry
 
 if TYPE_CHECKING:
@@ -10,7 +11,7 @@ if TYPE_CHECKING:
 
 
 class GameHistoryUpdaterAction(PostLevelCompleteAction):
-    def __init__(self, level_num: int, persistence: GameHistoryPersistence):
+    def __init__(self, level_num: int, persistence: Union[GameHistoryPersistence, SqliteGameHistoryPersistence]):
         self.level_num = level_num
         self.persistence = persistence
 
@@ -0,0 +1,29 @@
+from __future__ import annotations
+import os
+import time
+from typing import TYPE_CHECKING
+from post_level.PostLevelCompleteAction import PostLevelCompleteAction
+
+if TYPE_CHECKING:
+    from Level import Level
+    from InputRecorder import InputRecorder
+
+
+class InputLogSaverAction(PostLevelCompleteAction):
+    def __init__(self, recorder: InputRecorder, output_path: str):
+        """
+        An action that saves the input log of the completed level, for replaying it later.
+
+        Args:
+            recorder (InputRecorder): The recorder attached to the level.
+            output_path (str): The directory to save the log in.
+        """
+        self.recorder = recorder
+        self.output_path = output_path
+
+    def execute(self, level: Level):
+        """
+        Saves the log as level_<num>_<timestamp>.json.
+        """
+        file_path = os.path.join(self.output_path, f"level_{self.recorder.level_num}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        self.recorder.save(file_path)
@@ -2,15 +2,17 @@ from __future__ import annotations
 import pygame as pg
 from typing import TYPE_CHECKING, Callable
 from post_level.PostLevelCompleteAction import PostLevelCompleteAction
+from post_level.MenuScreen import MenuScreen
+from FontRegistry import FontRegistry
 
 if TYPE_CHECKING:
     from Level import Level
-    from LevelsLoader import LevelsLoader
+    from LevelCatalog import LevelCatalog
 
 
 class LevelSelectionAction(PostLevelCompleteAction):
-    def __init__(self, levels_loader: LevelsLoader, level_runner_factory: Callable[[int], PostLevelCompleteAction]):
-        self.levels_loader = levels_loader
+    def __init__(self, level_catalog: LevelCatalog, level_runner_factory: Callable[[int], PostLevelCompleteAction]):
+        self.level_catalog = level_catalog
         self.level_runner_factory = level_runner_factory
 
     def execute(self, level: Level):
@@ -18,23 +20,27 @@ class LevelSelectionAction(PostLevelCompleteAction):
         width, height = screen.get_size()
 
         # --- Find available levels ---
-        available_levels = []
-        level_num = 1
-        while self.levels_loader.level_exists(level_num):
-            available_levels.append(level_num)
-            level_num += 1
+        # Picks up levels added or changed since the last visit, re-reading only those
+        self.level_catalog.refresh()
+        available_levels = self.level_catalog.available_levels()
 
         # --- UI Setup ---
-        title_font = pg.font.Font(None, 74)
-        button_font = pg.font.Font(None, 50)
+        title_font = FontRegistry.get(None, 74)
+        button_font = FontRegistry.get(None, 50)
         
         WHITE = (255, 255, 255)
         GOLD = (255, 215, 0)
         BLUE = (100, 100, 200)
         BACKGROUND = (30, 30, 30)
 
+        # --- Pre-render Background ---
+        background = pg.Surface((width, height)).convert()
+        background.fill(BACKGROUND)
+        title_surf = title_font.render("Select a Level", True, GOLD)
+        background.blit(title_surf, title_surf.get_rect(center=(width / 2, 100)))
+        menu = MenuScreen(screen, background, button_font)
+
         # --- Button Setup ---
-        buttons = []
         button_width, button_height = 120, 80
         cols = 5
         gap = 20
@@ -47,28 +53,9 @@ class LevelSelectionAction(PostLevelCompleteAction):
             x = start_x + col * (button_width + gap)
             y = start_y + row * (button_height + gap)
             rect = pg.Rect(x, y, button_width, button_height)
-            buttons.append((rect, f"Level {num}", BLUE, self.level_runner_factory(num)))
-
-        running = True
-        while running:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # In a real game, you might want an ExitAction here, but for now, we just exit the loop
-                    running = False
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    for rect, _, _, action in buttons:
-                        if rect.collidepoint(event.pos):
-                            action.execute(level)
-                            running = False
-                            break
-            
-            screen.fill(BACKGROUND)
-            title_surf = title_font.render("Select a Level", True, GOLD)
-            screen.blit(title_surf, title_surf.get_rect(center=(width / 2, 100)))
-
-            for rect, text, color, _ in buttons:
-                pg.draw.rect(screen, color, rect, border_radius=10)
-                text_surf = button_font.render(text, True, WHITE)
-                screen.blit(text_surf, text_surf.get_rect(center=rect.center))
+            menu.add_button(rect, f"Level {num}", BLUE, WHITE, self.level_runner_factory(num))
 
-            pg.display.flip()
+        # In a real game, you might want an ExitAction when the window is closed, but for now, we just leave the menu
+        action = menu.run()
+        if action:
+            action.execute(level)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 import pygame as pg
 import time
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Union
 from post_level.PostLevelCompleteAction import PostLevelCompleteAction
+from post_level.MenuScreen import MenuScreen
 from GameHistoryPersistence import GameHistoryPersistence
+from SqliteGameHistoryPersistence import SqliteGameHistoryPersistence
+from FontRegistry import FontRegistry
 
 if TYPE_CHECKING:
     from Level import Level
@@ -14,7 +17,7 @@ class LevelTransitionAction(PostLevelCompleteAction):
     def __init__(self,
                  game: LiftUpGame,
                  level_num: int,
-                 persistence: GameHistoryPersistence,
+                 persistence: Union[GameHistoryPersistence, SqliteGameHistoryPersistence],
                  next_level_action: Optional[PostLevelCompleteAction],
                  replay_action: PostLevelCompleteAction,
                  level_select_action: PostLevelCompleteAction,
@@ -34,10 +37,9 @@ class LevelTransitionAction(PostLevelCompleteAction):
         final_penalty = level.status_bar.total_penalty
 
         level_name = f"level_{self.level_num}"
-        level_history = [entry for entry in self.persistence.read_all() if entry.level == level_name]
-        level_history.sort(key=lambda x: x.timestamp_epoch_seconds, reverse=True)
+        level_history = self.persistence.level_history(level_name, limit=5)
 
-        title_font, score_font, header_font, row_font, button_font = pg.font.Font(None, 74), pg.font.Font(None, 60), pg.font.Font(None, 50), pg.font.Font(None, 32), pg.font.Font(None, 32)
+        title_font, score_font, header_font, row_font, button_font = FontRegistry.get(None, 74), FontRegistry.get(None, 60), FontRegistry.get(None, 50), FontRegistry.get(None, 32), FontRegistry.get(None, 32)
         WHITE, GREY, GREEN, BLUE, RED, PURPLE, GOLD, BACKGROUND = (255, 255, 255), (150, 150, 150), (100, 200, 100), (100, 100, 200), (200, 100, 100), (170, 100, 200), (255, 215, 0), (30, 30, 30)
 
         buttons, button_width, button_height = [], 180, 60
@@ -49,47 +51,35 @@ class LevelTransitionAction(PostLevelCompleteAction):
         buttons.append(("Show History", GREY, self.game_history_show_action))
         buttons.append(("Exit", RED, self.exit_action))
 
-        total_width = len(buttons) * button_width + (len(buttons) - 1) * 20
-        start_x = (screen.get_width() - total_width) / 2
-        button_rects = [(pg.Rect(start_x + i * (button_width + 20), screen.get_height() - 100, button_width, button_height), text, color, action) for i, (text, color, action) in enumerate(buttons)]
+        # --- Pre-render Background ---
+        background = pg.Surface(screen.get_size()).convert()
+        background.fill(BACKGROUND)
+        title_surf = title_font.render(f"Level {self.level_num} Complete!", True, GOLD)
+        background.blit(title_surf, title_surf.get_rect(center=(screen.get_width() / 2, 80)))
+        score_text_surf = row_font.render("Your Penalty:", True, WHITE)
+        background.blit(score_text_surf, score_text_surf.get_rect(center=(screen.get_width() / 2, 160)))
+        score_val_surf = score_font.render(f"{final_penalty:.2f}", True, GOLD)
+        background.blit(score_val_surf, score_val_surf.get_rect(center=(screen.get_width() / 2, 210)))
 
-        running = True
-        while running:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    self.exit_action.execute(level)
-                    running = False
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    for rect, _, _, action in button_rects:
-                        if rect.collidepoint(event.pos):
-                            action.execute(level)
-                            running = False
-                            break
-            
-            screen.fill(BACKGROUND)
-            title_surf = title_font.render(f"Level {self.level_num} Complete!", True, GOLD)
-            screen.blit(title_surf, title_surf.get_rect(center=(screen.get_width() / 2, 80)))
-            score_text_surf = row_font.render("Your Penalty:", True, WHITE)
-            screen.blit(score_text_surf, score_text_surf.get_rect(center=(screen.get_width() / 2, 160)))
-            score_val_surf = score_font.render(f"{final_penalty:.2f}", True, GOLD)
-            screen.blit(score_val_surf, score_val_surf.get_rect(center=(screen.get_width() / 2, 210)))
-            
-            y_offset = 300
-            history_header_surf = header_font.render("Level History", True, WHITE)
-            screen.blit(history_header_surf, history_header_surf.get_rect(center=(screen.get_width() / 2, y_offset)))
-            y_offset += 50
-            pg.draw.line(screen, GOLD, (100, y_offset), (screen.get_width() - 100, y_offset), 1)
-            y_offset += 30
-            for entry in level_history[:5]:
-                date_str, penalty_str = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.timestamp_epoch_seconds)), f"{entry.penalty:.2f}"
-                date_surf, penalty_surf = row_font.render(date_str, True, GREY), row_font.render(penalty_str, True, WHITE)
-                screen.blit(date_surf, date_surf.get_rect(center=(screen.get_width() / 2 - 100, y_offset)))
-                screen.blit(penalty_surf, penalty_surf.get_rect(center=(screen.get_width() / 2 + 150, y_offset)))
-                y_offset += 40
+        y_offset = 300
+        history_header_surf = header_font.render("Level History", True, WHITE)
+        background.blit(history_header_surf, history_header_surf.get_rect(center=(screen.get_width() / 2, y_offset)))
+        y_offset += 50
+        pg.draw.line(background, GOLD, (100, y_offset), (screen.get_width() - 100, y_offset), 1)
+        y_offset += 30
+        for entry in level_history:
+            date_str, penalty_str = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.timestamp_epoch_seconds)), f"{entry.penalty:.2f}"
+            date_surf, penalty_surf = row_font.render(date_str, True, GREY), row_font.render(penalty_str, True, WHITE)
+            background.blit(date_surf, date_surf.get_rect(center=(screen.get_width() / 2 - 100, y_offset)))
+            background.blit(penalty_surf, penalty_surf.get_rect(center=(screen.get_width() / 2 + 150, y_offset)))
+            y_offset += 40
 
-            for rect, text, color, _ in button_rects:
-                pg.draw.rect(screen, color, rect, border_radius=10)
-                text_surf = button_font.render(text, True, BACKGROUND if color != GREY else WHITE)
-                screen.blit(text_surf, text_surf.get_rect(center=rect.center))
+        menu = MenuScreen(screen, background, button_font)
+        total_width = len(buttons) * button_width + (len(buttons) - 1) * 20
+        start_x = (screen.get_width() - total_width) / 2
+        for i, (text, color, action) in enumerate(buttons):
+            rect = pg.Rect(start_x + i * (button_width + 20), screen.get_height() - 100, button_width, button_height)
+            menu.add_button(rect, text, color, BACKGROUND if color != GREY else WHITE, action)
 
-            pg.display.flip()
+        action = menu.run()
+        (action or self.exit_action).execute(level)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import pygame as pg
+from typing import List, Optional, Tuple
+from post_level.PostLevelCompleteAction import PostLevelCompleteAction
+
+Color = Tuple[int, int, int]
+
+
+class MenuScreen:
+    # How long to block waiting for input before checking again; nothing is redrawn on a timeout
+    IDLE_WAIT_MS = 500
+    HOVER_BORDER_COLOR = (255, 255, 255)
+
+    def __init__(self, screen: pg.Surface, background: pg.Surface, button_font: pg.font.Font):
+        """
+        A full-screen menu that draws a pre-rendered background plus buttons, and then sleeps until there is input.
+        The screen is only redrawn when the hovered button changes or the window needs repainting, so a menu that is
+        left open uses no CPU.
+
+        Args:
+            screen (pg.Surface): The display surface.
+            background (pg.Surface): Everything but the buttons, rendered once by the caller.
+            button_font (pg.font.Font): The font for the button labels.
+        """
+        self.screen = screen
+        self.background = background
+        self.button_font = button_font
+        self.buttons: List[Tuple[pg.Rect, pg.Surface, Color, PostLevelCompleteAction]] = []
+        self.hovered_index: Optional[int] = None
+
+    def add_button(self, rect: pg.Rect, text: str, color: Color, text_color: Color, action: PostLevelCompleteAction):
+        """Adds a button in screen coordinates; its label is rendered once, here."""
+        label = self.button_font.render(text, True, text_color)
+        self.buttons.append((rect, label, color, action))
+
+    def _button_index_at(self, pos: Tuple[int, int]) -> Optional[int]:
+        for i, (rect, _, _, _) in enumerate(self.buttons):
+            if rect.collidepoint(pos):
+                return i
+        return None
+
+    def _draw(self):
+        self.screen.blit(self.background, (0, 0))
+        for i, (rect, label, color, _) in enumerate(self.buttons):
+            pg.draw.rect(self.screen, color, rect, border_radius=10)
+            if i == self.hovered_index:
+                pg.draw.rect(self.screen, self.HOVER_BORDER_COLOR, rect, 3, border_radius=10)
+            self.screen.blit(label, label.get_rect(center=rect.center))
+        pg.display.flip()
+
+    def run(self) -> Optional[PostLevelCompleteAction]:
+        """
+        Shows the menu until a button is clicked or the window is closed.
+
+        Returns:
+            Optional[PostLevelCompleteAction]: The action of the clicked button, or None if the window was closed.
+        """
+        self.hovered_index = self._button_index_at(pg.mouse.get_pos())
+        self._draw()
+        while True:
+            event = pg.event.wait(self.IDLE_WAIT_MS)
+            if event.type == pg.QUIT:
+                return None
+            if event.type == pg.MOUSEBUTTONDOWN:
+                index = self._button_index_at(event.pos)
+                if index is not None:
+                    return self.buttons[index][3]
+            elif event.type == pg.MOUSEMOTION:
+                index = self._button_index_at(event.pos)
+                if index != self.hovered_index:
+                    self.hovered_index = index
+                    self._draw()
+            elif event.type in (pg.WINDOWEXPOSED, pg.VIDEOEXPOSE):
+                self._draw()
@@ -7,4 +7,6 @@ class UnloadLevelAction(PostLevelCompleteAction):
         self.game = game
 
     def execute(self, level: Level):
+        if self.game.current_level:
+            self.game.current_level.close()
         self.game.current_level = None